@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminpanel', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminactivitylog',
+            index=models.Index(fields=['-timestamp', '-id'], name='activitylog_ts_id_idx'),
+        ),
+    ]
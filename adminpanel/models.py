@@ -9,6 +9,11 @@ class AdminActivityLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     details = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='activitylog_ts_id_idx'),
+        ]
+
 class AdminRole(models.Model):
     name = models.CharField(max_length=50)
     permissions = models.TextField()
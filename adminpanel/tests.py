@@ -1,3 +1,24 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from users.models import User
+from .models import AdminActivityLog, AdminRole
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_activitylog_list(self):
+        def create_rows(count):
+            AdminActivityLog.objects.bulk_create(AdminActivityLog(user=self.user, action='login') for _ in range(count))
+
+        self.assertConstantQueries('/api/adminpanel/activitylog/', create_rows, 1)
+
+    def test_role_list(self):
+        staff = [User.objects.create_user(f'staff-{index}') for index in range(3)]
+
+        def create_rows(count):
+            for _ in range(count):
+                AdminRole.objects.create(name='Support', permissions='read').users.set(staff)
+
+        # The page, then one prefetch for every role's users.
+        response = self.assertConstantQueries('/api/adminpanel/role/', create_rows, 2)
+        self.assertEqual(len(response.data['results'][0]['users']), 3)
@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import AdminActivityLog, AdminRole
 from .serializers import AdminActivityLogSerializer, AdminRoleSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # AdminActivityLog APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import AdminActivityLogSerializer, AdminRoleSerializer
     operation_description="Retrieve a list of all admin activity logs",
     operation_summary="Get all admin activity logs",
     tags=['Admin Panel'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Admin activity logs retrieved successfully",
@@ -37,8 +39,7 @@ from .serializers import AdminActivityLogSerializer, AdminRoleSerializer
 @api_view(['GET'])
 def activitylog_list(request):
     logs = AdminActivityLog.objects.all()
-    serializer = AdminActivityLogSerializer(logs, many=True)
-    return Response(serializer.data)
+    return paginate(request, logs, AdminActivityLogSerializer, ordering=('-timestamp', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -100,8 +101,7 @@ def activitylog_delete(request, pk):
 @api_view(['GET'])
 def adminrole_list(request):
     roles = AdminRole.objects.all()
-    serializer = AdminRoleSerializer(roles, many=True)
-    return Response(serializer.data)
+    return paginate(request, roles, AdminRoleSerializer, ordering=('id',))
 
 @api_view(['POST'])
 def adminrole_create(request):
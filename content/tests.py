@@ -1,3 +1,20 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from .models import Banner, Tutorial
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_banner_list(self):
+        def create_rows(count):
+            Banner.objects.bulk_create(Banner(title='Sale', image='banners/sale.png') for _ in range(count))
+
+        self.assertConstantQueries('/api/content/banner/', create_rows, 1)
+
+    def test_tutorial_list(self):
+        def create_rows(count):
+            Tutorial.objects.bulk_create(
+                Tutorial(title='Getting started', video_url='https://example.com/v', language='en') for _ in range(count)
+            )
+
+        self.assertConstantQueries('/api/content/tutorial/', create_rows, 1)
@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import Banner, Tutorial
 from .serializers import BannerSerializer, TutorialSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # Banner APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import BannerSerializer, TutorialSerializer
     operation_description="Retrieve a list of all banners",
     operation_summary="Get all banners",
     tags=['Content Management'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Banners retrieved successfully",
@@ -39,8 +41,7 @@ from .serializers import BannerSerializer, TutorialSerializer
 @api_view(['GET'])
 def banner_list(request):
     banners = Banner.objects.all()
-    serializer = BannerSerializer(banners, many=True)
-    return Response(serializer.data)
+    return paginate(request, banners, BannerSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -118,8 +119,7 @@ def banner_delete(request, pk):
 @api_view(['GET'])
 def tutorial_list(request):
     tutorials = Tutorial.objects.all()
-    serializer = TutorialSerializer(tutorials, many=True)
-    return Response(serializer.data)
+    return paginate(request, tutorials, TutorialSerializer, ordering=('-created_at', '-id'))
 
 @api_view(['POST'])
 def tutorial_create(request):
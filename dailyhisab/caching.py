@@ -0,0 +1,75 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 15 * 60
+
+
+class LocalLRU:
+    """A small thread-safe per-process LRU map."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _version_key(namespace, business_id):
+    return f'{namespace}:version:{business_id}'
+
+
+def get_version(namespace, business_id):
+    key = _version_key(namespace, business_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace, business_id):
+    """Make every cached value of `namespace` for this business unreachable."""
+    cache.delete(_version_key(namespace, business_id))
+
+
+def bump_version_on_commit(namespace, business_id):
+    # After commit, so a concurrent reader cannot re-cache the pre-write state.
+    transaction.on_commit(lambda: bump_version(namespace, business_id))
+
+
+def cached_for_business(namespace, business_id, key_parts, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return compute() cached under (namespace, business, key_parts), dropped
+    as a whole whenever bump_version(namespace, business_id) is called.
+    """
+    key = ':'.join([namespace, str(business_id), get_version(namespace, business_id)] + [str(part) for part in key_parts])
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,141 @@
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.db.models import Q
+from drf_yasg import openapi
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .prefetch import optimize_queryset
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a composite ordering such as ('-date', '-id').
+
+    The cursor is an opaque token holding the ordering values of the last row
+    on the page, so each request becomes `WHERE (date, id) < (...) LIMIT n`
+    and never counts or offsets into the table. The last ordering field must
+    be unique (normally 'id') so that rows sharing a date are never skipped.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-id',)
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def keyset_filter(self, position):
+        # Lexicographic "row comes after position" for mixed asc/desc keys:
+        # (a < x) OR (a = x AND b < y) OR (a = x AND b = y AND c < z) ...
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8')
+            values = json.loads(raw)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_first_link(self):
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
+
+
+def paginate(request, queryset, serializer_class, ordering=None):
+    """Serialize one keyset page of `queryset` for a function-based list view."""
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(optimize_queryset(queryset, serializer_class), request)
+    serializer = serializer_class(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+CURSOR_PARAMETERS = [
+    openapi.Parameter(
+        KeysetPagination.cursor_query_param,
+        openapi.IN_QUERY,
+        description="Opaque cursor taken from the `next` link of the previous page",
+        type=openapi.TYPE_STRING,
+        required=False
+    ),
+    openapi.Parameter(
+        KeysetPagination.page_size_query_param,
+        openapi.IN_QUERY,
+        description=f"Results per page (default {KeysetPagination.page_size}, max {KeysetPagination.max_page_size})",
+        type=openapi.TYPE_INTEGER,
+        required=False
+    ),
+]
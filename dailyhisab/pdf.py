@@ -0,0 +1,98 @@
+"""
+Minimal PDF writer for plain, monospaced text.
+
+Good enough for statements and report exports without a PDF dependency:
+pages are A4 (portrait or landscape), text is Courier (one of the standard
+14 fonts, so nothing is embedded) and characters outside Latin-1 are
+replaced with '?'.
+"""
+import io
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 40
+FONT_SIZE = 9
+LEADING = 12
+
+
+def page_capacity(width, height):
+    """(lines per page, characters per line) for a page of this size."""
+    # Courier glyphs are 0.6em wide.
+    return (height - 2 * MARGIN) // LEADING, int((width - 2 * MARGIN) / (FONT_SIZE * 0.6))
+
+
+def _escape(line):
+    text = line.encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _content(lines, height, chars_per_line):
+    stream = [f'BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {height - MARGIN} Td']
+    # The ' operator moves to the next line and shows the string.
+    stream.extend(f"({_escape(line[:chars_per_line])}) '" for line in lines)
+    stream.append('ET')
+    return '\n'.join(stream).encode('latin-1')
+
+
+def _pages(lines, lines_per_page):
+    """Group `lines` into pages as they are read; no lines still make one blank page."""
+    page, started = [], False
+    for line in lines:
+        page.append(line.rstrip('\n'))
+        if len(page) == lines_per_page:
+            yield page
+            page, started = [], True
+    if page or not started:
+        yield page or ['']
+
+
+def write_text_pdf(handle, lines, landscape=False):
+    """
+    Lay `lines` out top to bottom over as many pages as needed and write
+    the PDF to the binary file `handle`.
+
+    `lines` may be any iterable. Each page is written as soon as it is
+    full, so only one page of text is in memory at a time. The page tree
+    has to list every page, so it is written last.
+    """
+    width, height = (PAGE_HEIGHT, PAGE_WIDTH) if landscape else (PAGE_WIDTH, PAGE_HEIGHT)
+    lines_per_page, chars_per_line = page_capacity(width, height)
+    header = b'%PDF-1.4\n'
+    handle.write(header)
+    offsets = {}
+    position = len(header)
+
+    def write_object(number, body):
+        nonlocal position
+        chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        handle.write(chunk)
+        offsets[number] = position
+        position += len(chunk)
+
+    # Objects 1-3 are the catalog, page tree and font; each page then takes two (page, content).
+    write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>')
+    page_numbers = []
+    for page in _pages(lines, lines_per_page):
+        number = 4 + 2 * len(page_numbers)
+        page_numbers.append(number)
+        content = _content(page, height, chars_per_line)
+        write_object(number, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {number + 1} 0 R >>'
+        ).encode('ascii'))
+        write_object(number + 1, b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+    kids = ' '.join(f'{number} 0 R' for number in page_numbers)
+    write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>'.encode('ascii'))
+
+    xref = position
+    handle.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(offsets) + 1))
+    for number in range(1, len(offsets) + 1):
+        handle.write(b'%010d 00000 n \n' % offsets[number])
+    handle.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(offsets) + 1, xref))
+
+
+def text_pdf(lines, landscape=False):
+    """Lay `lines` out top to bottom over as many pages as needed and return the PDF bytes."""
+    out = io.BytesIO()
+    write_text_pdf(out, lines, landscape)
+    return out.getvalue()
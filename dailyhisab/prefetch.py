@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def relation_paths(serializer_class, prefix=''):
+    """
+    Work out which relations a serializer will read, as (select_related, prefetch_related).
+
+    Nested single serializers become JOINs (recursively, so nested-of-nested is
+    covered too); nested `many=True` serializers and many-to-many primary key
+    fields become prefetches. Plain primary key fields read the local `*_id`
+    column and need nothing.
+    """
+    select, prefetch = [], []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append(path)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(path)
+            nested_select, nested_prefetch = relation_paths(type(field), prefix=path + '__')
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+    return tuple(select), tuple(prefetch)
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Join or prefetch everything `serializer_class` reads so serializing is constant-query."""
+    select, prefetch = relation_paths(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
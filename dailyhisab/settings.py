@@ -53,6 +53,8 @@ INSTALLED_APPS = [
     'content',
     'feedback',
     'settings',
+    'sync',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -147,9 +149,27 @@ STATIC_ROOT = '/var/www/html/static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/var/www/html/media'
 
+# Threads per process that render customer statements (see udhari.statements).
+STATEMENT_WORKERS = 2
+
+# Threads per process that generate queued report exports (see reports.jobs);
+# 0 leaves them to a separate `manage.py run_report_exports` process.
+REPORT_EXPORT_WORKERS = 2
+
+# Delta sync only serves rows at least this old (see sync.views), so a write
+# whose transaction commits within this many seconds of stamping updated_at
+# is never skipped by a cursor that has already moved past it.
+SYNC_SETTLE_SECONDS = 60
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Country calling code assumed for phone numbers entered without one (India).
+DEFAULT_PHONE_COUNTRY_CODE = '91'
+# Digits in a national number of that country; a longer digit string that
+# already starts with the country code is taken as already carrying it.
+DEFAULT_PHONE_NATIONAL_DIGITS = 10
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -159,10 +179,34 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'dailyhisab.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
+# Cache
+# Cached values are invalidated by bumping per-business version tokens kept
+# here (see dailyhisab.caching), so every process that writes has to share
+# it: the gunicorn workers, and management commands such as settle_udhari,
+# reconcile_*, the importers and run_report_exports. LocMem is per process.
+# With it, a command's invalidations never reach the web workers, whose
+# cached values and per-process LRUs (which have no TTL) stay stale until
+# that worker itself writes to the business. Set REDIS_URL wherever more
+# than one process runs; docker-compose does.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'dailyhisab',
+        }
+    }
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -0,0 +1,64 @@
+"""Shared helpers for the apps' test cases."""
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from users.models import Business, User
+
+
+class APITestCaseMixin:
+    """An owner, their business and an APIClient authenticated as the owner."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user('owner', password='x')
+        cls.business = Business.objects.create(name='Shop', owner=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ListQueryCountMixin(APITestCaseMixin):
+    """Checks that a paginated list endpoint costs the same queries for a single row as for a full page."""
+    page_size = 10
+
+    def assertConstantQueries(self, url, create_rows, queries, params=None):
+        """
+        `create_rows(count)` adds `count` rows the endpoint lists. The page
+        is fetched after adding one row and again after adding a full page
+        of them; both fetches must take exactly `queries` queries.
+        """
+        params = {'page_size': self.page_size, **(params or {})}
+        for count in (1, self.page_size):
+            create_rows(count)
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertGreaterEqual(len(response.data['results']), count)
+        self.assertIsNotNone(response.data['next'])
+        return response
+
+
+class MediaRootMixin:
+    """Points MEDIA_ROOT at a temporary directory for the test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def media_file(self, name):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as handle:
+            handle.write('data')
+        return path
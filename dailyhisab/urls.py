@@ -52,4 +52,6 @@ urlpatterns = [
     path('api/content/', include('content.urls')),
     path('api/feedback/', include('feedback.urls')),
     path('api/settings/', include('settings.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/search/', include('search.urls')),
 ]
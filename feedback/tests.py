@@ -1,3 +1,14 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from .models import FeedbackTicket
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_ticket_list(self):
+        def create_rows(count):
+            FeedbackTicket.objects.bulk_create(
+                FeedbackTicket(user=self.user, tag='bug', message='Crash', assigned_to=self.user) for _ in range(count)
+            )
+
+        self.assertConstantQueries('/api/feedback/ticket/', create_rows, 1)
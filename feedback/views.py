@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import FeedbackTicket
 from .serializers import FeedbackTicketSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # FeedbackTicket APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import FeedbackTicketSerializer
     operation_description="Retrieve a list of all feedback tickets",
     operation_summary="Get all feedback tickets",
     tags=['Feedback & Support'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Feedback tickets retrieved successfully",
@@ -39,8 +41,7 @@ from .serializers import FeedbackTicketSerializer
 @api_view(['GET'])
 def feedbackticket_list(request):
     tickets = FeedbackTicket.objects.all()
-    serializer = FeedbackTicketSerializer(tickets, many=True)
-    return Response(serializer.data)
+    return paginate(request, tickets, FeedbackTicketSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
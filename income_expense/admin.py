@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Category, IncomeExpense
+from .models import BalanceCheckpoint, Category, IncomeExpense, LedgerRollup
 
 admin.site.register(Category)
 admin.site.register(IncomeExpense)
+admin.site.register(LedgerRollup)
+admin.site.register(BalanceCheckpoint)
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractHour, ExtractIsoWeekDay
+
+from .models import IncomeExpense
+
+LEDGER_CACHE_NAMESPACE = 'ledger'
+CENTS = Decimal('0.01')
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _zero():
+    return {'income': Decimal('0'), 'expense': Decimal('0'), 'count': 0}
+
+
+def _add(bucket, row):
+    bucket['income'] += row['income']
+    bucket['expense'] += row['expense']
+    bucket['count'] += row['count']
+
+
+def _as_output(bucket):
+    return {
+        'income': str(bucket['income'].quantize(CENTS)),
+        'expense': str(bucket['expense'].quantize(CENTS)),
+        'net': str((bucket['income'] - bucket['expense']).quantize(CENTS)),
+        'count': bucket['count'],
+    }
+
+
+def breakdown(business_id, date_from, date_to):
+    """
+    Income/expense totals by category, payment mode, weekday and hour.
+
+    A single GROUP BY over the finest grain (category, mode, weekday, hour)
+    with conditional sums for income and expense is the only query; the four
+    breakdowns are then folded from its few hundred rows in Python.
+    """
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    rows = (
+        IncomeExpense.objects
+        .filter(business_id=business_id, date__gte=date_from, date__lte=date_to)
+        .annotate(weekday=ExtractIsoWeekDay('date'), hour=ExtractHour('time'))
+        .values('category_id', 'category__name', 'payment_mode', 'weekday', 'hour')
+        .annotate(
+            income=Coalesce(Sum('amount', filter=Q(type='income')), zero),
+            expense=Coalesce(Sum('amount', filter=Q(type='expense')), zero),
+            count=Count('id'),
+        )
+        .order_by()
+    )
+
+    totals = _zero()
+    by_category, category_names = {}, {}
+    by_mode, by_weekday, by_hour = {}, {}, {}
+    for row in rows:
+        _add(totals, row)
+        _add(by_category.setdefault(row['category_id'], _zero()), row)
+        category_names[row['category_id']] = row['category__name']
+        _add(by_mode.setdefault(row['payment_mode'] or '', _zero()), row)
+        _add(by_weekday.setdefault(row['weekday'], _zero()), row)
+        _add(by_hour.setdefault(row['hour'], _zero()), row)
+
+    def ordered(buckets, sort_key):
+        return sorted(buckets.items(), key=lambda item: sort_key(item[0]))
+
+    return {
+        'business': business_id,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'totals': _as_output(totals),
+        'by_category': [
+            {'category_id': category_id, 'category': category_names[category_id], **_as_output(bucket)}
+            for category_id, bucket in sorted(by_category.items(), key=lambda item: -(item[1]['income'] + item[1]['expense']))
+        ],
+        'by_payment_mode': [
+            {'payment_mode': mode or None, **_as_output(bucket)}
+            for mode, bucket in sorted(by_mode.items(), key=lambda item: -(item[1]['income'] + item[1]['expense']))
+        ],
+        'by_weekday': [
+            {'weekday': weekday, 'name': WEEKDAYS[weekday - 1], **_as_output(bucket)}
+            for weekday, bucket in ordered(by_weekday, lambda weekday: weekday)
+        ],
+        # Entries without a time are reported under hour null.
+        'by_hour': [
+            {'hour': hour, **_as_output(bucket)}
+            for hour, bucket in ordered(by_hour, lambda hour: (hour is None, hour or 0))
+        ],
+    }
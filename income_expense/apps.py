@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class IncomeExpenseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'income_expense'
+
+    def ready(self):
+        from . import signals  # noqa: F401
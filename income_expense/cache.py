@@ -0,0 +1,45 @@
+from django.core.cache import cache
+
+from dailyhisab.caching import LocalLRU, bump_version, get_version
+
+from .models import Category
+
+CATEGORY_CACHE_NAMESPACE = 'categories'
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+LOCAL_CACHE_SIZE = 1024
+
+
+_local = LocalLRU(LOCAL_CACHE_SIZE)
+
+
+def _data_key(business_id, version):
+    return f'income_expense:categories:{business_id}:{version}'
+
+
+def get_business_categories(business_id):
+    """
+    Return {id: Category} for a business.
+
+    The per-process LRU is checked against a version token in the shared
+    Django cache, so an invalidation in any worker is seen by all of them.
+    The returned objects are shared between requests and must not be mutated.
+    """
+    version = get_version(CATEGORY_CACHE_NAMESPACE, business_id)
+    local = _local.get(business_id)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    categories = cache.get(_data_key(business_id, version))
+    if categories is None:
+        categories = {
+            category.pk: category
+            for category in Category.objects.filter(business_id=business_id).order_by('id')
+        }
+        cache.set(_data_key(business_id, version), categories, CATEGORY_CACHE_TIMEOUT)
+    _local.set(business_id, (version, categories))
+    return categories
+
+
+def invalidate_business_categories(business_id):
+    bump_version(CATEGORY_CACHE_NAMESPACE, business_id)
+    _local.pop(business_id)
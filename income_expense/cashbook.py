@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum, Window
+
+from .models import BalanceCheckpoint, IncomeExpense, LedgerRollup, signed
+
+
+def balance_before(business_id, date, entry_id):
+    """
+    Cash balance of every entry ordered before (date, entry_id).
+
+    Costs a checkpoint lookup, one aggregate over at most a month of daily
+    rollups and one over the same day's earlier entries, however long the
+    ledger is.
+    """
+    month_start = date.replace(day=1)
+    balance = BalanceCheckpoint.objects.balance_before(business_id, month_start)
+    balance += LedgerRollup.objects.filter(
+        business_id=business_id, date__gte=month_start, date__lt=date
+    ).net()
+    same_day = IncomeExpense.objects.filter(business_id=business_id, date=date, id__lt=entry_id)
+    balance += same_day.aggregate(net=Sum(signed('amount')))['net'] or Decimal('0')
+    return balance
+
+
+def with_running_total(queryset):
+    """
+    Annotate `running_total`: the cumulative net of the rows selected by the
+    queryset's filters, in (date, id) order. The database streams the window
+    in index order, so taking one page stays proportional to the page size.
+    """
+    return queryset.annotate(
+        running_total=Window(expression=Sum(signed('amount')), order_by=[F('date').asc(), F('id').asc()])
+    )
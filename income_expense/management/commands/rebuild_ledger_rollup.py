@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+from income_expense.models import BalanceCheckpoint, IncomeExpense, LedgerRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily ledger rollup table from IncomeExpense entries and reset balance checkpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only rebuild rollups for this business ID")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        entries = IncomeExpense.objects.all()
+        rollups = LedgerRollup.objects.all()
+        checkpoints = BalanceCheckpoint.objects.all()
+        if options['business']:
+            entries = entries.filter(business_id=options['business'])
+            rollups = rollups.filter(business_id=options['business'])
+            checkpoints = checkpoints.filter(business_id=options['business'])
+
+        buckets = (
+            entries.annotate(mode=Coalesce('payment_mode', Value('')))
+            .values('business_id', 'date', 'type', 'category_id', 'mode')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by()
+        )
+
+        batch_size = options['batch_size']
+        created = 0
+        with transaction.atomic():
+            rollups.delete()
+            # Balance checkpoints are derived from the rollups and rebuilt lazily on next read.
+            checkpoints.delete()
+            batch = []
+            for bucket in buckets.iterator(chunk_size=batch_size):
+                batch.append(LedgerRollup(
+                    business_id=bucket['business_id'],
+                    date=bucket['date'],
+                    type=bucket['type'],
+                    category_id=bucket['category_id'],
+                    payment_mode=bucket['mode'],
+                    total=bucket['total'],
+                    count=bucket['count'],
+                ))
+                if len(batch) >= batch_size:
+                    LedgerRollup.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            LedgerRollup.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} ledger rollup rows."))
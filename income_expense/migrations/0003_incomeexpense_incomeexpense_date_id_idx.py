@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('income_expense', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incomeexpense',
+            index=models.Index(fields=['-date', '-id'], name='incomeexpense_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:13
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    # The same buckets rebuild_ledger_rollup builds, so existing entries are counted from the start.
+    IncomeExpense = apps.get_model('income_expense', 'IncomeExpense')
+    LedgerRollup = apps.get_model('income_expense', 'LedgerRollup')
+    buckets = (
+        IncomeExpense.objects.annotate(mode=Coalesce('payment_mode', Value('')))
+        .values('business_id', 'date', 'type', 'category_id', 'mode')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    batch = []
+    for bucket in buckets.iterator(chunk_size=2000):
+        batch.append(LedgerRollup(
+            business_id=bucket['business_id'], date=bucket['date'], type=bucket['type'],
+            category_id=bucket['category_id'], payment_mode=bucket['mode'],
+            total=bucket['total'], count=bucket['count'],
+        ))
+        if len(batch) >= 2000:
+            LedgerRollup.objects.bulk_create(batch)
+            batch = []
+    LedgerRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('income_expense', '0003_incomeexpense_incomeexpense_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('payment_mode', models.CharField(blank=True, default='', max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_rollups', to='users.business')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='income_expense.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business', 'date'], name='ledgerrollup_business_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('business', 'date', 'type', 'category', 'payment_mode'), name='unique_ledgerrollup_bucket'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('income_expense', '0004_ledgerrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='incomeexpense',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['business', 'updated_at', 'id'], name='category_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incomeexpense',
+            index=models.Index(fields=['business', 'updated_at', 'id'], name='incomeexpense_sync_idx'),
+        ),
+    ]
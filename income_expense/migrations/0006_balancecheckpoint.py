@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('income_expense', '0005_category_updated_at_incomeexpense_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='incomeexpense',
+            index=models.Index(fields=['business', 'date', 'id'], name='incomeexpense_cashbook_idx'),
+        ),
+        migrations.AddField(
+            model_name='balancecheckpoint',
+            name='business',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='users.business'),
+        ),
+        migrations.AddConstraint(
+            model_name='balancecheckpoint',
+            constraint=models.UniqueConstraint(fields=('business', 'date'), name='unique_balancecheckpoint_month'),
+        ),
+    ]
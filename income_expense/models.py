@@ -1,4 +1,8 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncMonth
 
 
 from users.models import User, Business
@@ -8,6 +12,12 @@ class Category(models.Model):
     type = models.CharField(max_length=10, choices=[('income', 'Income'), ('expense', 'Expense')])
     business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='categories')
     default = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['business', 'updated_at', 'id'], name='category_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
@@ -27,7 +37,190 @@ class IncomeExpense(models.Model):
     payment_mode = models.CharField(max_length=20, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     voice_entry = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='incomeexpense_date_id_idx'),
+            models.Index(fields=['business', 'updated_at', 'id'], name='incomeexpense_sync_idx'),
+            models.Index(fields=['business', 'date', 'id'], name='incomeexpense_cashbook_idx'),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.amount}"
+
+    def save(self, *args, **kwargs):
+        # Deletes are rolled up by the post_delete signal so cascades are covered too.
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = IncomeExpense.objects.select_for_update().filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if previous is not None:
+                LedgerRollup.objects.apply([previous], sign=-1)
+            LedgerRollup.objects.apply([self])
+
+
+def lock_ledgers(business_ids):
+    """
+    Lock the given businesses (in id order) until the transaction ends.
+
+    Rollup writers and checkpoint builders both take this lock, so a
+    checkpoint is never computed from rollups that a concurrent entry is
+    still changing. FOR NO KEY UPDATE leaves inserts referencing the
+    business unblocked.
+    """
+    ids = sorted(set(business_ids))
+    list(Business.objects.select_for_update(no_key=True).filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+
+
+def signed(field, type_field='type'):
+    """Expression for `field` as a cash movement: positive for income, negative for expense."""
+    return Case(When(**{type_field: 'income'}, then=F(field)), default=-F(field))
+
+
+class LedgerRollupQuerySet(models.QuerySet):
+    def apply(self, entries, sign=1):
+        """Add (sign=1) or subtract (sign=-1) the given entries from their daily buckets."""
+        deltas = {}
+        net_by_day = {}
+        for entry in entries:
+            amount = sign * Decimal(entry.amount)
+            key = (entry.business_id, entry.date, entry.type, entry.category_id, entry.payment_mode or '')
+            total, count = deltas.get(key, (Decimal('0'), 0))
+            deltas[key] = (total + amount, count + sign)
+            day = (entry.business_id, entry.date)
+            net_by_day[day] = net_by_day.get(day, Decimal('0')) + (amount if entry.type == 'income' else -amount)
+
+        if not deltas:
+            return
+        with transaction.atomic():
+            lock_ledgers(business_id for business_id, date in net_by_day)
+            BalanceCheckpoint.objects.shift(net_by_day)
+            for (business_id, date, entry_type, category_id, payment_mode), (total, count) in deltas.items():
+                if not total and not count:
+                    continue
+                bucket = self.filter(
+                    business_id=business_id, date=date, type=entry_type,
+                    category_id=category_id, payment_mode=payment_mode,
+                )
+                increment = {'total': F('total') + total, 'count': F('count') + count}
+                pk = bucket.select_for_update().order_by('pk').values_list('pk', flat=True).first()
+                if pk is not None:
+                    self.filter(pk=pk).update(**increment)
+                elif count > 0:
+                    try:
+                        with transaction.atomic():
+                            self.create(
+                                business_id=business_id, date=date, type=entry_type,
+                                category_id=category_id, payment_mode=payment_mode,
+                                total=total, count=count,
+                            )
+                    except IntegrityError:
+                        bucket.update(**increment)
+                # A missing bucket on subtraction means it was cascaded away with its business.
+
+    def for_business(self, business, date_from=None, date_to=None):
+        qs = self.filter(business=business)
+        if date_from:
+            qs = qs.filter(date__gte=date_from)
+        if date_to:
+            qs = qs.filter(date__lte=date_to)
+        return qs
+
+    def net(self):
+        return self.aggregate(net=Sum(signed('total')))['net'] or Decimal('0')
+
+    def monthly(self):
+        return (
+            self.annotate(month=TruncMonth('date'))
+            .values('month', 'type')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by('month', 'type')
+        )
+
+
+class LedgerRollup(models.Model):
+    """Per-day totals of IncomeExpense, maintained on every entry write."""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='ledger_rollups')
+    date = models.DateField()
+    type = models.CharField(max_length=10, choices=IncomeExpense.ENTRY_TYPE)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    payment_mode = models.CharField(max_length=20, blank=True, default='')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    objects = LedgerRollupQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['business', 'date'], name='ledgerrollup_business_date_idx'),
+        ]
+        constraints = [
+            # Uncategorised buckets may briefly duplicate when a category is deleted;
+            # readers always aggregate, so only categorised buckets are unique.
+            models.UniqueConstraint(
+                fields=['business', 'date', 'type', 'category', 'payment_mode'],
+                condition=models.Q(category__isnull=False),
+                name='unique_ledgerrollup_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} {self.date} {self.type}: {self.total}"
+
+
+class BalanceCheckpointQuerySet(models.QuerySet):
+    def shift(self, net_by_day):
+        """Move every checkpoint after each (business_id, date) by that day's net change."""
+        for (business_id, date), net in net_by_day.items():
+            if net:
+                self.filter(business_id=business_id, date__gt=date).update(balance=F('balance') + net)
+
+    def balance_before(self, business_id, month_start):
+        """
+        Cash balance of all entries dated before `month_start` (a first of month).
+
+        Served from the stored checkpoint when there is one; otherwise it is
+        built from the nearest earlier checkpoint plus the daily rollups in
+        between and stored for next time.
+        """
+        existing = self.filter(business_id=business_id, date=month_start).values_list('balance', flat=True).first()
+        if existing is not None:
+            return existing
+        with transaction.atomic():
+            # Keeps entries from changing the rollups between the read and the insert.
+            lock_ledgers([business_id])
+            existing = self.filter(business_id=business_id, date=month_start).values_list('balance', flat=True).first()
+            if existing is not None:
+                return existing
+            previous = self.filter(business_id=business_id, date__lt=month_start).order_by('-date').first()
+            rollups = LedgerRollup.objects.filter(business_id=business_id, date__lt=month_start)
+            if previous is not None:
+                rollups = rollups.filter(date__gte=previous.date)
+            balance = (previous.balance if previous is not None else Decimal('0')) + rollups.net()
+            try:
+                with transaction.atomic():
+                    self.create(business_id=business_id, date=month_start, balance=balance)
+            except IntegrityError:
+                # Databases without row locks (SQLite) can still race here.
+                return self.get(business_id=business_id, date=month_start).balance
+        return balance
+
+
+class BalanceCheckpoint(models.Model):
+    """Cash balance of a business's ledger before `date` (always a first of month)."""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='balance_checkpoints')
+    date = models.DateField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    objects = BalanceCheckpointQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'date'], name='unique_balancecheckpoint_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} before {self.date}: {self.balance}"
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from users.models import User, Business
+from .cache import get_business_categories
 from .models import Category, IncomeExpense
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -6,15 +8,82 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
+class CachedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Resolves a category id from the entry business's category cache, falling back to the DB."""
+    def to_internal_value(self, data):
+        business_id = self._business_id()
+        if business_id is not None and not isinstance(data, bool):
+            try:
+                category = get_business_categories(business_id).get(int(data))
+            except (TypeError, ValueError):
+                category = None
+            if category is not None:
+                return category
+        return super().to_internal_value(data)
+
+    def _business_id(self):
+        business = self.parent.initial_data.get('business') if hasattr(self.parent, 'initial_data') else None
+        if business is None and self.parent.instance is not None:
+            return self.parent.instance.business_id
+        try:
+            return int(business)
+        except (TypeError, ValueError):
+            return None
+
 class IncomeExpenseSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = CachedCategoryField(
         queryset=Category.objects.all(), source='category', write_only=True, required=False
     )
     class Meta:
         model = IncomeExpense
         fields = [
             'id', 'user', 'business', 'amount', 'type', 'category', 'category_id',
-            'date', 'time', 'payment_mode', 'notes', 'created_at', 'voice_entry'
+            'date', 'time', 'payment_mode', 'notes', 'created_at', 'updated_at', 'voice_entry'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves primary keys against objects pre-loaded into `context[context_key]`."""
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.context[self.context_key].get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class IncomeExpenseBulkItemSerializer(IncomeExpenseSerializer):
+    """Validates one entry of a bulk sync batch without per-item relation queries."""
+    user = PrefetchedPrimaryKeyRelatedField('users', queryset=User.objects.all())
+    business = PrefetchedPrimaryKeyRelatedField('businesses', queryset=Business.objects.all())
+    category_id = PrefetchedPrimaryKeyRelatedField(
+        'categories', queryset=Category.objects.all(), source='category', write_only=True, required=False
+    )
+
+    @classmethod
+    def prefetch_context(cls, items):
+        """Load every user, business and category referenced by `items` in one query each."""
+        def ids(field):
+            found = set()
+            for item in items:
+                try:
+                    found.add(int(item.get(field)))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+            return found
+        return {
+            'users': User.objects.in_bulk(ids('user')),
+            'businesses': Business.objects.in_bulk(ids('business')),
+            'categories': Category.objects.in_bulk(ids('category_id')),
+        }
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dailyhisab.caching import bump_version_on_commit
+from .analytics import LEDGER_CACHE_NAMESPACE
+from .cache import invalidate_business_categories
+from .models import Category, IncomeExpense, LedgerRollup
+
+
+@receiver(post_delete, sender=IncomeExpense)
+def remove_entry_from_rollup(sender, instance, **kwargs):
+    LedgerRollup.objects.apply([instance], sign=-1)
+
+
+@receiver(post_save, sender=IncomeExpense)
+@receiver(post_delete, sender=IncomeExpense)
+def invalidate_ledger_cache(sender, instance, **kwargs):
+    bump_version_on_commit(LEDGER_CACHE_NAMESPACE, instance.business_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    # After commit, so a concurrent reader cannot re-cache the pre-write rows.
+    business_id = instance.business_id
+    transaction.on_commit(lambda: invalidate_business_categories(business_id))
@@ -1,3 +1,253 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import APITestCaseMixin, ListQueryCountMixin
+from dailyhisab.caching import bump_version
+from .cache import CATEGORY_CACHE_NAMESPACE, get_business_categories
+from .cashbook import balance_before
+from .models import BalanceCheckpoint, Category, IncomeExpense, LedgerRollup, signed
+
+
+class LedgerTestCase(APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def entry(self, amount, date, type='income', **fields):
+        return IncomeExpense.objects.create(
+            user=self.user, business=self.business, amount=Decimal(amount), type=type, date=date, **fields,
+        )
+
+
+class LedgerRollupTests(LedgerTestCase):
+    def rollup_state(self):
+        """Non-empty rollup buckets of the business, merged the way readers aggregate them."""
+        buckets = (
+            LedgerRollup.objects.filter(business=self.business)
+            .values('date', 'type', 'category_id', 'payment_mode')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by('date', 'type', 'category_id', 'payment_mode')
+        )
+        return [
+            (bucket['date'], bucket['type'], bucket['category_id'], bucket['payment_mode'], bucket['total'], bucket['count'])
+            for bucket in buckets if bucket['count'] or bucket['total']
+        ]
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollup_state()
+        call_command('rebuild_ledger_rollup', business=self.business.pk, stdout=io.StringIO())
+        self.assertEqual(maintained, self.rollup_state())
+
+    def test_create_update_delete_match_rebuild(self):
+        rent = Category.objects.create(name='Rent', type='expense', business=self.business)
+        sales = Category.objects.create(name='Sales', type='income', business=self.business)
+        day = datetime.date(2025, 1, 10)
+        first = self.entry('100.00', day, category=sales, payment_mode='cash')
+        second = self.entry('40.00', day, type='expense', category=rent, payment_mode='upi')
+        self.entry('60.00', day, category=sales, payment_mode='cash')
+        self.entry('15.25', day + datetime.timedelta(days=1))
+        self.assertMatchesRebuild()
+
+        first.amount = Decimal('80.00')
+        first.payment_mode = 'card'
+        first.save()
+        second.type = 'income'
+        second.category = sales
+        second.date = day - datetime.timedelta(days=3)
+        second.save()
+        self.assertMatchesRebuild()
+
+        first.delete()
+        self.entry('9.99', day, payment_mode=None).delete()
+        self.assertMatchesRebuild()
+
+        rent.delete()
+        sales.delete()
+        self.assertMatchesRebuild()
+
+    def test_bulk_sync_matches_rebuild(self):
+        entries = [
+            {'user': self.user.pk, 'business': self.business.pk, 'amount': amount, 'type': type, 'date': date}
+            for amount, type, date in (
+                ('10.00', 'income', '2025-01-01'), ('2.50', 'expense', '2025-01-01'), ('7.00', 'income', '2025-01-02'),
+            )
+        ]
+        response = self.client.post('/api/income-expense/bulk/', {'entries': entries}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertMatchesRebuild()
+        self.assertEqual(LedgerRollup.objects.filter(business=self.business).net(), Decimal('14.50'))
+
+    def test_deleting_business_removes_rollups(self):
+        self.entry('5.00', datetime.date(2025, 1, 1))
+        self.business.delete()
+        self.assertFalse(LedgerRollup.objects.exists())
+
+
+class AnalyticsTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sales = Category.objects.create(name='Sales', type='income', business=self.business)
+        self.rent = Category.objects.create(name='Rent', type='expense', business=self.business)
+        monday = datetime.date(2025, 1, 6)
+        self.entry('100.00', monday, category=self.sales, payment_mode='cash', time=datetime.time(9, 15))
+        self.entry('40.00', monday, type='expense', category=self.rent, payment_mode='upi', time=datetime.time(9, 45))
+        self.entry('60.00', monday + datetime.timedelta(days=1), category=self.sales, payment_mode='cash', time=datetime.time(18))
+        self.entry('10.00', monday + datetime.timedelta(days=2), type='expense')
+        self.entry('999.00', monday + datetime.timedelta(days=14), category=self.sales, payment_mode='cash')
+
+    def analytics(self, date_from='2025-01-06', date_to='2025-01-12'):
+        response = self.client.get(
+            '/api/income-expense/analytics/', {'business': self.business.pk, 'date_from': date_from, 'date_to': date_to},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_breakdowns(self):
+        data = self.analytics()
+        self.assertEqual(data['totals'], {'income': '160.00', 'expense': '50.00', 'net': '110.00', 'count': 4})
+        self.assertEqual(
+            [(row['category'], row['income'], row['expense'], row['count']) for row in data['by_category']],
+            [('Sales', '160.00', '0.00', 2), ('Rent', '0.00', '40.00', 1), (None, '0.00', '10.00', 1)],
+        )
+        self.assertEqual(
+            [(row['payment_mode'], row['net']) for row in data['by_payment_mode']],
+            [('cash', '160.00'), ('upi', '-40.00'), (None, '-10.00')],
+        )
+        self.assertEqual(
+            [(row['name'], row['count']) for row in data['by_weekday']], [('Monday', 2), ('Tuesday', 1), ('Wednesday', 1)],
+        )
+        self.assertEqual([(row['hour'], row['net']) for row in data['by_hour']], [(9, '60.00'), (18, '60.00'), (None, '-10.00')])
+
+    def test_date_range(self):
+        self.assertEqual(self.analytics('2025-01-07', '2025-01-20')['totals']['income'], '1059.00')
+        self.assertEqual(self.analytics('2025-01-08', '2025-01-08')['totals'], {
+            'income': '0.00', 'expense': '10.00', 'net': '-10.00', 'count': 1,
+        })
+        for date_from, date_to in (('2025-01-12', '2025-01-06'), ('2025-02-30', '2025-03-01')):
+            response = self.client.get(
+                '/api/income-expense/analytics/', {'business': self.business.pk, 'date_from': date_from, 'date_to': date_to},
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_ledger_write_shows_on_next_request(self):
+        self.analytics()
+        with self.assertNumQueries(0):
+            self.analytics()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry('5.00', datetime.date(2025, 1, 9), category=self.sales)
+        self.assertEqual(self.analytics()['totals']['income'], '165.00')
+
+
+class CategoryCacheTests(LedgerTestCase):
+    def test_writes_invalidate_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rent = Category.objects.create(name='Rent', type='expense', business=self.business)
+        self.assertEqual([c.name for c in get_business_categories(self.business.pk).values()], ['Rent'])
+        with self.assertNumQueries(0):
+            get_business_categories(self.business.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rent.name = 'Shop rent'
+            rent.save()
+        self.assertEqual([c.name for c in get_business_categories(self.business.pk).values()], ['Shop rent'])
+        with self.captureOnCommitCallbacks(execute=True):
+            rent.delete()
+        self.assertEqual(get_business_categories(self.business.pk), {})
+
+    def test_version_bump_from_another_process_is_seen(self):
+        get_business_categories(self.business.pk)
+        # A write that skipped the signals, then a bump of the shared version
+        # token as any other process would do it.
+        Category.objects.bulk_create([Category(name='Rent', type='expense', business=self.business)])
+        self.assertEqual(get_business_categories(self.business.pk), {})
+        bump_version(CATEGORY_CACHE_NAMESPACE, self.business.pk)
+        self.assertEqual(len(get_business_categories(self.business.pk)), 1)
+
+
+class CashbookTests(LedgerTestCase):
+    def raw_balance_before(self, date):
+        entries = IncomeExpense.objects.filter(business=self.business, date__lt=date)
+        return entries.aggregate(net=Sum(signed('amount')))['net'] or Decimal('0')
+
+    def test_checkpoint_follows_backdated_writes(self):
+        self.entry('100.00', datetime.date(2025, 1, 10))
+        feb = self.entry('40.00', datetime.date(2025, 2, 3), type='expense')
+        march = datetime.date(2025, 3, 1)
+        self.assertEqual(BalanceCheckpoint.objects.balance_before(self.business.pk, march), Decimal('60.00'))
+
+        jan = self.entry('25.00', datetime.date(2025, 1, 20))
+        feb.amount = Decimal('10.00')
+        feb.save()
+        jan.date = datetime.date(2025, 3, 5)
+        jan.save()
+        self.entry('7.50', datetime.date(2024, 12, 31), type='expense').delete()
+
+        stored = BalanceCheckpoint.objects.get(business=self.business, date=march).balance
+        self.assertEqual(stored, self.raw_balance_before(march))
+        self.assertEqual(stored, Decimal('90.00'))
+
+    def test_later_checkpoint_builds_on_earlier_one(self):
+        self.entry('100.00', datetime.date(2025, 1, 10))
+        BalanceCheckpoint.objects.balance_before(self.business.pk, datetime.date(2025, 2, 1))
+        self.entry('30.00', datetime.date(2025, 2, 10), type='expense')
+        self.entry('5.00', datetime.date(2025, 1, 2))
+        april = datetime.date(2025, 4, 1)
+        self.assertEqual(BalanceCheckpoint.objects.balance_before(self.business.pk, april), self.raw_balance_before(april))
+
+    def test_balance_before_entry(self):
+        first = self.entry('100.00', datetime.date(2025, 3, 10))
+        second = self.entry('20.00', datetime.date(2025, 3, 10), type='expense')
+        self.entry('1.00', datetime.date(2025, 2, 1))
+        self.assertEqual(balance_before(self.business.pk, second.date, second.pk), Decimal('101.00'))
+        self.assertEqual(balance_before(self.business.pk, first.date, first.pk), Decimal('1.00'))
+
+    def test_pages_carry_running_balance(self):
+        amounts = [('50.00', 'income'), ('20.00', 'expense'), ('5.00', 'income'), ('12.50', 'expense'), ('8.00', 'income')]
+        for day, (amount, type) in enumerate(amounts, 1):
+            self.entry(amount, datetime.date(2025, 1, day), type=type)
+
+        balances = []
+        url = f'/api/income-expense/cashbook/?business={self.business.pk}&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            balances.extend(row['balance'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(balances, ['50.00', '30.00', '35.00', '22.50', '30.50'])
+
+        response = self.client.get('/api/income-expense/cashbook/', {'business': self.business.pk, 'date_from': '2025-01-03'})
+        self.assertEqual(response.data['opening_balance'], '30.00')
+        self.assertEqual(response.data['results'][0]['balance'], '35.00')
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ('2025-02-30', 'yesterday'):
+            response = self.client.get('/api/income-expense/cashbook/', {'business': self.business.pk, 'date_from': value})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('date_from', response.data)
+
+
+class ListQueryTests(ListQueryCountMixin, LedgerTestCase):
+    def test_category_list(self):
+        def create_rows(count):
+            Category.objects.bulk_create(Category(name='Rent', type='expense', business=self.business) for _ in range(count))
+
+        self.assertConstantQueries('/api/income-expense/category/', create_rows, 1)
+
+    def test_entry_list_joins_category(self):
+        category = Category.objects.create(name='Sales', type='income', business=self.business)
+
+        def create_rows(count):
+            IncomeExpense.objects.bulk_create(
+                IncomeExpense(user=self.user, business=self.business, amount=10, type='income',
+                              date=datetime.date(2025, 1, 1), category=category)
+                for _ in range(count)
+            )
+
+        response = self.assertConstantQueries('/api/income-expense/', create_rows, 1)
+        self.assertEqual(response.data['results'][0]['category']['name'], 'Sales')
@@ -15,6 +15,9 @@ urlpatterns = [
     # IncomeExpense endpoints
     path('', views.income_expense_list, name='income-expense-list'),
     path('create/', views.income_expense_create, name='income-expense-create'),
+    path('bulk/', views.income_expense_bulk_create, name='income-expense-bulk-create'),
+    path('cashbook/', views.income_expense_cashbook, name='income-expense-cashbook'),
+    path('analytics/', views.income_expense_analytics, name='income-expense-analytics'),
     path('<int:pk>/', views.income_expense_detail, name='income-expense-detail'),
     path('<int:pk>/update/', views.income_expense_update, name='income-expense-update'),
     path('<int:pk>/delete/', views.income_expense_delete, name='income-expense-delete'),
@@ -3,17 +3,32 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Category, IncomeExpense
-from .serializers import CategorySerializer, IncomeExpenseSerializer
+from django.db import transaction
+from .models import Category, IncomeExpense, LedgerRollup
+from .serializers import CategorySerializer, IncomeExpenseSerializer, IncomeExpenseBulkItemSerializer
+from .cache import get_business_categories
+from .cashbook import balance_before, with_running_total
+from .analytics import LEDGER_CACHE_NAMESPACE, breakdown
+from dailyhisab.caching import bump_version_on_commit, cached_for_business
+from search.indexing import index_instances
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from dailyhisab.pagination import CURSOR_PARAMETERS, KeysetPagination, paginate
+from dailyhisab.prefetch import optimize_queryset
+import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 # Category APIs
 @swagger_auto_schema(
     method='get',
-    operation_description="Retrieve a list of all income/expense categories",
+    operation_description="Retrieve a list of all income/expense categories. "
+                          "With `business`, the business's categories are served from cache as a single page.",
     operation_summary="Get all categories",
     tags=['Categories'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Only this business's categories", type=openapi.TYPE_INTEGER, required=False),
+    ] + CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Categories retrieved successfully",
@@ -41,9 +56,17 @@ from drf_yasg import openapi
 )
 @api_view(['GET'])
 def category_list(request):
+    business_id = request.query_params.get('business')
+    if business_id:
+        try:
+            categories = get_business_categories(int(business_id)).values()
+        except ValueError:
+            return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = CategorySerializer(categories, many=True)
+        # A business has a handful of categories, so the cached set is returned as a single page.
+        return Response({'next': None, 'first': request.build_absolute_uri(), 'results': serializer.data})
     categories = Category.objects.all()
-    serializer = CategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    return paginate(request, categories, CategorySerializer, ordering=('id',))
 
 @swagger_auto_schema(
     method='post',
@@ -115,6 +138,7 @@ def category_delete(request, pk):
     operation_description="Retrieve a list of all income and expense entries",
     operation_summary="Get all income/expense entries",
     tags=['Income & Expense'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Income/expense entries retrieved successfully",
@@ -147,8 +171,7 @@ def category_delete(request, pk):
 @api_view(['GET'])
 def income_expense_list(request):
     entries = IncomeExpense.objects.all()
-    serializer = IncomeExpenseSerializer(entries, many=True)
-    return Response(serializer.data)
+    return paginate(request, entries, IncomeExpenseSerializer, ordering=('-date', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -196,6 +219,90 @@ def income_expense_create(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+BULK_SYNC_MAX_ENTRIES = 500
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Create many income/expense entries at once, e.g. when a device replays its offline queue. "
+                          "Valid entries are saved in a single transaction; invalid ones are reported per item.",
+    operation_summary="Bulk create income/expense entries",
+    tags=['Income & Expense'],
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['entries'],
+        properties={
+            'entries': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                description=f'Entries to create (max {BULK_SYNC_MAX_ENTRIES}), same fields as the create endpoint',
+                items=openapi.Schema(type=openapi.TYPE_OBJECT),
+            ),
+        },
+        example={
+            "entries": [
+                {"user": 1, "business": 1, "amount": "1500.00", "type": "income", "category_id": 2, "date": "2025-01-15"},
+                {"user": 1, "business": 1, "amount": "200.00", "type": "expense", "category_id": 1, "date": "2025-01-15"}
+            ]
+        }
+    ),
+    responses={
+        201: openapi.Response(
+            description="Batch processed; see per-item results",
+            examples={
+                "application/json": {
+                    "created": 1,
+                    "failed": 1,
+                    "results": [
+                        {"index": 0, "status": "created", "id": 10},
+                        {"index": 1, "status": "error", "errors": {"category_id": ["Invalid pk \"99\" - object does not exist."]}}
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Malformed batch or no valid entries")
+    }
+)
+@api_view(['POST'])
+def income_expense_bulk_create(request):
+    items = request.data.get('entries') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response({'entries': ['Expected a non-empty list of entries.']}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > BULK_SYNC_MAX_ENTRIES:
+        return Response(
+            {'entries': [f'Ensure this list has at most {BULK_SYNC_MAX_ENTRIES} entries.']},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    context = IncomeExpenseBulkItemSerializer.prefetch_context(items)
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        serializer = IncomeExpenseBulkItemSerializer(data=item, context=context)
+        if serializer.is_valid():
+            valid.append((index, IncomeExpense(**serializer.validated_data)))
+        else:
+            results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+
+    if not valid:
+        return Response(
+            {'created': 0, 'failed': len(results), 'results': results},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    entries = [entry for _, entry in valid]
+    with transaction.atomic():
+        IncomeExpense.objects.bulk_create(entries)
+        LedgerRollup.objects.apply(entries)
+        index_instances('income_expense', entries)
+        for business_id in {entry.business_id for entry in entries}:
+            bump_version_on_commit(LEDGER_CACHE_NAMESPACE, business_id)
+
+    results.extend({'index': index, 'status': 'created', 'id': entry.pk} for index, entry in valid)
+    results.sort(key=lambda result: result['index'])
+    return Response(
+        {'created': len(valid), 'failed': len(items) - len(valid), 'results': results},
+        status=status.HTTP_201_CREATED
+    )
+
 @swagger_auto_schema(
     method='get',
     operation_description="Retrieve a specific income/expense entry by ID",
@@ -241,7 +348,7 @@ def income_expense_create(request):
 @api_view(['GET'])
 def income_expense_detail(request, pk):
     try:
-        entry = IncomeExpense.objects.get(pk=pk)
+        entry = optimize_queryset(IncomeExpense.objects.all(), IncomeExpenseSerializer).get(pk=pk)
     except IncomeExpense.DoesNotExist:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     serializer = IncomeExpenseSerializer(entry)
@@ -366,3 +473,128 @@ def income_expense_delete(request, pk):
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     entry.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Cash book of one business: entries in date order, each with the running balance after it. "
+                          "Balances are anchored on stored monthly checkpoints, so any page of a long ledger is cheap.",
+    operation_summary="Get cash book with running balance",
+    tags=['Income & Expense'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('date_from', openapi.IN_QUERY, description="First date to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('date_to', openapi.IN_QUERY, description="Last date to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(
+            description="Cash book page",
+            examples={
+                "application/json": {
+                    "next": None,
+                    "first": "http://localhost/api/income-expense/cashbook/?business=1",
+                    "opening_balance": "10000.00",
+                    "results": [
+                        {"id": 1, "amount": "1500.00", "type": "income", "date": "2025-01-15", "balance": "11500.00"},
+                        {"id": 2, "amount": "500.00", "type": "expense", "date": "2025-01-15", "balance": "11000.00"}
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid date")
+    }
+)
+@api_view(['GET'])
+def income_expense_cashbook(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    entries = IncomeExpense.objects.filter(business_id=business_id)
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        if request.query_params.get(param):
+            try:
+                value = parse_date(request.query_params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                return Response({param: ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+            entries = entries.filter(**{lookup: value})
+
+    paginator = KeysetPagination(('date', 'id'))
+    entries = optimize_queryset(with_running_total(entries), IncomeExpenseSerializer)
+    page = paginator.paginate_queryset(entries, request)
+    results = IncomeExpenseSerializer(page, many=True).data
+
+    opening = None
+    if page:
+        first = page[0]
+        opening = balance_before(business_id, first.date, first.id)
+        # running_total starts from zero at the first row the filters select;
+        # re-base it on the true balance just before this page.
+        first_movement = first.amount if first.type == 'income' else -first.amount
+        offset = opening - (first.running_total - first_movement)
+        for entry, data in zip(page, results):
+            data['balance'] = str(offset + entry.running_total)
+
+    response = paginator.get_paginated_response(results)
+    response.data['opening_balance'] = str(opening) if opening is not None else None
+    return response
+
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Income/expense breakdown of one business by category, payment mode, weekday and hour of day "
+                          f"for a date range (default: last {ANALYTICS_DEFAULT_DAYS} days, max {ANALYTICS_MAX_DAYS}). "
+                          "Results are cached until the business's ledger changes.",
+    operation_summary="Get income/expense breakdown analytics",
+    tags=['Reports & Analytics'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('date_from', openapi.IN_QUERY, description="First date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('date_to', openapi.IN_QUERY, description="Last date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Breakdown computed",
+            examples={
+                "application/json": {
+                    "business": 1,
+                    "date_from": "2025-01-01",
+                    "date_to": "2025-01-31",
+                    "totals": {"income": "45000.00", "expense": "12000.00", "net": "33000.00", "count": 120},
+                    "by_category": [{"category_id": 2, "category": "Sales Revenue", "income": "45000.00", "expense": "0.00", "net": "45000.00", "count": 80}],
+                    "by_payment_mode": [{"payment_mode": "upi", "income": "30000.00", "expense": "2000.00", "net": "28000.00", "count": 70}],
+                    "by_weekday": [{"weekday": 1, "name": "Monday", "income": "6000.00", "expense": "1500.00", "net": "4500.00", "count": 17}],
+                    "by_hour": [{"hour": 10, "income": "5000.00", "expense": "0.00", "net": "5000.00", "count": 12}]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid range")
+    }
+)
+@api_view(['GET'])
+def income_expense_analytics(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date_to = parse_date(request.query_params.get('date_to') or timezone.localdate().isoformat())
+        date_from = parse_date(
+            request.query_params.get('date_from')
+            or (date_to - datetime.timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)).isoformat()
+        )
+    except (TypeError, ValueError):
+        date_from = date_to = None
+    if date_from is None or date_to is None or date_from > date_to:
+        return Response({'detail': 'Enter a valid date range (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+    if (date_to - date_from).days >= ANALYTICS_MAX_DAYS:
+        return Response({'detail': f'The range can span at most {ANALYTICS_MAX_DAYS} days.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = cached_for_business(
+        LEDGER_CACHE_NAMESPACE, business_id, ['breakdown', date_from, date_to],
+        lambda: breakdown(business_id, date_from, date_to),
+    )
+    return Response(data)
@@ -10,3 +10,8 @@ class Notification(models.Model):
     message = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
     opened = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-sent_at', '-id'], name='notification_sent_id_idx'),
+        ]
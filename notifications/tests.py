@@ -1,3 +1,14 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from .models import Notification
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_notification_list(self):
+        def create_rows(count):
+            Notification.objects.bulk_create(
+                Notification(user=self.user, business=self.business, title='Hi', message='Hello') for _ in range(count)
+            )
+
+        self.assertConstantQueries('/api/notifications/', create_rows, 1)
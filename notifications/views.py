@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import Notification
 from .serializers import NotificationSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # Notification APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import NotificationSerializer
     operation_description="Retrieve a list of all notifications",
     operation_summary="Get all notifications",
     tags=['Notifications'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Notifications retrieved successfully",
@@ -37,8 +39,7 @@ from .serializers import NotificationSerializer
 @api_view(['GET'])
 def notification_list(request):
     notifications = Notification.objects.all()
-    serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    return paginate(request, notifications, NotificationSerializer, ordering=('-sent_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -0,0 +1,188 @@
+import csv
+import datetime
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from dailyhisab.pdf import write_text_pdf
+
+from income_expense.models import IncomeExpense
+from stock.models import StockTransaction
+from udhari.models import Udhari
+
+from .summary import compute_summary
+
+EXPORT_CHUNK_SIZE = 2000
+PDF_COLUMN_WIDTH = 20
+# Column widths of PDF tables, in characters. They are fixed so a table can
+# be written while its rows are still being read; each ledger fits the 141
+# characters of a landscape page, and longer values are cut off.
+PDF_COLUMN_WIDTHS = {
+    'id': 8, 'date': 10, 'due_date': 10, 'time': 8, 'type': 7, 'amount': 12, 'category': 18,
+    'payment_mode': 12, 'notes': 21, 'voice_entry': 11, 'created_at': 16, 'customer_id': 11,
+    'customer': 20, 'given': 5, 'status': 6, 'stock_item_id': 13, 'stock_item': 20, 'unit': 6,
+    'transaction_type': 16, 'quantity': 12, 'section': 14, 'metric': 22, 'value': 16,
+}
+
+# kind -> (model, business lookup, [(column header, value path)])
+EXPORTS = {
+    'income_expense': (IncomeExpense, 'business_id', [
+        ('id', 'id'),
+        ('date', 'date'),
+        ('time', 'time'),
+        ('type', 'type'),
+        ('amount', 'amount'),
+        ('category', 'category__name'),
+        ('payment_mode', 'payment_mode'),
+        ('notes', 'notes'),
+        ('voice_entry', 'voice_entry'),
+        ('created_at', 'created_at'),
+    ]),
+    'udhari': (Udhari, 'customer__business_id', [
+        ('id', 'id'),
+        ('date', 'date'),
+        ('due_date', 'due_date'),
+        ('customer_id', 'customer_id'),
+        ('customer', 'customer__name'),
+        ('given', 'given'),
+        ('amount', 'amount'),
+        ('status', 'status'),
+        ('notes', 'notes'),
+        ('created_at', 'created_at'),
+    ]),
+    'stock': (StockTransaction, 'stock_item__business_id', [
+        ('id', 'id'),
+        ('date', 'date'),
+        ('stock_item_id', 'stock_item_id'),
+        ('stock_item', 'stock_item__name'),
+        ('unit', 'stock_item__unit'),
+        ('transaction_type', 'transaction_type'),
+        ('quantity', 'quantity'),
+        ('notes', 'notes'),
+        ('created_at', 'created_at'),
+    ]),
+}
+
+
+def export_queryset(kind, business_id, date_from=None, date_to=None):
+    """Return (header, values_list queryset) for a ledger export, in (date, id) order."""
+    model, business_lookup, columns = EXPORTS[kind]
+    queryset = model.objects.filter(**{business_lookup: business_id})
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    header = [name for name, _path in columns]
+    return header, queryset.order_by('date', 'id').values_list(*[path for _name, path in columns])
+
+
+def export_rows(kind, business_id, date_from=None, date_to=None):
+    """
+    Return (header, rows) for a ledger export. `rows` is a lazy iterator of
+    value tuples read through a chunked cursor, so no model instances are
+    built and memory stays flat however many rows there are.
+    """
+    header, rows = export_queryset(kind, business_id, date_from, date_to)
+    return header, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def csv_chunks(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_chunks(header, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def summary_table(business_id, date_from=None, date_to=None):
+    """The business summary as (header, rows) of (section, metric, value)."""
+    summary = compute_summary(business_id, date_from, date_to)
+    rows = [
+        (section, metric, value)
+        for section in ('income_expense', 'udhari', 'stock')
+        for metric, value in summary[section].items()
+    ]
+    return ['section', 'metric', 'value'], rows
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M')
+    return str(value)
+
+
+def _excel_value(value):
+    # openpyxl refuses timezone-aware datetimes.
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_xlsx(path, header, rows):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows to disk instead of building the sheet in memory.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_excel_value(value) for value in row])
+    workbook.save(path)
+
+
+def _pdf_lines(header, rows):
+    widths = [PDF_COLUMN_WIDTHS.get(name, PDF_COLUMN_WIDTH) for name in header]
+
+    def line(values):
+        return '  '.join(value[:width].ljust(width) for value, width in zip(values, widths)).rstrip()
+
+    yield line(header)
+    yield '  '.join('-' * width for width in widths)
+    for row in rows:
+        yield line([_text(value) for value in row])
+
+
+def write_pdf(path, header, rows):
+    """A fixed-width text table, written page by page as the rows are read."""
+    with open(path, 'wb') as handle:
+        write_text_pdf(handle, _pdf_lines(header, rows), landscape=True)
+
+
+# export_format -> (writer, file extension)
+EXPORT_WRITERS = {
+    'csv': (write_csv, 'csv'),
+    'excel': (write_xlsx, 'xlsx'),
+    'pdf': (write_pdf, 'pdf'),
+}
@@ -0,0 +1,136 @@
+"""
+Background generation of ReportExport files.
+
+The ReportExport table is the queue. A new export is saved as 'queued', and
+a worker claims it with a conditional UPDATE (queued -> running), so two
+workers never run the same export and no broker is needed. Workers are
+threads in a local pool: every web process drains the queue with up to
+REPORT_EXPORT_WORKERS threads once an export is committed, and the
+run_report_exports command runs the same loop as a standalone process.
+
+A running export reports progress every EXPORT_CHUNK_SIZE rows, and that
+update doubles as its heartbeat: exports left running by a process that
+died are requeued once they have been silent for STALE_AFTER. Files are
+written under MEDIA_ROOT/exports/ with an unguessable name and served by
+nginx.
+"""
+import contextlib
+import datetime
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_WRITERS, export_queryset, summary_table
+from .models import ReportExport
+
+EXPORT_DIR = 'exports'
+STALE_AFTER = datetime.timedelta(minutes=10)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _tracked(rows, export_id, total):
+    """Yield rows, reporting progress on the export every EXPORT_CHUNK_SIZE rows."""
+    for count, row in enumerate(rows, 1):
+        yield row
+        if count % EXPORT_CHUNK_SIZE == 0:
+            ReportExport.objects.report_progress(export_id, min(99, count * 100 // total))
+
+
+def export_table(export):
+    """(header, rows, row count) of the data behind an export; ledger rows are streamed."""
+    if export.report_type == 'summary':
+        header, rows = summary_table(export.business_id, export.date_from, export.date_to)
+        return header, rows, len(rows)
+    header, queryset = export_queryset(export.report_type, export.business_id, export.date_from, export.date_to)
+    total = queryset.count()
+    return header, _tracked(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), export.pk, total), total
+
+
+def generate_export(export):
+    """
+    Write the file of a claimed export and mark it completed, or failed with the error.
+
+    The final update only applies while this claim still holds (the export
+    may have been deleted, or requeued as stale and claimed again); otherwise
+    the file is discarded.
+    """
+    writer, extension = EXPORT_WRITERS[export.export_format]
+    name = f'{EXPORT_DIR}/{export.business_id}/{export.report_type}-{export.pk}-{secrets.token_hex(16)}.{extension}'
+    path = default_storage.path(name)
+    partial = f'{path}.part'
+    claim = ReportExport.objects.filter(pk=export.pk, status='running', started_at=export.started_at)
+    try:
+        header, rows, total = export_table(export)
+        claim.update(row_count=total, updated_at=timezone.now())
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer(partial, header, rows)
+        os.replace(partial, path)
+    except Exception as exc:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(partial)
+        now = timezone.now()
+        claim.update(status='failed', error=f'{type(exc).__name__}: {exc}', finished_at=now, updated_at=now)
+        return False
+    now = timezone.now()
+    if not claim.update(status='completed', progress=100, file_path=name, finished_at=now, updated_at=now):
+        os.remove(path)
+        return False
+    return True
+
+
+def requeue_stale():
+    """Put back exports whose worker stopped reporting progress; returns how many."""
+    cutoff = timezone.now() - STALE_AFTER
+    return ReportExport.objects.filter(status='running', updated_at__lt=cutoff).update(
+        status='queued', progress=0, started_at=None, updated_at=timezone.now(),
+    )
+
+
+def claim_next():
+    """Claim the oldest queued export, or return None once the queue is empty."""
+    while True:
+        pk = ReportExport.objects.filter(status='queued').order_by('id').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        if ReportExport.objects.claim(pk):
+            return ReportExport.objects.get(pk=pk)
+
+
+def run_queued_exports():
+    """Generate queued exports until none are left; returns how many were run."""
+    close_old_connections()
+    try:
+        requeue_stale()
+        ran = 0
+        while True:
+            export = claim_next()
+            if export is None:
+                return ran
+            generate_export(export)
+            ran += 1
+    finally:
+        # Pool threads outlive requests; don't leave their connections open.
+        connection.close()
+
+
+def _start_workers():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Created on first use, so each gunicorn worker gets its own after forking.
+            _executor = ThreadPoolExecutor(max_workers=settings.REPORT_EXPORT_WORKERS, thread_name_prefix='report-exports')
+        _executor.submit(run_queued_exports)
+
+
+def enqueue():
+    """Have the local pool drain the queue once the current transaction commits (unless exports run out of process)."""
+    if settings.REPORT_EXPORT_WORKERS:
+        transaction.on_commit(_start_workers)
@@ -0,0 +1,104 @@
+import datetime
+import io
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.test.utils import CaptureQueriesContext
+
+from income_expense.models import IncomeExpense
+from reports.summary import business_summary, compute_summary
+from stock.models import StockItem
+from udhari.models import Customer
+from users.models import Business, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Time report_summary on a seeded business (rolled back afterwards) or an existing one, "
+        "against aggregating the raw ledger."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Benchmark this existing business instead of seeding one")
+        parser.add_argument('--entries', type=int, default=100000, help="Income/expense entries to seed")
+        parser.add_argument('--customers', type=int, default=5000, help="Customers to seed")
+        parser.add_argument('--items', type=int, default=2000, help="Stock items to seed")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per variant")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['business']:
+                business_id = options['business']
+            else:
+                business_id = self.seed(options['entries'], options['customers'], options['items'])
+            self.report(business_id, options['repeat'])
+            if not options['business']:
+                transaction.set_rollback(True)
+
+    def seed(self, entries, customers, items):
+        rng = random.Random(42)
+        owner = User.objects.create_user(username=f'benchmark-{time.time_ns()}')
+        business = Business.objects.create(name='Summary benchmark', owner=owner)
+        start = datetime.date.today() - datetime.timedelta(days=730)
+        batch = []
+        for index in range(entries):
+            batch.append(IncomeExpense(
+                user=owner, business=business, type=rng.choice(('income', 'expense')),
+                amount=Decimal(rng.randint(100, 500000)) / 100,
+                date=start + datetime.timedelta(days=rng.randrange(730)),
+                payment_mode=rng.choice(('cash', 'upi', 'card')),
+            ))
+            if len(batch) == 5000 or index == entries - 1:
+                IncomeExpense.objects.bulk_create(batch)
+                batch = []
+        call_command('rebuild_ledger_rollup', business=business.pk, stdout=io.StringIO())
+        Customer.objects.bulk_create([
+            Customer(
+                business=business, name=f'Customer {index}', name_key=f'customer {index}',
+                outstanding_balance=Decimal(rng.randint(-20000, 100000)) / 100,
+            )
+            for index in range(customers)
+        ], batch_size=5000)
+        StockItem.objects.bulk_create([
+            StockItem(
+                business=business, name=f'Item {index}', unit='pcs', opening_stock=0, price_per_unit=10,
+                closing_stock=rng.randint(0, 500), reorder_level=20, stock_value=Decimal(rng.randint(0, 1000000)) / 100,
+            )
+            for index in range(items)
+        ], batch_size=5000)
+        self.stdout.write(f"Seeded business {business.pk}: {entries} entries, {customers} customers, {items} items.")
+        return business.pk
+
+    def report(self, business_id, repeat):
+        def raw_ledger():
+            # What the summary would cost without the maintained rollups and balances.
+            IncomeExpense.objects.filter(business_id=business_id).aggregate(
+                income=Sum('amount', filter=Q(type='income')),
+                expense=Sum('amount', filter=Q(type='expense')),
+                entries=Count('id'),
+            )
+
+        variants = [
+            ('raw ledger aggregate', raw_ledger),
+            ('summary, uncached', lambda: compute_summary(business_id)),
+            ('summary, cached', lambda: business_summary(business_id)),
+        ]
+        business_summary(business_id)  # warm the cache for the cached variant
+        for label, run in variants:
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{label:<24} median {statistics.median(timings) * 1000:8.2f} ms  "
+                f"max {max(timings) * 1000:8.2f} ms  {len(queries)} queries"
+            )
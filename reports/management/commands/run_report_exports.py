@@ -0,0 +1,30 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reports.jobs import run_queued_exports
+
+
+class Command(BaseCommand):
+    help = "Generate queued report exports with a pool of worker threads, polling the queue until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.REPORT_EXPORT_WORKERS or 2)
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        generated = 0
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='report-exports') as pool:
+            while True:
+                futures = [pool.submit(run_queued_exports) for _ in range(options['workers'])]
+                ran = sum(future.result() for future in futures)
+                generated += ran
+                if options['once']:
+                    break
+                if not ran:
+                    time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {generated} report exports."))
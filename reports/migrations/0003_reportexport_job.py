@@ -0,0 +1,85 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:52
+
+from django.db import migrations, models
+
+
+def close_legacy_exports(apps, schema_editor):
+    # Rows from before the job engine only logged a client-supplied path; never
+    # queue them, and drop the path so nothing serves or deletes it as an export file.
+    ReportExport = apps.get_model('reports', 'ReportExport')
+    ReportExport.objects.update(status='completed', progress=100, file_path='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexport',
+            name='date_from',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='date_to',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='export_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel'), ('pdf', 'PDF')], default='csv', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='row_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='reportexport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='reportexport',
+            name='file_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='reportexport',
+            name='report_type',
+            field=models.CharField(choices=[('income_expense', 'Income & Expense'), ('stock', 'Stock'), ('udhari', 'Udhari'), ('summary', 'Summary')], max_length=50),
+        ),
+        migrations.RunPython(close_legacy_exports, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reportexport',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['status', 'id'], name='reportexport_queue_idx'),
+        ),
+    ]
@@ -1,12 +1,65 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
-# Reports are generated, not stored, but you can log exports
+# Exports are generated in the background (see reports.jobs); each row is one job.
 from users.models import User, Business
 
+class ReportExportQuerySet(models.QuerySet):
+    def claim(self, pk):
+        """Move a queued export to running; False if another worker got it first."""
+        now = timezone.now()
+        return self.filter(pk=pk, status='queued').update(status='running', started_at=now, updated_at=now) == 1
+
+    def report_progress(self, pk, progress):
+        # Also the heartbeat that keeps a running export from being requeued as stale.
+        self.filter(pk=pk, status='running').update(progress=progress, updated_at=timezone.now())
+
 class ReportExport(models.Model):
+    REPORT_TYPES = [
+        ('income_expense', 'Income & Expense'),
+        ('stock', 'Stock'),
+        ('udhari', 'Udhari'),
+        ('summary', 'Summary'),
+    ]
+    EXPORT_FORMATS = [
+        ('csv', 'CSV'),
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     business = models.ForeignKey(Business, on_delete=models.CASCADE)
-    report_type = models.CharField(max_length=50)
-    file_path = models.CharField(max_length=255)
+    report_type = models.CharField(max_length=50, choices=REPORT_TYPES)
+    export_format = models.CharField(max_length=10, choices=EXPORT_FORMATS, default='csv')
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    row_count = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    # Storage name under MEDIA_ROOT, set once the file is written.
+    file_path = models.CharField(max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReportExportQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The job queue: only unfinished exports are indexed.
+            models.Index(
+                fields=['status', 'id'],
+                name='reportexport_queue_idx',
+                condition=Q(status__in=['queued', 'running']),
+            ),
+        ]
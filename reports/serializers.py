@@ -1,7 +1,28 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import ReportExport
 
 class ReportExportSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
     class Meta:
         model = ReportExport
         fields = '__all__'
+        read_only_fields = [
+            'status', 'progress', 'row_count', 'error', 'file_path',
+            'created_at', 'updated_at', 'started_at', 'finished_at',
+        ]
+
+    def get_file_url(self, export):
+        if export.status != 'completed' or not export.file_path:
+            return None
+        url = default_storage.url(export.file_path)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from', getattr(self.instance, 'date_from', None))
+        date_to = attrs.get('date_to', getattr(self.instance, 'date_to', None))
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError({'date_to': ['Must not be before date_from.']})
+        return attrs
@@ -0,0 +1,24 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .jobs import EXPORT_DIR
+from .models import ReportExport
+
+
+def is_export_file(name):
+    """Whether `name` is a storage name under the directory the job engine writes exports to."""
+    normalized = posixpath.normpath(name)
+    return normalized == name and normalized.startswith(f'{EXPORT_DIR}/')
+
+
+@receiver(post_delete, sender=ReportExport)
+def delete_export_file(sender, instance, **kwargs):
+    # Anything else is a path a client logged before the job engine; it is not ours to delete.
+    if instance.file_path and is_export_file(instance.file_path):
+        name = instance.file_path
+        # Only once the delete is committed, so a rolled-back delete keeps its file.
+        transaction.on_commit(lambda: default_storage.delete(name))
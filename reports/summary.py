@@ -0,0 +1,92 @@
+"""
+Business summary for the dashboard.
+
+Every figure is read from columns that are already maintained on write:
+income and expense from the daily LedgerRollup, udhari from
+Customer.outstanding_balance, and stock from StockItem.closing_stock and
+stock_value. The summary is therefore three aggregate queries, one per
+table and each narrowed by a business index, however long the ledgers
+grow. The result is cached under the cache versions of all three sources,
+so a write to any of them shows on the next request.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+
+from dailyhisab.caching import cached_for_business, get_version
+from income_expense.analytics import LEDGER_CACHE_NAMESPACE
+from income_expense.models import LedgerRollup
+from stock.cache import STOCK_CACHE_NAMESPACE
+from stock.models import StockItem
+from udhari.aging import UDHARI_CACHE_NAMESPACE
+from udhari.models import Customer
+
+SUMMARY_CACHE_NAMESPACE = 'report_summary'
+SUMMARY_SOURCES = (LEDGER_CACHE_NAMESPACE, UDHARI_CACHE_NAMESPACE, STOCK_CACHE_NAMESPACE)
+CENTS = Decimal('0.01')
+
+
+def _money(value):
+    # SQLite drops the scale of summed decimals.
+    return str(Decimal(value or 0).quantize(CENTS))
+
+
+def compute_summary(business_id, date_from=None, date_to=None):
+    """The uncached summary. The date range narrows income and expense; balances and stock are as of now."""
+    rollups = LedgerRollup.objects.filter(business_id=business_id)
+    if date_from:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(date__lte=date_to)
+    ledger = rollups.aggregate(
+        income=Sum('total', filter=Q(type='income')),
+        expense=Sum('total', filter=Q(type='expense')),
+        entries=Sum('count'),
+    )
+    udhari = Customer.objects.filter(business_id=business_id).aggregate(
+        receivable=Sum('outstanding_balance', filter=Q(outstanding_balance__gt=0)),
+        payable=Sum('outstanding_balance', filter=Q(outstanding_balance__lt=0)),
+        customers=Count('id'),
+        customers_with_balance=Count('id', filter=~Q(outstanding_balance=0)),
+    )
+    stock = StockItem.objects.filter(business_id=business_id).aggregate(
+        value=Sum('stock_value'),
+        items=Count('id'),
+        low_stock=Count('id', filter=Q(closing_stock__lte=F('reorder_level'))),
+        out_of_stock=Count('id', filter=Q(closing_stock__lte=0)),
+    )
+
+    income, expense = ledger['income'] or Decimal('0'), ledger['expense'] or Decimal('0')
+    receivable, payable = udhari['receivable'] or Decimal('0'), -(udhari['payable'] or Decimal('0'))
+    return {
+        'business': business_id,
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'income_expense': {
+            'income': _money(income),
+            'expense': _money(expense),
+            'net': _money(income - expense),
+            'entries': ledger['entries'] or 0,
+        },
+        'udhari': {
+            'receivable': _money(receivable),
+            'payable': _money(payable),
+            'net': _money(receivable - payable),
+            'customers': udhari['customers'],
+            'customers_with_balance': udhari['customers_with_balance'],
+        },
+        'stock': {
+            'value': _money(stock['value']),
+            'items': stock['items'],
+            'low_stock': stock['low_stock'],
+            'out_of_stock': stock['out_of_stock'],
+        },
+    }
+
+
+def business_summary(business_id, date_from=None, date_to=None):
+    versions = [get_version(namespace, business_id) for namespace in SUMMARY_SOURCES]
+    return cached_for_business(
+        SUMMARY_CACHE_NAMESPACE, business_id, versions + [date_from, date_to],
+        lambda: compute_summary(business_id, date_from, date_to),
+    )
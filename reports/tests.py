@@ -1,3 +1,259 @@
-from django.test import TestCase
+import datetime
+import gzip
+import json
+import os
+import re
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from dailyhisab.testing import APITestCaseMixin, ListQueryCountMixin, MediaRootMixin
+from income_expense.models import IncomeExpense
+from stock.models import StockItem, StockTransaction
+from udhari.models import Customer, Udhari
+from . import jobs
+from .exports import write_pdf
+from .models import ReportExport
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_export_list(self):
+        def create_rows(count):
+            ReportExport.objects.bulk_create(
+                ReportExport(user=self.user, business=self.business, report_type='summary', status='completed',
+                             file_path='exports/1/summary.csv')
+                for _ in range(count)
+            )
+
+        response = self.assertConstantQueries('/api/reports/export/', create_rows, 1)
+        self.assertTrue(response.data['results'][0]['file_url'].endswith('/media/exports/1/summary.csv'))
+
+
+class ExportDeleteTests(MediaRootMixin, APITestCaseMixin, TestCase):
+    def delete(self, file_path):
+        export = ReportExport.objects.create(
+            user=self.user, business=self.business, report_type='summary', status='completed', file_path=file_path,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/reports/export/{export.pk}/delete/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_job_file_is_removed(self):
+        path = self.media_file('exports/1/summary-1-abc.csv')
+        self.delete('exports/1/summary-1-abc.csv')
+        self.assertFalse(os.path.exists(path))
+
+    def test_paths_outside_the_export_directory_are_left_alone(self):
+        path = self.media_file('avatars/owner.png')
+        for file_path in ('avatars/owner.png', 'exports/../avatars/owner.png', '/etc/hostname'):
+            self.delete(file_path)
+        self.assertTrue(os.path.exists(path))
+
+
+class StreamExportTests(APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day in (1, 2, 3):
+            IncomeExpense.objects.create(
+                user=self.user, business=self.business, amount=Decimal('10.50'), type='income',
+                date=datetime.date(2025, 1, day), notes=f'Sale {day}',
+            )
+
+    def stream(self, **params):
+        response = self.client.get('/api/reports/export/stream/income_expense/', {'business': self.business.pk, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_within_dates(self):
+        lines = self.stream(date_from='2025-01-02').decode('utf-8').splitlines()
+        self.assertTrue(lines[0].startswith('id,date'))
+        self.assertEqual(len(lines), 3)
+
+    def test_gzipped_ndjson(self):
+        rows = [json.loads(line) for line in gzip.decompress(self.stream(output='ndjson', gzip='1')).splitlines()]
+        self.assertEqual([row['notes'] for row in rows], ['Sale 1', 'Sale 2', 'Sale 3'])
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ('2025-02-30', 'soon'):
+            response = self.client.get(
+                '/api/reports/export/stream/income_expense/', {'business': self.business.pk, 'date_to': value},
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('date_to', response.data)
+
+
+class PdfExportTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.pdf')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_pages_are_written_while_rows_are_read(self):
+        header = ['id', 'date', 'amount', 'notes']
+        sizes = []
+
+        def rows():
+            for number in range(1, 201):
+                if number % 50 == 0:
+                    sizes.append(os.path.getsize(self.path))
+                yield number, datetime.date(2025, 1, 1), Decimal('10.50'), 'x' * 40
+
+        write_pdf(self.path, header, rows())
+        # Earlier pages reached the file before the last rows were read.
+        self.assertGreater(sizes[-1], 0)
+
+        with open(self.path, 'rb') as handle:
+            data = handle.read()
+        # 202 lines at 42 a page, and every xref offset points at its object.
+        self.assertIn(b'/Count 5 >>', data)
+        xref = int(re.search(rb'startxref\n(\d+)', data).group(1))
+        offsets = re.findall(rb'(\d{10}) 00000 n', data[xref:])
+        for number, offset in enumerate(offsets, 1):
+            self.assertTrue(data[int(offset):].startswith(b'%d 0 obj' % number), number)
+        # Columns come from the fixed schema; long notes are cut at 21 characters.
+        self.assertIn(b'(1         2025-01-01  10.50         ' + b'x' * 21 + b")", data)
+
+    def test_empty_table_still_has_its_header(self):
+        write_pdf(self.path, ['id'], iter(()))
+        with open(self.path, 'rb') as handle:
+            data = handle.read()
+        self.assertIn(b'/Count 1 >>', data)
+        self.assertIn(b'(id)', data)
+
+
+class SummaryTests(APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            for amount, type, day in (('100.00', 'income', 1), ('30.00', 'expense', 2), ('20.00', 'income', 10)):
+                self.entry(amount, type, datetime.date(2025, 1, day))
+            ravi = Customer.objects.create(business=self.business, name='Ravi')
+            meena = Customer.objects.create(business=self.business, name='Meena')
+            Customer.objects.create(business=self.business, name='Kiran')
+            Udhari.objects.create(customer=ravi, amount=Decimal('75.00'), given=True, date=datetime.date(2025, 1, 3))
+            Udhari.objects.create(customer=meena, amount=Decimal('15.00'), given=False, date=datetime.date(2025, 1, 4))
+            self.rice = StockItem.objects.create(
+                business=self.business, name='Rice', unit='kg', opening_stock=10, price_per_unit=5, reorder_level=4,
+            )
+            StockItem.objects.create(business=self.business, name='Dal', unit='kg', opening_stock=0, price_per_unit=80)
+
+    def entry(self, amount, type, date):
+        return IncomeExpense.objects.create(
+            user=self.user, business=self.business, amount=Decimal(amount), type=type, date=date,
+        )
+
+    def summary(self, **params):
+        response = self.client.get('/api/reports/summary/', {'business': self.business.pk, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_figures(self):
+        data = self.summary()
+        self.assertEqual(data['income_expense'], {'income': '120.00', 'expense': '30.00', 'net': '90.00', 'entries': 3})
+        self.assertEqual(data['udhari'], {
+            'receivable': '75.00', 'payable': '15.00', 'net': '60.00', 'customers': 3, 'customers_with_balance': 2,
+        })
+        self.assertEqual(data['stock'], {'value': '50.00', 'items': 2, 'low_stock': 0, 'out_of_stock': 1})
+
+        data = self.summary(date_from='2025-01-02', date_to='2025-01-09')
+        self.assertEqual(data['income_expense'], {'income': '0.00', 'expense': '30.00', 'net': '-30.00', 'entries': 1})
+        self.assertEqual(data['udhari']['net'], '60.00')
+
+    def test_writes_show_on_next_request(self):
+        self.summary()
+        with self.assertNumQueries(0):
+            self.summary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry('5.00', 'expense', datetime.date(2025, 1, 5))
+        self.assertEqual(self.summary()['income_expense']['expense'], '35.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Udhari.objects.create(
+                customer=Customer.objects.get(name='Kiran'), amount=Decimal('12.00'), given=True,
+                date=datetime.date(2025, 1, 6),
+            )
+        self.assertEqual(self.summary()['udhari']['receivable'], '87.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockTransaction.objects.create(
+                stock_item=self.rice, transaction_type='out', quantity=7, date=datetime.date(2025, 1, 7),
+            )
+        self.assertEqual(self.summary()['stock'], {'value': '15.00', 'items': 2, 'low_stock': 1, 'out_of_stock': 1})
+
+
+class ExportJobTests(MediaRootMixin, APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day in (1, 2, 3):
+            IncomeExpense.objects.create(
+                user=self.user, business=self.business, amount=Decimal('10.50'), type='income',
+                date=datetime.date(2025, 1, day),
+            )
+
+    def queue(self, **fields):
+        fields = {'report_type': 'income_expense', 'export_format': 'csv', **fields}
+        return ReportExport.objects.create(user=self.user, business=self.business, **fields)
+
+    def test_claims_oldest_queued_export_once(self):
+        first, second = self.queue(), self.queue()
+        self.queue(status='completed')
+        claimed = jobs.claim_next()
+        self.assertEqual((claimed.pk, claimed.status), (first.pk, 'running'))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertFalse(ReportExport.objects.claim(first.pk))
+        self.assertEqual(jobs.claim_next().pk, second.pk)
+        self.assertIsNone(jobs.claim_next())
+
+    def test_completed_export_has_its_file(self):
+        self.queue()
+        export = jobs.claim_next()
+        self.assertTrue(jobs.generate_export(export))
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.progress, export.row_count), ('completed', 100, 3))
+        self.assertTrue(export.file_path.startswith('exports/'))
+        with open(os.path.join(self.media_root, export.file_path)) as handle:
+            self.assertEqual(len(handle.read().splitlines()), 4)
+
+    def test_failure_is_recorded_and_partial_file_removed(self):
+        def failing_writer(path, header, rows):
+            with open(path, 'w') as handle:
+                handle.write('id\n')
+            raise OSError('disk full')
+
+        self.queue()
+        export = jobs.claim_next()
+        with mock.patch.dict(jobs.EXPORT_WRITERS, {'csv': (failing_writer, 'csv')}):
+            self.assertFalse(jobs.generate_export(export))
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.error, export.file_path), ('failed', 'OSError: disk full', ''))
+        self.assertIsNotNone(export.finished_at)
+        self.assertEqual([files for _root, _dirs, files in os.walk(self.media_root) if files], [])
+
+    def test_stale_running_exports_are_requeued(self):
+        stale, alive = self.queue(), self.queue()
+        for export in (stale, alive):
+            ReportExport.objects.claim(export.pk)
+        ReportExport.objects.filter(pk=stale.pk).update(
+            progress=40, updated_at=timezone.now() - jobs.STALE_AFTER - datetime.timedelta(seconds=1),
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.progress, stale.started_at), ('queued', 0, None))
+        self.assertEqual(alive.status, 'running')
+        self.assertEqual(jobs.claim_next().pk, stale.pk)
+
+    def test_requeued_export_discards_the_old_run(self):
+        self.queue()
+        export = jobs.claim_next()
+        # The export is requeued and claimed again while this run is still writing.
+        ReportExport.objects.filter(pk=export.pk).update(status='queued')
+        jobs.claim_next()
+        self.assertFalse(jobs.generate_export(export))
+        self.assertEqual([files for _root, _dirs, files in os.walk(self.media_root) if files], [])
@@ -7,6 +7,7 @@ urlpatterns = [
     path('export/create/', views.reportexport_create, name='reportexport-create'),
     path('export/<int:pk>/', views.reportexport_detail, name='reportexport-detail'),
     path('export/<int:pk>/delete/', views.reportexport_delete, name='reportexport-delete'),
+    path('export/stream/<str:kind>/', views.report_stream_export, name='report-stream-export'),
 
     # Report summary/statistics endpoint
     path('summary/', views.report_summary, name='report-summary'),
@@ -1,4 +1,6 @@
 
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
@@ -6,6 +8,10 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import ReportExport
 from .serializers import ReportExportSerializer
+from .exports import EXPORTS, csv_chunks, export_rows, gzip_chunks, ndjson_chunks
+from .jobs import enqueue
+from .summary import business_summary
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # ReportExport log APIs
 @swagger_auto_schema(
@@ -13,6 +19,7 @@ from .serializers import ReportExportSerializer
     operation_description="Retrieve a list of all report export logs",
     operation_summary="Get all report export logs",
     tags=['Reports & Analytics'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Report export logs retrieved successfully",
@@ -22,13 +29,21 @@ from .serializers import ReportExportSerializer
                     {
                         "id": 1,
                         "user": 1,
+                        "business": 1,
                         "report_type": "income_expense",
                         "export_format": "pdf",
                         "date_from": "2025-01-01",
                         "date_to": "2025-01-31",
-                        "file_path": "/exports/income_expense_2025_01.pdf",
                         "status": "completed",
-                        "created_at": "2025-01-15T10:00:00Z"
+                        "progress": 100,
+                        "row_count": 412,
+                        "error": "",
+                        "file_path": "exports/1/income_expense-1-5f0c2b9e8d7a4c1b9e3f6a2d4c8b7e10.pdf",
+                        "file_url": "http://localhost/media/exports/1/income_expense-1-5f0c2b9e8d7a4c1b9e3f6a2d4c8b7e10.pdf",
+                        "created_at": "2025-01-15T10:00:00Z",
+                        "updated_at": "2025-01-15T10:00:04Z",
+                        "started_at": "2025-01-15T10:00:01Z",
+                        "finished_at": "2025-01-15T10:00:04Z"
                     }
                 ]
             }
@@ -38,19 +53,20 @@ from .serializers import ReportExportSerializer
 @api_view(['GET'])
 def reportexport_list(request):
     exports = ReportExport.objects.all()
-    serializer = ReportExportSerializer(exports, many=True)
-    return Response(serializer.data)
+    return paginate(request, exports, ReportExportSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
-    operation_description="Create a new report export request",
+    operation_description="Queue a report export. The file is generated in the background; poll the export's detail "
+                          "endpoint until `status` is `completed` (then download `file_url`) or `failed` (see `error`).",
     operation_summary="Request report export",
     tags=['Reports & Analytics'],
     request_body=openapi.Schema(
         type=openapi.TYPE_OBJECT,
-        required=['user', 'report_type', 'export_format'],
+        required=['user', 'business', 'report_type', 'export_format'],
         properties={
             'user': openapi.Schema(type=openapi.TYPE_INTEGER, description='User ID'),
+            'business': openapi.Schema(type=openapi.TYPE_INTEGER, description='Business ID'),
             'report_type': openapi.Schema(type=openapi.TYPE_STRING, description='Type of report', enum=['income_expense', 'stock', 'udhari', 'summary']),
             'export_format': openapi.Schema(type=openapi.TYPE_STRING, description='Export format', enum=['pdf', 'excel', 'csv']),
             'date_from': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, description='Start date for report'),
@@ -58,6 +74,7 @@ def reportexport_list(request):
         },
         example={
             "user": 1,
+            "business": 1,
             "report_type": "income_expense",
             "export_format": "pdf",
             "date_from": "2025-01-01",
@@ -65,26 +82,43 @@ def reportexport_list(request):
         }
     ),
     responses={
-        201: openapi.Response(description="Report export request created successfully", schema=ReportExportSerializer()),
+        201: openapi.Response(description="Report export queued", schema=ReportExportSerializer()),
         400: openapi.Response(description="Invalid data provided")
     }
 )
 @api_view(['POST'])
 def reportexport_create(request):
-    serializer = ReportExportSerializer(data=request.data)
+    serializer = ReportExportSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         serializer.save()
+        enqueue()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+EXPORT_POLL_SECONDS = 2
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Status of a report export. While it is `queued` or `running` the response carries a "
+                          "Retry-After header; once `completed`, `file_url` points at the file.",
+    operation_summary="Get report export status",
+    tags=['Reports & Analytics'],
+    responses={
+        200: openapi.Response(description="Report export", schema=ReportExportSerializer()),
+        404: openapi.Response(description="Report export not found")
+    }
+)
 @api_view(['GET'])
 def reportexport_detail(request, pk):
     try:
         export = ReportExport.objects.get(pk=pk)
     except ReportExport.DoesNotExist:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-    serializer = ReportExportSerializer(export)
-    return Response(serializer.data)
+    serializer = ReportExportSerializer(export, context={'request': request})
+    response = Response(serializer.data)
+    if export.status in ('queued', 'running'):
+        response['Retry-After'] = str(EXPORT_POLL_SECONDS)
+    return response
 
 @api_view(['DELETE'])
 def reportexport_delete(request, pk):
@@ -95,8 +129,106 @@ def reportexport_delete(request, pk):
     export.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
-# Placeholder for summary/statistics API (to be expanded as needed)
+EXPORT_OUTPUTS = {
+    'csv': (csv_chunks, 'text/csv'),
+    'ndjson': (ndjson_chunks, 'application/x-ndjson'),
+}
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Stream a business's income/expense, udhari or stock transaction ledger as CSV or NDJSON. "
+                          "Rows are sent as they are read, so large ledgers start downloading immediately.",
+    operation_summary="Stream ledger export",
+    tags=['Reports & Analytics'],
+    manual_parameters=[
+        openapi.Parameter('kind', openapi.IN_PATH, description="Ledger to export", type=openapi.TYPE_STRING, enum=list(EXPORTS), required=True),
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('output', openapi.IN_QUERY, description="Output format", type=openapi.TYPE_STRING, enum=list(EXPORT_OUTPUTS), default='csv', required=False),
+        openapi.Parameter('gzip', openapi.IN_QUERY, description="Gzip the file (1 to enable)", type=openapi.TYPE_BOOLEAN, required=False),
+        openapi.Parameter('date_from', openapi.IN_QUERY, description="First date to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('date_to', openapi.IN_QUERY, description="Last date to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ],
+    responses={
+        200: openapi.Response(description="Export file stream"),
+        400: openapi.Response(description="Invalid parameters"),
+        404: openapi.Response(description="Unknown export kind")
+    }
+)
+@api_view(['GET'])
+def report_stream_export(request, kind):
+    if kind not in EXPORTS:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_OUTPUTS:
+        return Response({'output': [f'Choose one of: {", ".join(EXPORT_OUTPUTS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+    dates = {}
+    for param in ('date_from', 'date_to'):
+        if request.query_params.get(param):
+            try:
+                dates[param] = parse_date(request.query_params[param])
+            except ValueError:
+                dates[param] = None
+            if dates[param] is None:
+                return Response({param: ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+
+    render, content_type = EXPORT_OUTPUTS[output]
+    header, rows = export_rows(kind, business_id, **dates)
+    chunks = render(header, rows)
+    filename = f'{kind}_{business_id}.{output}'
+    if request.query_params.get('gzip') in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Dashboard summary of a business: income, expense and net (optionally within a date range), "
+                          "udhari owed to and by the business, and stock value and levels. Balances and stock are "
+                          "current. Results are cached until the business's ledger, udhari or stock changes.",
+    operation_summary="Get business summary",
+    tags=['Reports & Analytics'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('date_from', openapi.IN_QUERY, description="First date of income/expense to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('date_to', openapi.IN_QUERY, description="Last date of income/expense to include (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Summary computed",
+            examples={
+                "application/json": {
+                    "business": 1,
+                    "date_from": "2025-03-01",
+                    "date_to": "2025-03-31",
+                    "income_expense": {"income": "125000.00", "expense": "83000.00", "net": "42000.00", "entries": 412},
+                    "udhari": {"receivable": "17500.00", "payable": "2000.00", "net": "15500.00", "customers": 64, "customers_with_balance": 23},
+                    "stock": {"value": "240000.00", "items": 180, "low_stock": 7, "out_of_stock": 2}
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid date")
+    }
+)
 @api_view(['GET'])
 def report_summary(request):
-    # Example: return static summary, replace with real logic
-    return Response({"summary": "Report summary endpoint. Implement logic as needed."})
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    dates = {}
+    for param in ('date_from', 'date_to'):
+        if request.query_params.get(param):
+            try:
+                dates[param] = parse_date(request.query_params[param])
+            except ValueError:
+                dates[param] = None
+            if dates[param] is None:
+                return Response({param: ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(business_summary(business_id, **dates))
@@ -0,0 +1,98 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import SearchDocument
+
+FTS_TABLE = 'search_searchdocument_fts'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Words that carry no meaning in a ledger search; as prefixes they would match almost everything.
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'did', 'do', 'for', 'from', 'i', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'our', 'show', 'that', 'the', 'this', 'to', 'was', 'we', 'what', 'which', 'with',
+))
+
+
+def tokenize(query):
+    tokens = _TOKEN_RE.findall(query.lower())
+    # A query of nothing but stop words is still searched for as typed.
+    return ([token for token in tokens if token not in STOP_WORDS] or tokens)[:10]
+
+
+def search_documents(business_id, query, kinds=None, limit=20, offset=0):
+    """
+    Return [(kind, object_id, rank)] best match first.
+
+    Each query term is matched as a prefix, so typing "cem pay" already finds
+    "cement payment". A document matches if any term does. Documents that
+    match more of the terms rank first, then by the backend's relevance
+    score, so natural phrasing such as "that cement payment last month"
+    still finds the cement payment first.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(business_id, tokens, kinds, limit, offset)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(business_id, tokens, kinds, limit, offset)
+    return _search_fallback(business_id, tokens, kinds, limit, offset)
+
+
+def _kind_clause(column, kinds, params):
+    if not kinds:
+        return ''
+    params.extend(kinds)
+    return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})"
+
+
+def _search_sqlite(business_id, tokens, kinds, limit, offset):
+    terms = [f'"{token}"*' for token in tokens]
+    # Terms matched, plus bm25 (lower-is-better, so negated) squashed into [0, 1) to order within a tie.
+    coverage = ' + '.join([f"(d.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s))"] * len(terms))
+    params = terms + [' OR '.join(terms), business_id]
+    kind_sql = _kind_clause('d.kind', kinds, params)
+    params.extend([limit, offset])
+    sql = (
+        f"SELECT d.kind, d.object_id, ({coverage}) - bm25({FTS_TABLE}) / (1 - bm25({FTS_TABLE})) AS rank"
+        f" FROM {FTS_TABLE} JOIN search_searchdocument d ON d.id = {FTS_TABLE}.rowid"
+        f" WHERE {FTS_TABLE} MATCH %s AND d.business_id = %s{kind_sql}"
+        f" ORDER BY rank DESC, d.id DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_postgresql(business_id, tokens, kinds, limit, offset):
+    terms = [f'{token}:*' for token in tokens]
+    # Terms matched, plus ts_rank squashed into [0, 1) to order within a tie.
+    coverage = ' + '.join(["(d.vector @@ to_tsquery('simple', %s))::int"] * len(terms))
+    params = terms + [' | '.join(terms), business_id]
+    kind_sql = _kind_clause('d.kind', kinds, params)
+    params.extend([limit, offset])
+    sql = (
+        f"SELECT d.kind, d.object_id, ({coverage}) + ts_rank(d.vector, q) / (1 + ts_rank(d.vector, q)) AS rank"
+        " FROM search_searchdocument d, to_tsquery('simple', %s) q"
+        f" WHERE d.vector @@ q AND d.business_id = %s{kind_sql}"
+        " ORDER BY rank DESC, d.id DESC LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(business_id, tokens, kinds, limit, offset):
+    documents = SearchDocument.objects.filter(business_id=business_id)
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    matches = [Q(content__icontains=token) for token in tokens]
+    any_match = Q()
+    for match in matches:
+        any_match |= match
+    documents = documents.filter(any_match).annotate(
+        rank=sum(Case(When(match, then=Value(1)), default=Value(0), output_field=IntegerField()) for match in matches)
+    )
+    rows = documents.order_by('-rank', '-updated_at', '-id').values_list('kind', 'object_id', 'rank')[offset:offset + limit]
+    return [(kind, object_id, float(rank)) for kind, object_id, rank in rows]
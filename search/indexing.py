@@ -0,0 +1,24 @@
+from django.db import transaction
+
+from .models import SearchDocument
+from .registry import SEARCH_MODELS
+
+
+def index_instances(kind, instances):
+    """Create, refresh or drop the search documents of `instances` in a few queries."""
+    _model, _serializer, business_of, content_of = SEARCH_MODELS[kind]
+    documents = []
+    for instance in instances:
+        content = content_of(instance).strip()
+        if content:
+            documents.append(SearchDocument(
+                business_id=business_of(instance), kind=kind, object_id=instance.pk, content=content,
+            ))
+    with transaction.atomic():
+        # Delete-then-insert rather than an upsert so the FTS triggers see plain row events.
+        unindex_ids(kind, [instance.pk for instance in instances])
+        SearchDocument.objects.bulk_create(documents)
+
+
+def unindex_ids(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from search.indexing import index_instances
+from search.registry import SEARCH_MODELS
+
+
+class Command(BaseCommand):
+    help = "Rebuild full-text search documents for ledger notes, customers and stock items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(SEARCH_MODELS), help="Only rebuild this kind")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        kinds = [options['kind']] if options['kind'] else list(SEARCH_MODELS)
+        batch_size = options['batch_size']
+        for kind in kinds:
+            model = SEARCH_MODELS[kind][0]
+            queryset = model.objects.order_by('pk')
+            if kind == 'udhari':
+                queryset = queryset.select_related('customer')
+            indexed = 0
+            last_pk = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                index_instances(kind, batch)
+                indexed += len(batch)
+                last_pk = batch[-1].pk
+            self.stdout.write(f"Indexed {indexed} {kind} rows.")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
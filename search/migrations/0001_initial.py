@@ -0,0 +1,70 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE search_searchdocument_fts USING fts5("
+    "content, content='search_searchdocument', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN "
+    "INSERT INTO search_searchdocument_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN "
+    "INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN "
+    "INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO search_searchdocument_fts(rowid, content) VALUES (new.id, new.content); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS search_searchdocument_au",
+    "DROP TRIGGER IF EXISTS search_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS search_searchdocument_ai",
+    "DROP TABLE IF EXISTS search_searchdocument_fts",
+]
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE search_searchdocument ADD COLUMN vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED",
+    "CREATE INDEX search_searchdocument_vector_idx ON search_searchdocument USING GIN (vector)",
+]
+POSTGRESQL_REVERSE = [
+    "DROP INDEX IF EXISTS search_searchdocument_vector_idx",
+    "ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS vector",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('content', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.business')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_searchdocument_object'),
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRESQL_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+# kind -> (app label, model, business id path, text paths); the text search.registry indexes.
+EXISTING_ROWS = {
+    'income_expense': ('income_expense', 'IncomeExpense', 'business_id', ['notes']),
+    'udhari': ('udhari', 'Udhari', 'customer__business_id', ['notes']),
+    'customers': ('udhari', 'Customer', 'business_id', ['name']),
+    'stock_items': ('stock', 'StockItem', 'business_id', ['name', 'notes']),
+}
+
+
+def index_existing_rows(apps, schema_editor):
+    # Inserted the same way search.indexing does, so the FTS triggers and the
+    # tsvector column pick the rows up.
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    for kind, (app_label, model_name, business_path, text_paths) in EXISTING_ROWS.items():
+        rows = (
+            apps.get_model(app_label, model_name).objects.order_by('pk')
+            .values_list('pk', business_path, *text_paths)
+        )
+        batch = []
+        for pk, business_id, *texts in rows.iterator(chunk_size=BATCH_SIZE):
+            content = ' '.join(text for text in texts if text).strip()
+            if content:
+                batch.append(SearchDocument(business_id=business_id, kind=kind, object_id=pk, content=content))
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def drop_documents(apps, schema_editor):
+    apps.get_model('search', 'SearchDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('income_expense', '0002_initial'),
+        ('udhari', '0002_initial'),
+        ('stock', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_rows, drop_documents),
+    ]
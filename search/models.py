@@ -0,0 +1,26 @@
+from django.db import models
+
+
+from users.models import Business
+
+class SearchDocument(models.Model):
+    """
+    Denormalized text of one searchable row.
+
+    The full-text index itself lives outside the ORM: an FTS5 table kept in
+    step by triggers on SQLite, a generated tsvector column with a GIN index
+    on PostgreSQL (see the initial migration and search.backends).
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_searchdocument_object'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
@@ -0,0 +1,37 @@
+from income_expense.models import IncomeExpense
+from income_expense.serializers import IncomeExpenseSerializer
+from stock.models import StockItem
+from stock.serializers import StockItemSerializer
+from udhari.models import Customer, Udhari
+from udhari.serializers import CustomerSerializer, UdhariSerializer
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+# kind -> (model, serializer, business id of a row, searchable text of a row)
+SEARCH_MODELS = {
+    'income_expense': (
+        IncomeExpense, IncomeExpenseSerializer,
+        lambda entry: entry.business_id,
+        lambda entry: _join(entry.notes),
+    ),
+    'udhari': (
+        Udhari, UdhariSerializer,
+        lambda udhari: udhari.customer.business_id,
+        lambda udhari: _join(udhari.notes),
+    ),
+    'customers': (
+        Customer, CustomerSerializer,
+        lambda customer: customer.business_id,
+        lambda customer: _join(customer.name),
+    ),
+    'stock_items': (
+        StockItem, StockItemSerializer,
+        lambda item: item.business_id,
+        lambda item: _join(item.name, item.notes),
+    ),
+}
+
+KIND_BY_MODEL = {model: kind for kind, (model, *_rest) in SEARCH_MODELS.items()}
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+
+from .indexing import index_instances, unindex_ids
+from .registry import SEARCH_MODELS
+
+
+def _index_receiver(kind):
+    def update_search_document(sender, instance, **kwargs):
+        index_instances(kind, [instance])
+    return update_search_document
+
+
+def _unindex_receiver(kind):
+    def remove_search_document(sender, instance, **kwargs):
+        unindex_ids(kind, [instance.pk])
+    return remove_search_document
+
+
+for _kind, (_model, *_rest) in SEARCH_MODELS.items():
+    post_save.connect(_index_receiver(_kind), sender=_model, weak=False, dispatch_uid=f'search_index_{_kind}')
+    post_delete.connect(_unindex_receiver(_kind), sender=_model, weak=False, dispatch_uid=f'search_unindex_{_kind}')
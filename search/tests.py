@@ -0,0 +1,45 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from dailyhisab.testing import APITestCaseMixin
+from income_expense.models import IncomeExpense
+from .backends import _search_fallback, tokenize
+
+
+class SearchTests(APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = {
+            notes: IncomeExpense.objects.create(
+                user=self.user, business=self.business, amount=Decimal('100.00'), type='expense',
+                date=datetime.date(2025, 1, 1), notes=notes,
+            ).pk
+            for notes in ('Cement payment to Sharma Traders', 'Cement bags', 'Tea for staff', 'Monthly rent')
+        }
+
+    def search(self, query):
+        response = self.client.get('/api/search/', {'business': self.business.pk, 'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.data['results']]
+
+    def test_natural_phrase_finds_best_match_first(self):
+        found = self.search('that cement payment last month')
+        self.assertEqual(found[0], self.ids['Cement payment to Sharma Traders'])
+        self.assertIn(self.ids['Cement bags'], found)
+        self.assertNotIn(self.ids['Tea for staff'], found)
+
+    def test_prefixes_match(self):
+        self.assertEqual(self.search('cem pay')[0], self.ids['Cement payment to Sharma Traders'])
+        self.assertEqual(self.search('xyz'), [])
+
+    def test_stop_words_are_dropped(self):
+        self.assertEqual(tokenize('Show me the cement payment'), ['cement', 'payment'])
+        self.assertEqual(tokenize('the'), ['the'])
+
+    def test_fallback_ranks_by_matched_terms(self):
+        hits = _search_fallback(self.business.pk, ['cement', 'payment', 'last'], None, 10, 0)
+        self.assertEqual([object_id for _kind, object_id, _rank in hits],
+                         [self.ids['Cement payment to Sharma Traders'], self.ids['Cement bags']])
+        self.assertEqual(hits[0][2], 2.0)
@@ -0,0 +1,90 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from dailyhisab.prefetch import optimize_queryset
+from .backends import search_documents
+from .registry import SEARCH_MODELS
+
+SEARCH_DEFAULT_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Full-text search over income/expense notes, udhari notes, customer names and stock items "
+                          "of one business. Words match as prefixes and any of them may match; results matching more "
+                          "of the words come first.",
+    operation_summary="Search ledger",
+    tags=['Search'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('q', openapi.IN_QUERY, description="Search text, e.g. 'cement payment'", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('kind', openapi.IN_QUERY, description="Restrict to these kinds (comma separated)", type=openapi.TYPE_STRING, required=False,
+                          enum=list(SEARCH_MODELS)),
+        openapi.Parameter('page', openapi.IN_QUERY, description="Page number (1-based)", type=openapi.TYPE_INTEGER, required=False),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description=f"Results per page (max {SEARCH_MAX_PAGE_SIZE})", type=openapi.TYPE_INTEGER, required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Ranked search results",
+            examples={
+                "application/json": {
+                    "query": "cement",
+                    "page": 1,
+                    "has_next": False,
+                    "results": [
+                        {
+                            "kind": "income_expense",
+                            "id": 42,
+                            "rank": 3.1,
+                            "object": {"id": 42, "amount": "12000.00", "type": "expense", "notes": "Cement payment to Sharma Traders"}
+                        }
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or query, or unknown kind")
+    }
+)
+@api_view(['GET'])
+def search(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'q': ['This parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    kinds = [kind for kind in request.query_params.get('kind', '').split(',') if kind]
+    unknown = [kind for kind in kinds if kind not in SEARCH_MODELS]
+    if unknown:
+        return Response({'kind': [f'Unknown kind: {", ".join(unknown)}']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', SEARCH_DEFAULT_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'detail': 'page and page_size must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    hits = search_documents(business_id, query, kinds, limit=page_size + 1, offset=(page - 1) * page_size)
+    has_next = len(hits) > page_size
+    hits = hits[:page_size]
+
+    # One query per kind present on the page to load the matched rows.
+    ids_by_kind = {}
+    for kind, object_id, _rank in hits:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+    objects = {}
+    for kind, ids in ids_by_kind.items():
+        model, serializer_class, _business_of, _content_of = SEARCH_MODELS[kind]
+        rows = optimize_queryset(model.objects.filter(pk__in=ids), serializer_class)
+        for row in rows:
+            objects[(kind, row.pk)] = serializer_class(row).data
+
+    results = [
+        {'kind': kind, 'id': object_id, 'rank': rank, 'object': objects[(kind, object_id)]}
+        for kind, object_id, rank in hits
+        if (kind, object_id) in objects
+    ]
+    return Response({'query': query, 'page': page, 'has_next': has_next, 'results': results})
@@ -1,3 +1,14 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from users.models import User
+from .models import ProfileSettings
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_profile_settings_list(self):
+        def create_rows(count):
+            for _ in range(count):
+                ProfileSettings.objects.create(user=User.objects.create_user(f'user-{User.objects.count()}'))
+
+        self.assertConstantQueries('/api/settings/profile/', create_rows, 1)
@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import ProfileSettings
 from .serializers import ProfileSettingsSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # ProfileSettings APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import ProfileSettingsSerializer
     operation_description="Retrieve a list of all profile settings",
     operation_summary="Get all profile settings",
     tags=['Settings & Preferences'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Profile settings retrieved successfully",
@@ -42,8 +44,7 @@ from .serializers import ProfileSettingsSerializer
 @api_view(['GET'])
 def profilesettings_list(request):
     settings = ProfileSettings.objects.all()
-    serializer = ProfileSettingsSerializer(settings, many=True)
-    return Response(serializer.data)
+    return paginate(request, settings, ProfileSettingsSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
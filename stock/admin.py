@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import StockItem, StockTransaction
+from .models import StockCostLayer, StockItem, StockSnapshot, StockTransaction, StockVelocity
 # Register your models here.
 admin.site.register(StockItem)
-admin.site.register(StockTransaction)
\ No newline at end of file
+admin.site.register(StockTransaction)
+admin.site.register(StockCostLayer)
+admin.site.register(StockSnapshot)
+admin.site.register(StockVelocity)
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Low-stock notifications.
+
+`send_low_stock_alerts` is meant to run periodically (cron or a scheduler
+calling the `send_low_stock_alerts` management command). It walks every
+business's items at or below their reorder level in id-ordered batches,
+writes one Notification per item to the business owner with bulk_create,
+and marks the items so the next run does not repeat the alert. The mark is
+cleared by StockItemQuerySet.adjust as soon as a movement takes the item
+back above its level, so a restock and a new drop between two runs still
+alert again.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from notifications.models import Notification
+
+from .models import StockItem
+
+
+def low_stock_items():
+    """Items at or below their reorder level; matches the stockitem_low_stock_idx predicate."""
+    return StockItem.objects.filter(closing_stock__lte=F('reorder_level'))
+
+
+def low_stock_message(item):
+    message = f"{item.name} is down to {item.closing_stock} {item.unit} (reorder level {item.reorder_level} {item.unit})."
+    if item.reorder_quantity:
+        message += f" Reorder {item.reorder_quantity} {item.unit}."
+    return message
+
+
+def send_low_stock_alerts(batch_size=500):
+    """Notify owners about newly low items across all businesses; returns the number sent."""
+    # Items whose reorder level was lowered or removed since their last alert become eligible again.
+    StockItem.objects.filter(low_stock_alerted_at__isnull=False).filter(
+        Q(reorder_level__isnull=True) | Q(closing_stock__gt=F('reorder_level'))
+    ).update(low_stock_alerted_at=None)
+
+    pending = (
+        low_stock_items().filter(low_stock_alerted_at__isnull=True)
+        .select_related('business')
+        .only('id', 'name', 'unit', 'closing_stock', 'reorder_level', 'reorder_quantity',
+              'business__id', 'business__owner_id')
+        .order_by('pk')
+    )
+    sent = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(pending.filter(pk__gt=last_pk).select_for_update(of=('self',))[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=item.business.owner_id,
+                    business_id=item.business_id,
+                    title=f"Low stock: {item.name}"[:100],
+                    message=low_stock_message(item),
+                )
+                for item in batch
+            ])
+            StockItem.objects.filter(pk__in=[item.pk for item in batch]).update(low_stock_alerted_at=timezone.now())
+            sent += len(batch)
+    return sent
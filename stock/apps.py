@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StockConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stock'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,39 @@
+"""
+Hot lookup of stock items by SKU/barcode for billing counters.
+
+Resolved codes (and misses) are kept in a per-process LRU keyed by
+(business, code). Each entry carries the business's version token from the
+shared Django cache, so a catalogue change in any worker is seen by all of
+them. Only fields that do not move with every sale are cached; stock
+movements update closing_stock with queryset updates and never invalidate.
+"""
+from dailyhisab.caching import LocalLRU, bump_version_on_commit, get_version
+
+from .models import StockItem
+
+STOCK_ITEM_CACHE_NAMESPACE = 'stock_items'
+# Bumped on every stock movement too, for caches of quantities and values.
+STOCK_CACHE_NAMESPACE = 'stock'
+LOOKUP_FIELDS = ('id', 'business_id', 'name', 'sku', 'unit', 'price_per_unit', 'category')
+LOCAL_CACHE_SIZE = 8192
+
+_local = LocalLRU(LOCAL_CACHE_SIZE)
+
+
+def lookup_by_code(business_id, code):
+    """Return the LOOKUP_FIELDS of the item with this SKU/barcode as a dict, or None."""
+    version = get_version(STOCK_ITEM_CACHE_NAMESPACE, business_id)
+    cached = _local.get((business_id, code))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    item = StockItem.objects.filter(business_id=business_id, sku=code).values(*LOOKUP_FIELDS).first()
+    _local.set((business_id, code), (version, item))
+    return item
+
+
+def invalidate_business_items(business_id):
+    bump_version_on_commit(STOCK_ITEM_CACHE_NAMESPACE, business_id)
+
+
+def invalidate_stock_values(business_id):
+    bump_version_on_commit(STOCK_CACHE_NAMESPACE, business_id)
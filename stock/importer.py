@@ -0,0 +1,213 @@
+"""
+Bulk import of stock items from CSV or XLSX.
+
+Rows are read lazily from the file and handled in chunks, so memory stays
+flat however large the catalogue is. Each chunk is validated row by row and
+upserted on (business, name) with a single bulk_create(update_conflicts=True).
+Existing items are only updated in the columns the file fills in. closing_stock
+and cost layers follow the same rules as StockItem.save: new items start at
+their opening stock, and changing the opening stock of an existing item shifts
+its closing stock and stored snapshots by the difference.
+"""
+import csv
+import datetime
+import io
+import os
+import zipfile
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from search.indexing import index_instances
+
+from .cache import invalidate_business_items, invalidate_stock_values
+from .models import StockItem, StockSnapshot
+from .valuation import open_valuations, rebuild_valuation
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_FORMATS = ('csv', 'xlsx')
+UPDATE_FIELDS = [
+    'sku', 'unit', 'opening_stock', 'price_per_unit', 'category', 'notes',
+    'reorder_level', 'reorder_quantity', 'valuation_method', 'updated_at',
+]
+
+
+class StockItemImportRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockItem
+        fields = [
+            'name', 'sku', 'unit', 'opening_stock', 'price_per_unit', 'category', 'notes',
+            'reorder_level', 'reorder_quantity', 'valuation_method',
+        ]
+        # Uniqueness is what the upsert resolves, not a validation error.
+        validators = []
+        extra_kwargs = {'opening_stock': {'required': False}}
+
+
+class UnreadableFile(ValueError):
+    """Reading the file failed part-way; `summary` covers the rows before `row`, which were imported."""
+
+    def __init__(self, message, row, summary):
+        super().__init__(message)
+        self.row = row
+        self.summary = summary
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return extension if extension in IMPORT_FORMATS else None
+
+
+def read_rows(file, file_format):
+    """Yield (row_number, {column: value}) from an open binary file; row 1 is the header."""
+    if file_format == 'csv':
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        for number, row in enumerate(reader, start=2):
+            yield number, {(key or '').strip().lower(): value for key, value in row.items()}
+    elif file_format == 'xlsx':
+        from openpyxl import load_workbook
+
+        # read_only mode streams the sheet instead of loading it into memory.
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, KeyError) as exc:
+            raise ValueError("not a valid XLSX workbook") from exc
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield number, {key: value for key, value in zip(header, values) if key}
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _clean(row):
+    # Spreadsheet blanks mean "not set"; numbers come through as-is.
+    return {key: value for key, value in row.items() if value not in (None, '')}
+
+
+def _sku_conflicts(business, rows):
+    """Row numbers whose SKU already belongs to another item, stored or earlier in the chunk."""
+    skus = [data['sku'] for _number, data in rows if data.get('sku')]
+    owners = dict(StockItem.objects.filter(business=business, sku__in=skus).values_list('sku', 'name'))
+    conflicts = set()
+    for number, data in rows:
+        if data.get('sku') is None:
+            continue
+        if owners.setdefault(data['sku'], data['name']) != data['name']:
+            conflicts.add(number)
+    return conflicts
+
+
+def _upsert_chunk(business, rows, summary):
+    """
+    Upsert one chunk of validated (row_number, data) pairs into `summary`.
+
+    Existing items only take the columns a row actually sets; anything the
+    file leaves out or blank keeps its stored value. Defaults apply to new
+    items only.
+    """
+    for _number, data in rows:
+        if 'sku' in data:
+            data['sku'] = (data['sku'] or '').strip() or None
+
+    now = timezone.now()
+    with transaction.atomic():
+        conflicts = _sku_conflicts(business, rows)
+        for number in sorted(conflicts):
+            summary['failed'] += 1
+            summary['errors'].append({'row': number, 'errors': {'sku': ['Another stock item already uses this SKU.']}})
+        rows = [(number, data) for number, data in rows if number not in conflicts]
+        if not rows:
+            return
+        names = [data['name'] for _number, data in rows]
+        existing = {
+            item.name: item
+            for item in StockItem.objects.select_for_update().filter(business=business, name__in=names).order_by('pk')
+        }
+
+        fresh, updated, shifts, revalue = [], [], {}, []
+        update_fields = {'updated_at'}
+        for _number, data in rows:
+            item = existing.get(data['name'])
+            if item is None:
+                data.setdefault('opening_stock', Decimal('0'))
+                fresh.append(StockItem(business=business, closing_stock=data['opening_stock'], updated_at=now, **data))
+                continue
+            if 'opening_stock' in data and data['opening_stock'] != item.opening_stock:
+                shifts[item.pk] = data['opening_stock'] - item.opening_stock
+            if item.pk in shifts or data.get('valuation_method', item.valuation_method) != item.valuation_method:
+                revalue.append(item)
+            for field, value in data.items():
+                setattr(item, field, value)
+            item.updated_at = now
+            update_fields.update(data)
+            updated.append(item)
+
+        if updated:
+            StockItem.objects.bulk_update(updated, [field for field in UPDATE_FIELDS if field in update_fields])
+        if fresh:
+            # A conflict here is an item created concurrently; it takes this row's columns.
+            fresh_fields = {'updated_at'}.union(*(item_data for _number, item_data in rows if item_data['name'] not in existing))
+            StockItem.objects.bulk_create(
+                fresh, update_conflicts=True, unique_fields=['business', 'name'],
+                update_fields=[field for field in UPDATE_FIELDS if field in fresh_fields],
+            )
+            fresh = list(StockItem.objects.filter(business=business, name__in=[item.name for item in fresh]))
+            open_valuations(fresh)
+        StockItem.objects.adjust(shifts)
+        StockSnapshot.objects.shift({(pk, datetime.date.min): delta for pk, delta in shifts.items()})
+        for item in revalue:
+            rebuild_valuation(item)
+        index_instances('stock_items', updated + fresh)
+        invalidate_business_items(business.pk)
+        invalidate_stock_values(business.pk)
+    summary['created'] += len(fresh)
+    summary['updated'] += len(updated)
+
+
+def import_stock_items(business, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and upsert (row_number, data) pairs from `read_rows`.
+
+    Returns {'created', 'updated', 'failed', 'errors': [{'row', 'errors'}]};
+    invalid rows are reported and skipped, the rest are imported. A name
+    repeated within one chunk keeps its last row. Chunks commit as they go,
+    so if the file turns out to be unreadable part-way, the rows before that
+    point are imported and UnreadableFile carries their summary.
+    """
+    summary = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    chunk = {}
+
+    def flush():
+        if chunk:
+            _upsert_chunk(business, list(chunk.values()), summary)
+            chunk.clear()
+
+    number = 1
+    rows = iter(rows)
+    while True:
+        try:
+            number, row = next(rows)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, ValueError) as exc:
+            flush()
+            raise UnreadableFile(str(exc), number + 1, summary) from exc
+        serializer = StockItemImportRowSerializer(data=_clean(row))
+        if not serializer.is_valid():
+            summary['failed'] += 1
+            summary['errors'].append({'row': number, 'errors': serializer.errors})
+            continue
+        data = dict(serializer.validated_data)
+        chunk.pop(data['name'], None)
+        chunk[data['name']] = (number, data)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    return summary
@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from stock.models import StockItem, StockSnapshot, StockTransaction, signed_quantity
+
+
+def next_month(date):
+    return (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+class Command(BaseCommand):
+    help = "(Re)compute monthly stock snapshots of every item from opening stock and transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only backfill items of this business ID")
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        items = StockItem.objects.order_by('pk')
+        if options['business']:
+            items = items.filter(business_id=options['business'])
+        current_month = timezone.localdate().replace(day=1)
+
+        written = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Locked so movements saved meanwhile shift the snapshots written here.
+                batch = list(
+                    items.filter(pk__gt=last_pk).select_for_update()
+                    .values_list('pk', 'opening_stock', 'created_at')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                monthly = {}
+                totals = (
+                    StockTransaction.objects.filter(stock_item_id__in=[pk for pk, _opening, _created in batch])
+                    .annotate(month=TruncMonth('date'))
+                    .order_by()
+                    .values('stock_item_id', 'month')
+                    .annotate(total=Sum(signed_quantity()))
+                    .values_list('stock_item_id', 'month', 'total')
+                )
+                for pk, month, total in totals:
+                    monthly.setdefault(pk, {})[month] = total
+
+                snapshots = []
+                for pk, opening, created_at in batch:
+                    movements = monthly.get(pk, {})
+                    month = min([timezone.localdate(created_at).replace(day=1), *movements])
+                    quantity = opening
+                    while month < current_month:
+                        quantity += movements.get(month, Decimal('0'))
+                        month = next_month(month)
+                        snapshots.append(StockSnapshot(stock_item_id=pk, date=month, quantity=quantity))
+                StockSnapshot.objects.bulk_create(
+                    snapshots, batch_size=1000,
+                    update_conflicts=True, unique_fields=['stock_item', 'date'], update_fields=['quantity'],
+                )
+                written += len(snapshots)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} stock snapshots."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from stock.velocity import refresh_velocity
+
+
+class Command(BaseCommand):
+    help = "Recompute stock velocity, days of cover and reorder suggestions for every item."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only recompute items of this business ID")
+
+    def handle(self, *args, **options):
+        business_ids = [options['business']] if options['business'] else None
+        written = refresh_velocity(business_ids)
+        self.stdout.write(self.style.SUCCESS(f"Updated velocity of {written} stock items."))
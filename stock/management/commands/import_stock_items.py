@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.importer import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, detect_format, import_stock_items, read_rows
+from users.models import Business
+
+
+class Command(BaseCommand):
+    help = "Create or update stock items of a business from a CSV or XLSX file, matched by name."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file with a header row")
+        parser.add_argument('--business', type=int, required=True, help="Business ID to import into")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="File format (default: from the extension)")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            business = Business.objects.get(pk=options['business'])
+        except Business.DoesNotExist:
+            raise CommandError(f"Business {options['business']} does not exist.")
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError("Cannot tell the file format; pass --format.")
+
+        with open(options['path'], 'rb') as file:
+            summary = import_stock_items(business, read_rows(file, file_format), chunk_size=options['chunk_size'])
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']}, updated {summary['updated']}, failed {summary['failed']} items."
+        ))
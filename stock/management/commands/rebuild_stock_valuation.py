@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stock.models import StockItem
+from stock.valuation import rebuild_valuation
+
+
+class Command(BaseCommand):
+    help = "Replay stock transactions to rebuild cost layers, stock_value and cost_of_goods."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only rebuild items of this business ID")
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        items = StockItem.objects.order_by('pk')
+        if options['business']:
+            items = items.filter(business_id=options['business'])
+
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(items.filter(pk__gt=last_pk).select_for_update()[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for item in batch:
+                    rebuild_valuation(item)
+                rebuilt += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt valuation of {rebuilt} stock items."))
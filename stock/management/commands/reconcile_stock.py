@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from stock.cache import invalidate_business_items, invalidate_stock_values
+from stock.models import StockItem, StockTransaction
+
+
+class Command(BaseCommand):
+    help = "Verify StockItem.closing_stock against opening stock plus transactions and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only reconcile items of this business ID")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report mismatches without fixing them")
+
+    def handle(self, *args, **options):
+        items = StockItem.objects.order_by('pk')
+        if options['business']:
+            items = items.filter(business_id=options['business'])
+
+        checked = mismatched = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Lock the batch so movements committed meanwhile land on top of the repaired value.
+                batch = list(
+                    items.filter(pk__gt=last_pk).select_for_update()
+                    .values_list('pk', 'opening_stock', 'closing_stock', 'business_id')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                movements = (
+                    StockItem.objects.filter(pk__in=[pk for pk, _opening, _closing, _business in batch])
+                    .annotate(stock_in=self._movement_total('in'), stock_out=self._movement_total('out'))
+                    .values_list('pk', 'stock_in', 'stock_out')
+                )
+                expected = {pk: stock_in - stock_out for pk, stock_in, stock_out in movements}
+                repaired = set()
+                for pk, opening, closing, business_id in batch:
+                    checked += 1
+                    correct = opening + expected.get(pk, Decimal('0'))
+                    if closing != correct:
+                        mismatched += 1
+                        self.stdout.write(f"Item {pk}: closing_stock {closing} should be {correct}")
+                        if not options['dry_run']:
+                            StockItem.objects.filter(pk=pk).update(closing_stock=correct, updated_at=timezone.now())
+                            repaired.add(business_id)
+                # .update() skips the signals, so cached items and stock values are dropped here.
+                for business_id in repaired:
+                    invalidate_business_items(business_id)
+                    invalidate_stock_values(business_id)
+
+        action = "found" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} items, {action} {mismatched} mismatches."))
+
+    @staticmethod
+    def _movement_total(transaction_type):
+        totals = (
+            StockTransaction.objects
+            .filter(stock_item=OuterRef('pk'), transaction_type=transaction_type)
+            .order_by()
+            .values('stock_item')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+        return Coalesce(Subquery(totals), zero)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from stock.alerts import send_low_stock_alerts
+
+
+class Command(BaseCommand):
+    help = "Notify business owners about stock items at or below their reorder level."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        sent = send_low_stock_alerts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} low-stock notifications."))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0003_stockitem_stockitem_created_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(fields=['business', 'updated_at', 'id'], name='stockitem_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:25
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def seed_cost_layers(apps, schema_editor):
+    # Earlier movements carry no cost, so whatever each item has on hand is
+    # costed at its price_per_unit as one opening layer; later movements are
+    # then valued on top of it.
+    StockItem = apps.get_model('stock', 'StockItem')
+    StockCostLayer = apps.get_model('stock', 'StockCostLayer')
+    signed = Case(
+        When(stocktransaction__transaction_type='out', then=-F('stocktransaction__quantity')),
+        default=F('stocktransaction__quantity'),
+    )
+    zero = Value(Decimal('0'), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+    items = (
+        StockItem.objects.annotate(moved=Coalesce(Sum(signed, filter=Q(stocktransaction__isnull=False)), zero))
+        .values_list('pk', 'opening_stock', 'moved', 'price_per_unit', 'created_at')
+        .order_by('pk')
+    )
+    layers, values = [], []
+    for pk, opening, moved, price, created_at in items.iterator(chunk_size=2000):
+        on_hand = opening + moved
+        if on_hand <= 0:
+            continue
+        layers.append(StockCostLayer(
+            stock_item_id=pk, date=timezone.localdate(created_at), remaining=on_hand, unit_cost=price,
+        ))
+        values.append(StockItem(pk=pk, stock_value=(on_hand * price).quantize(Decimal('0.01'))))
+        if len(layers) >= 2000:
+            StockCostLayer.objects.bulk_create(layers)
+            StockItem.objects.bulk_update(values, ['stock_value'])
+            layers, values = [], []
+    StockCostLayer.objects.bulk_create(layers)
+    StockItem.objects.bulk_update(values, ['stock_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0004_stockitem_updated_at_stocktransaction_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='stock_value',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='valuation_method',
+            field=models.CharField(choices=[('fifo', 'FIFO'), ('average', 'Weighted average')], default='fifo', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='cost_of_goods',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='StockCostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('remaining', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stock.stocktransaction')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='stock.stockitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stock_item', 'id'], name='stockcostlayer_fifo_idx')],
+            },
+        ),
+        migrations.RunPython(seed_cost_layers, migrations.RunPython.noop),
+    ]
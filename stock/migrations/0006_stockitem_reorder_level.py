@@ -0,0 +1,32 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0005_stock_valuation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='reorder_level',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='reorder_quantity',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(condition=models.Q(('closing_stock__lte', models.F('reorder_level'))), fields=['business', 'id'], name='stockitem_low_stock_idx'),
+        ),
+    ]
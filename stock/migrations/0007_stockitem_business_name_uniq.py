@@ -0,0 +1,44 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+NAME_MAX_LENGTH = 100
+
+
+def rename_duplicate_items(apps, schema_editor):
+    # Items are only renamed, never merged, so no stock history moves: within a
+    # business the oldest item keeps the name and later ones get " (2)", " (3)"...
+    StockItem = apps.get_model('stock', 'StockItem')
+    duplicates = (
+        StockItem.objects.values('business_id', 'name').annotate(count=Count('id')).filter(count__gt=1)
+        .values_list('business_id', 'name')
+    )
+    for business_id, name in duplicates:
+        taken = set(StockItem.objects.filter(business_id=business_id).values_list('name', flat=True))
+        items = StockItem.objects.filter(business_id=business_id, name=name).order_by('id')[1:]
+        number = 1
+        for item in items:
+            while True:
+                number += 1
+                suffix = f' ({number})'
+                candidate = name[:NAME_MAX_LENGTH - len(suffix)] + suffix
+                if candidate not in taken:
+                    break
+            taken.add(candidate)
+            StockItem.objects.filter(pk=item.pk).update(name=candidate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0006_stockitem_reorder_level'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockitem',
+            constraint=models.UniqueConstraint(fields=('business', 'name'), name='stockitem_business_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0007_stockitem_business_name_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='stock.stockitem')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('stock_item', 'date'), name='unique_stocksnapshot_month'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0008_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='stockitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku__isnull', False)), fields=('business', 'sku'), name='stockitem_business_sku_uniq'),
+        ),
+    ]
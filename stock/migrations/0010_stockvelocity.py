@@ -0,0 +1,48 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('stock', '0009_stockitem_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockVelocity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('out_7d', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('out_30d', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('out_90d', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('daily_rate', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, max_digits=12, null=True)),
+                ('suggested_reorder', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('movement_class', models.CharField(choices=[('fast', 'Fast moving'), ('slow', 'Slow moving'), ('dead', 'Dead stock')], max_length=10)),
+                ('last_out_date', models.DateField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stocktransaction',
+            index=models.Index(fields=['stock_item', 'date'], name='stocktxn_item_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockvelocity',
+            name='business',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.business'),
+        ),
+        migrations.AddField(
+            model_name='stockvelocity',
+            name='stock_item',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='velocity', to='stock.stockitem'),
+        ),
+        migrations.AddIndex(
+            model_name='stockvelocity',
+            index=models.Index(fields=['business', 'movement_class', 'id'], name='stockvelocity_class_idx'),
+        ),
+    ]
@@ -1,23 +1,311 @@
-from django.db import models
+import datetime
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, DateField, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 from users.models import Business
 
+def signed_quantity(field='quantity', type_field='transaction_type'):
+    """Expression for `field` as a stock movement: positive for stock-in, negative for stock-out."""
+    return Case(When(**{type_field: 'in'}, then=F(field)), default=-F(field))
+
+
+class StockItemQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        """
+        Add {stock_item_id: quantity} to closing_stock.
+
+        Rows are locked in id order first so concurrent adjustments touching
+        several items cannot deadlock; the increment itself is an F()
+        expression, so no read-modify-write window exists. An item that ends
+        up above its reorder level has its low-stock alert reset in the same
+        statement, so its next drop alerts again (see stock.alerts).
+        """
+        ids = sorted(pk for pk, delta in deltas.items() if delta)
+        if not ids:
+            return
+        with transaction.atomic():
+            list(self.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+            now = timezone.now()
+            for pk in ids:
+                closing_stock = F('closing_stock') + deltas[pk]
+                restocked = Q(reorder_level__isnull=True) | Q(reorder_level__lt=closing_stock)
+                self.filter(pk=pk).update(
+                    closing_stock=closing_stock,
+                    low_stock_alerted_at=Case(When(restocked, then=None), default=F('low_stock_alerted_at')),
+                    updated_at=now,
+                )
+
 class StockItem(models.Model):
+    VALUATION_METHODS = (
+        ('fifo', 'FIFO'),
+        ('average', 'Weighted average'),
+    )
     name = models.CharField(max_length=100)
+    # SKU or barcode, unique within a business.
+    sku = models.CharField(max_length=64, null=True, blank=True)
     unit = models.CharField(max_length=20)
     opening_stock = models.DecimalField(max_digits=12, decimal_places=2)
+    # Maintained from opening_stock and StockTransaction movements; see StockItemQuerySet.adjust.
     closing_stock = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     price_per_unit = models.DecimalField(max_digits=12, decimal_places=2)
     business = models.ForeignKey(Business, on_delete=models.CASCADE)
     category = models.CharField(max_length=50, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    # Alert once closing_stock falls to reorder_level; suggest ordering reorder_quantity.
+    reorder_level = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    reorder_quantity = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # Set when a low-stock notification went out; cleared once restocked. See stock.alerts.
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True)
+    valuation_method = models.CharField(max_length=10, choices=VALUATION_METHODS, default='fifo')
+    # Cost value of the open cost layers; maintained by stock.valuation.
+    stock_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StockItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='stockitem_created_id_idx'),
+            models.Index(fields=['business', 'updated_at', 'id'], name='stockitem_sync_idx'),
+            # Only items at or below their reorder level are indexed, so the
+            # low-stock scan reads just those rows instead of the catalogue.
+            models.Index(
+                fields=['business', 'id'],
+                name='stockitem_low_stock_idx',
+                condition=Q(closing_stock__lte=F('reorder_level')),
+            ),
+        ]
+        constraints = [
+            # Natural key for bulk imports (upserts target it).
+            models.UniqueConstraint(fields=['business', 'name'], name='stockitem_business_name_uniq'),
+            # Also the index behind barcode lookups.
+            models.UniqueConstraint(
+                fields=['business', 'sku'], name='stockitem_business_sku_uniq', condition=Q(sku__isnull=False),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .valuation import rebuild_valuation
+
+        # Blank codes are stored as NULL so they never collide.
+        self.sku = (self.sku or '').strip() or None
+        if self._state.adding:
+            self.closing_stock = self.opening_stock
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                rebuild_valuation(self)
+            return
+        with transaction.atomic():
+            previous = (
+                StockItem.objects.select_for_update().filter(pk=self.pk)
+                .values('opening_stock', 'valuation_method').first()
+            )
+            if previous is not None and kwargs.get('update_fields') is None:
+                # Never write back possibly stale maintained columns over concurrent movements.
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in ('closing_stock', 'stock_value')
+                ]
+            super().save(*args, **kwargs)
+            if previous is not None and Decimal(self.opening_stock) != previous['opening_stock']:
+                difference = Decimal(self.opening_stock) - previous['opening_stock']
+                StockItem.objects.adjust({self.pk: difference})
+                StockSnapshot.objects.shift({(self.pk, datetime.date.min): difference})
+            if previous is not None and (
+                Decimal(self.opening_stock) != previous['opening_stock']
+                or self.valuation_method != previous['valuation_method']
+            ):
+                rebuild_valuation(self)
+            self.refresh_from_db(fields=['closing_stock', 'stock_value'])
 
 class StockTransaction(models.Model):
     stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
     transaction_type = models.CharField(max_length=10, choices=[('in', 'In'), ('out', 'Out')])
     quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    # Purchase cost per unit of a stock-in; defaults to the item's price_per_unit.
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # Cost of the units a stock-out consumed, set by stock.valuation.
+    cost_of_goods = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
     date = models.DateField()
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='stocktxn_date_id_idx'),
+            models.Index(fields=['stock_item', 'date'], name='stocktxn_item_date_idx'),
+        ]
+
+    @property
+    def movement(self):
+        """Signed effect on closing_stock."""
+        quantity = Decimal(self.quantity)
+        return quantity if self.transaction_type == 'in' else -quantity
+
+    def save(self, *args, **kwargs):
+        from .valuation import record_transaction
+
+        # Deletes are reversed by the post_delete signal so cascades are covered too.
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = StockTransaction.objects.select_for_update().filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            deltas = {self.stock_item_id: self.movement}
+            if previous is not None:
+                deltas[previous.stock_item_id] = deltas.get(previous.stock_item_id, 0) - previous.movement
+            StockItem.objects.adjust(deltas)
+            shifts = {(self.stock_item_id, self.date): self.movement}
+            if previous is not None:
+                key = (previous.stock_item_id, previous.date)
+                shifts[key] = shifts.get(key, 0) - previous.movement
+            StockSnapshot.objects.shift(shifts)
+            record_transaction(self, previous)
+            if StockTransaction.stock_item.is_cached(self):
+                self.stock_item.refresh_from_db(fields=['closing_stock', 'stock_value', 'updated_at'])
+
+
+class StockCostLayer(models.Model):
+    """
+    Units of a StockItem still on hand at one unit cost.
+
+    FIFO items keep one layer per receipt (plus the opening stock), consumed
+    oldest first; weighted-average items keep a single pooled layer whose
+    cost is re-averaged on every receipt. Layers are consumed in id order,
+    which is the order they were received in; exhausted layers are deleted.
+    """
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='cost_layers')
+    source = models.ForeignKey(StockTransaction, on_delete=models.SET_NULL, null=True, blank=True)
+    date = models.DateField()
+    remaining = models.DecimalField(max_digits=12, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stock_item', 'id'], name='stockcostlayer_fifo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item_id}: {self.remaining} @ {self.unit_cost}"
+
+
+class StockSnapshotQuerySet(models.QuerySet):
+    def shift(self, movements):
+        """Move every snapshot after each (stock_item_id, date) by that day's movement."""
+        for (stock_item_id, date), movement in movements.items():
+            if movement:
+                self.filter(stock_item_id=stock_item_id, date__gt=date).update(quantity=F('quantity') + movement)
+
+    def levels_as_of(self, stock_item_ids, date):
+        """
+        {stock_item_id: quantity on hand at the end of `date`} for the given items.
+
+        Each level is the item's snapshot for the month of `date` plus that
+        month's movements up to `date`, so the cost does not depend on how
+        long the history is. Missing snapshots are built and stored first.
+        """
+        month_start = date.replace(day=1)
+        levels = dict(
+            self.filter(stock_item_id__in=stock_item_ids, date=month_start).values_list('stock_item_id', 'quantity')
+        )
+        missing = [pk for pk in stock_item_ids if pk not in levels]
+        if missing:
+            levels.update(self._build(missing, month_start))
+        movements = (
+            StockTransaction.objects
+            .filter(stock_item_id__in=stock_item_ids, date__gte=month_start, date__lte=date)
+            .order_by()
+            .values('stock_item_id')
+            .annotate(total=Sum(signed_quantity()))
+            .values_list('stock_item_id', 'total')
+        )
+        for stock_item_id, total in movements:
+            levels[stock_item_id] += total
+        return levels
+
+    def _build(self, stock_item_ids, month_start):
+        """Create the `month_start` snapshots of the given items from their nearest earlier snapshot."""
+        earlier = self.filter(stock_item=OuterRef('pk'), date__lt=month_start).order_by('-date')
+        moved = (
+            StockTransaction.objects
+            .filter(
+                stock_item=OuterRef('pk'),
+                date__lt=month_start,
+                date__gte=Coalesce(OuterRef('base_date'), Value(datetime.date.min), output_field=DateField()),
+            )
+            .order_by()
+            .values('stock_item')
+            .annotate(total=Sum(signed_quantity()))
+            .values('total')
+        )
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+        with transaction.atomic():
+            # Holding the item rows keeps movements from landing between the read and the insert.
+            items = (
+                StockItem.objects.select_for_update().filter(pk__in=stock_item_ids).order_by('pk')
+                .annotate(base_date=Subquery(earlier.values('date')[:1]))
+                .annotate(
+                    base_quantity=Coalesce(Subquery(earlier.values('quantity')[:1]), F('opening_stock')),
+                    moved=Coalesce(Subquery(moved), zero),
+                )
+                .values_list('pk', 'base_quantity', 'moved')
+            )
+            levels = {pk: base + moved for pk, base, moved in items}
+            self.bulk_create(
+                [StockSnapshot(stock_item_id=pk, date=month_start, quantity=quantity) for pk, quantity in levels.items()],
+                ignore_conflicts=True,
+            )
+        return levels
+
+
+class StockSnapshot(models.Model):
+    """Quantity of a StockItem on hand before `date` (always a first of month)."""
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=2)
+
+    objects = StockSnapshotQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stock_item', 'date'], name='unique_stocksnapshot_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item_id} before {self.date}: {self.quantity}"
+
+
+class StockVelocity(models.Model):
+    """Consumption statistics of a StockItem, recomputed in batches by stock.velocity."""
+    MOVEMENT_CLASSES = (
+        ('fast', 'Fast moving'),
+        ('slow', 'Slow moving'),
+        ('dead', 'Dead stock'),
+    )
+    stock_item = models.OneToOneField(StockItem, on_delete=models.CASCADE, related_name='velocity')
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    out_7d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    out_30d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    out_90d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    daily_rate = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    # None when nothing was consumed in the last 30 days.
+    days_of_cover = models.DecimalField(max_digits=12, decimal_places=1, null=True, blank=True)
+    suggested_reorder = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    movement_class = models.CharField(max_length=10, choices=MOVEMENT_CLASSES)
+    last_out_date = models.DateField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['business', 'movement_class', 'id'], name='stockvelocity_class_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.stock_item_id}: {self.movement_class}"
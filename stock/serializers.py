@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import StockItem, StockTransaction
+from .models import StockItem, StockTransaction, StockVelocity
 
 class StockItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockItem
         fields = '__all__'
+        read_only_fields = ['closing_stock', 'stock_value', 'low_stock_alerted_at']
 
 class StockTransactionSerializer(serializers.ModelSerializer):
     stock_item = StockItemSerializer(read_only=True)
@@ -14,6 +15,18 @@ class StockTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockTransaction
         fields = [
-            'id', 'stock_item', 'stock_item_id', 'transaction_type', 'quantity', 'date', 'notes', 'created_at'
+            'id', 'stock_item', 'stock_item_id', 'transaction_type', 'quantity', 'unit_cost', 'cost_of_goods',
+            'date', 'notes', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'cost_of_goods', 'created_at', 'updated_at']
+
+class StockVelocitySerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='stock_item.name', read_only=True)
+    closing_stock = serializers.DecimalField(source='stock_item.closing_stock', max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = StockVelocity
+        fields = [
+            'stock_item', 'name', 'closing_stock', 'out_7d', 'out_30d', 'out_90d', 'daily_rate',
+            'days_of_cover', 'suggested_reorder', 'movement_class', 'last_out_date', 'computed_at'
         ]
-        read_only_fields = ['id', 'created_at']
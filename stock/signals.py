@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_business_items, invalidate_stock_values
+from .models import StockItem, StockSnapshot, StockTransaction
+from .valuation import rebuild_valuation
+
+
+@receiver(post_delete, sender=StockTransaction)
+def reverse_stock_movement(sender, instance, origin=None, **kwargs):
+    StockItem.objects.adjust({instance.stock_item_id: -instance.movement})
+    StockSnapshot.objects.shift({(instance.stock_item_id, instance.date): -instance.movement})
+    # When the item itself is being deleted its cost layers go with it.
+    if isinstance(origin, StockTransaction) or getattr(origin, 'model', None) is StockTransaction:
+        item = StockItem.objects.select_for_update().filter(pk=instance.stock_item_id).first()
+        if item is not None:
+            rebuild_valuation(item)
+
+
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+def invalidate_item_lookup(sender, instance, **kwargs):
+    invalidate_business_items(instance.business_id)
+
+
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+def invalidate_item_values(sender, instance, **kwargs):
+    invalidate_stock_values(instance.business_id)
+
+
+@receiver(post_save, sender=StockTransaction)
+@receiver(post_delete, sender=StockTransaction)
+def invalidate_transaction_values(sender, instance, **kwargs):
+    if StockTransaction.stock_item.is_cached(instance):
+        business_id = instance.stock_item.business_id
+    else:
+        business_id = StockItem.objects.filter(pk=instance.stock_item_id).values_list('business_id', flat=True).first()
+    if business_id is not None:
+        invalidate_stock_values(business_id)
@@ -1,3 +1,383 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import Sum
 from django.test import TestCase
+from django.utils import timezone
+
+from dailyhisab.caching import get_version
+from dailyhisab.testing import APITestCaseMixin, ListQueryCountMixin
+from .cache import STOCK_CACHE_NAMESPACE, STOCK_ITEM_CACHE_NAMESPACE
+from notifications.models import Notification
+from .alerts import send_low_stock_alerts
+from .importer import import_stock_items, read_rows
+from .models import StockCostLayer, StockItem, StockSnapshot, StockTransaction, StockVelocity, signed_quantity
+from .velocity import compute_velocity
+
+JAN, FEB, MAR = datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)
+
+
+class StockHistoryTestCase(APITestCaseMixin, TestCase):
+    """Builds a history with every kind of write the maintained stock columns have to follow."""
+
+    def add_item(self, name, opening='10', method='fifo', price='5.00'):
+        return StockItem.objects.create(
+            business=self.business, name=name, unit='kg', opening_stock=Decimal(opening),
+            price_per_unit=Decimal(price), valuation_method=method,
+        )
+
+    def move(self, item, transaction_type, quantity, date, unit_cost=None):
+        return StockTransaction.objects.create(
+            stock_item=item, transaction_type=transaction_type, quantity=Decimal(quantity), date=date,
+            unit_cost=unit_cost,
+        )
+
+    def make_history(self):
+        rice = self.add_item('Rice')
+        dal = self.add_item('Dal', opening='4', method='average', price='80.00')
+        self.move(rice, 'in', '20', JAN.replace(day=5), unit_cost=Decimal('6.00'))
+        sale = self.move(rice, 'out', '12', FEB.replace(day=3))
+        self.move(dal, 'in', '6', JAN.replace(day=20), unit_cost=Decimal('90.00'))
+        self.move(dal, 'out', '3', FEB.replace(day=10))
+        # Snapshots stored halfway through have to follow everything below.
+        StockSnapshot.objects.levels_as_of([rice.pk, dal.pk], MAR.replace(day=15))
+
+        receipt = self.move(rice, 'in', '5', MAR.replace(day=2), unit_cost=Decimal('7.00'))
+        self.move(rice, 'out', '2', JAN.replace(day=10)).delete()
+        sale.quantity = Decimal('9')
+        sale.save()
+        receipt.stock_item = dal
+        receipt.date = JAN.replace(day=25)
+        receipt.save()
+        self.move(dal, 'out', '1', FEB.replace(day=28))
+        rice.opening_stock = Decimal('15')
+        rice.save()
+        dal.valuation_method = 'fifo'
+        dal.save()
+        return rice, dal
+
+    def raw_level(self, item, date=None):
+        movements = StockTransaction.objects.filter(stock_item=item)
+        if date is not None:
+            movements = movements.filter(date__lte=date)
+        opening = StockItem.objects.get(pk=item.pk).opening_stock
+        return opening + (movements.aggregate(total=Sum(signed_quantity()))['total'] or Decimal('0'))
+
+
+class ClosingStockTests(StockHistoryTestCase):
+    def assertReconciled(self):
+        out = io.StringIO()
+        call_command('reconcile_stock', '--dry-run', business=self.business.pk, stdout=out)
+        self.assertIn('found 0 mismatches', out.getvalue())
+
+    def test_history_matches_reconcile(self):
+        rice, dal = self.make_history()
+        for item in (rice, dal):
+            item.refresh_from_db()
+            self.assertEqual(item.closing_stock, self.raw_level(item))
+        self.assertReconciled()
+
+    def test_drift_is_reported_and_repaired(self):
+        rice = self.add_item('Rice')
+        self.move(rice, 'in', '3', JAN)
+        StockItem.objects.filter(pk=rice.pk).update(closing_stock=Decimal('1'))
+        versions = [get_version(namespace, self.business.pk) for namespace in (STOCK_CACHE_NAMESPACE, STOCK_ITEM_CACHE_NAMESPACE)]
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_stock', business=self.business.pk, stdout=out)
+        self.assertIn('repaired 1 mismatches', out.getvalue())
+        for namespace, version in zip((STOCK_CACHE_NAMESPACE, STOCK_ITEM_CACHE_NAMESPACE), versions):
+            self.assertNotEqual(get_version(namespace, self.business.pk), version)
+        rice.refresh_from_db()
+        self.assertEqual(rice.closing_stock, Decimal('13'))
+        self.assertReconciled()
+
+    def test_movements_of_deleted_item_go_with_it(self):
+        rice = self.add_item('Rice')
+        self.move(rice, 'in', '3', JAN)
+        rice.delete()
+        self.assertFalse(StockTransaction.objects.exists())
+        self.assertReconciled()
+
+
+class ValuationTests(StockHistoryTestCase):
+    def valuation_state(self):
+        return (
+            list(StockItem.objects.filter(business=self.business).order_by('pk').values_list('pk', 'stock_value')),
+            list(StockCostLayer.objects.order_by('stock_item_id', 'id').values_list('stock_item_id', 'date', 'remaining', 'unit_cost')),
+            list(StockTransaction.objects.order_by('pk').values_list('pk', 'cost_of_goods')),
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = self.valuation_state()
+        call_command('rebuild_stock_valuation', business=self.business.pk, stdout=io.StringIO())
+        self.assertEqual(maintained, self.valuation_state())
+
+    def test_history_matches_rebuild(self):
+        self.make_history()
+        self.assertMatchesRebuild()
+
+    def test_fifo_and_average_costs(self):
+        fifo = self.add_item('Rice', opening='10', price='5.00')
+        average = self.add_item('Dal', opening='10', method='average', price='5.00')
+        for item in (fifo, average):
+            self.move(item, 'in', '10', JAN.replace(day=2), unit_cost=Decimal('8.00'))
+        fifo_sale = self.move(fifo, 'out', '15', JAN.replace(day=3))
+        average_sale = self.move(average, 'out', '15', JAN.replace(day=3))
+        self.assertEqual(fifo_sale.cost_of_goods, Decimal('90.00'))
+        self.assertEqual(average_sale.cost_of_goods, Decimal('97.50'))
+        fifo.refresh_from_db()
+        average.refresh_from_db()
+        self.assertEqual((fifo.stock_value, average.stock_value), (Decimal('40.00'), Decimal('32.50')))
+        self.assertMatchesRebuild()
+
+    def test_import_matches_rebuild(self):
+        rice = self.add_item('Rice')
+        self.move(rice, 'out', '4', JAN)
+        csv = io.BytesIO(b'name,unit,price_per_unit,opening_stock,valuation_method\nRice,kg,6,12,average\nDal,kg,90,3,fifo\n')
+        import_stock_items(self.business, read_rows(csv, 'csv'))
+        self.assertMatchesRebuild()
+
+    def test_valuation_endpoint_rejects_invalid_dates(self):
+        for value in ('2025-02-30', 'later'):
+            response = self.client.get('/api/stock/valuation/', {'business': self.business.pk, 'date_from': value})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('date_from', response.data)
+
+
+class SnapshotTests(StockHistoryTestCase):
+    DATES = [JAN.replace(day=9), JAN.replace(day=31), FEB.replace(day=3), FEB.replace(day=28), MAR.replace(day=2), MAR.replace(day=31)]
+
+    def assertLevelsMatchLedger(self, items):
+        for date in self.DATES:
+            levels = StockSnapshot.objects.levels_as_of([item.pk for item in items], date)
+            self.assertEqual(levels, {item.pk: self.raw_level(item, date) for item in items}, date)
+
+    def snapshots(self):
+        return {
+            (item_id, date): quantity
+            for item_id, date, quantity in StockSnapshot.objects.values_list('stock_item_id', 'date', 'quantity')
+        }
+
+    def assertSnapshotsMatchBackfill(self):
+        stored = self.snapshots()
+        self.assertTrue(stored)
+        call_command('backfill_stock_snapshots', business=self.business.pk, stdout=io.StringIO())
+        backfilled = self.snapshots()
+        self.assertEqual(stored, {key: backfilled[key] for key in stored})
+
+    def test_history_matches_ledger_and_backfill(self):
+        rice, dal = self.make_history()
+        self.assertLevelsMatchLedger([rice, dal])
+        self.assertSnapshotsMatchBackfill()
+
+    def test_import_shifts_snapshots(self):
+        rice = self.add_item('Rice')
+        self.move(rice, 'out', '2', FEB.replace(day=1))
+        self.assertEqual(StockSnapshot.objects.levels_as_of([rice.pk], FEB.replace(day=5)), {rice.pk: Decimal('8')})
+
+        csv = io.BytesIO(b'name,unit,price_per_unit,opening_stock\nRice,kg,5,20\n')
+        import_stock_items(self.business, read_rows(csv, 'csv'))
+        self.assertEqual(StockSnapshot.objects.levels_as_of([rice.pk], FEB.replace(day=5)), {rice.pk: Decimal('18')})
+        self.assertLevelsMatchLedger([rice])
+        self.assertSnapshotsMatchBackfill()
+
+
+class VelocityTests(StockHistoryTestCase):
+    def test_windows_and_last_out_date(self):
+        rice = self.add_item('Rice', opening='100')
+        dal = self.add_item('Dal')
+        as_of = MAR.replace(day=31)
+        for days_ago, quantity in ((1, '2'), (5, '3'), (20, '4'), (60, '5'), (200, '7')):
+            self.move(rice, 'out', quantity, as_of - datetime.timedelta(days=days_ago))
+        self.move(rice, 'in', '50', as_of - datetime.timedelta(days=2))
+        self.move(rice, 'out', '9', as_of + datetime.timedelta(days=1))
+        self.move(dal, 'out', '1', as_of - datetime.timedelta(days=300))
+
+        rows = {row.stock_item_id: row for row in compute_velocity(self.business.pk, as_of)}
+        self.assertEqual(
+            (rows[rice.pk].out_7d, rows[rice.pk].out_30d, rows[rice.pk].out_90d, rows[rice.pk].last_out_date),
+            (Decimal('5'), Decimal('9'), Decimal('14'), as_of - datetime.timedelta(days=1)),
+        )
+        # Nothing inside the windows, but the last sale is still found.
+        self.assertEqual(
+            (rows[dal.pk].out_90d, rows[dal.pk].last_out_date, rows[dal.pk].movement_class),
+            (Decimal('0'), as_of - datetime.timedelta(days=300), 'dead'),
+        )
+
+
+class LookupTests(StockHistoryTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def lookup(self, code):
+        return self.client.get('/api/stock/item/lookup/', {'business': self.business.pk, 'code': code})
+
+    def test_hit_and_miss_are_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rice = StockItem.objects.create(
+                business=self.business, name='Rice', unit='kg', sku='890100', opening_stock=5, price_per_unit=Decimal('42.50'),
+            )
+        response = self.lookup('890100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['id'], response.data['price_per_unit']), (rice.pk, '42.50'))
+        self.assertEqual(self.lookup('000000').status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup('890100').status_code, 200)
+            self.assertEqual(self.lookup('000000').status_code, 404)
+        # Sales move closing_stock without invalidating the lookup.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.move(rice, 'out', '1', JAN)
+        with self.assertNumQueries(0):
+            self.lookup('890100')
+
+    def test_item_changes_show_on_next_lookup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rice = StockItem.objects.create(
+                business=self.business, name='Rice', unit='kg', sku='890100', opening_stock=5, price_per_unit=40,
+            )
+        self.lookup('890100')
+        self.assertEqual(self.lookup('777').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rice.price_per_unit = Decimal('45.00')
+            rice.save()
+        self.assertEqual(self.lookup('890100').data['price_per_unit'], '45.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rice.sku = '777'
+            rice.save()
+        self.assertEqual(self.lookup('890100').status_code, 404)
+        self.assertEqual(self.lookup('777').data['id'], rice.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rice.delete()
+        self.assertEqual(self.lookup('777').status_code, 404)
+
+
+class LowStockAlertTests(StockHistoryTestCase):
+    def alerts(self):
+        return list(Notification.objects.filter(user=self.user).order_by('pk').values_list('title', 'message'))
+
+    def test_alerts_once_per_drop(self):
+        rice = self.add_item('Rice')
+        dal = self.add_item('Dal')
+        StockItem.objects.filter(pk=rice.pk).update(reorder_level=5, reorder_quantity=20)
+        StockItem.objects.filter(pk=dal.pk).update(reorder_level=3)
+        self.move(rice, 'out', '5', JAN)
+        self.move(dal, 'out', '6', JAN)
+        self.add_item('Sugar', opening='0')
+
+        self.assertEqual(send_low_stock_alerts(), 1)
+        self.assertEqual(self.alerts(), [('Low stock: Rice', 'Rice is down to 5.00 kg (reorder level 5.00 kg). Reorder 20.00 kg.')])
+        self.move(rice, 'out', '1', JAN.replace(day=2))
+        self.assertEqual(send_low_stock_alerts(), 0)
+        self.assertEqual(len(self.alerts()), 1)
+
+    def test_restock_then_drop_between_runs_alerts_again(self):
+        rice = self.add_item('Rice')
+        StockItem.objects.filter(pk=rice.pk).update(reorder_level=5)
+        self.move(rice, 'out', '6', JAN)
+        self.assertEqual(send_low_stock_alerts(), 1)
+
+        self.move(rice, 'in', '10', JAN.replace(day=2))
+        self.assertIsNone(StockItem.objects.get(pk=rice.pk).low_stock_alerted_at)
+        sale = self.move(rice, 'out', '12', JAN.replace(day=3))
+        self.assertEqual(send_low_stock_alerts(), 1)
+
+        # Deleting a sale restocks too.
+        sale.delete()
+        self.assertIsNone(StockItem.objects.get(pk=rice.pk).low_stock_alerted_at)
+        self.move(rice, 'out', '11', JAN.replace(day=4))
+        self.assertEqual(send_low_stock_alerts(), 1)
+        self.assertEqual(len(self.alerts()), 3)
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def add_items(self, count, **fields):
+        fields = {'unit': 'pcs', 'opening_stock': 0, 'price_per_unit': 10, **fields}
+        start = StockItem.objects.count()
+        return StockItem.objects.bulk_create(
+            StockItem(business=self.business, name=f'Rice {start + index}', **fields) for index in range(count)
+        )
+
+    def test_item_list(self):
+        self.assertConstantQueries('/api/stock/item/', self.add_items, 1)
+
+    def test_low_stock_items(self):
+        self.assertConstantQueries(
+            '/api/stock/item/low-stock/', lambda count: self.add_items(count, closing_stock=2, reorder_level=5), 1,
+            {'business': self.business.pk},
+        )
+
+    def test_transaction_list_joins_item(self):
+        [item] = self.add_items(1)
+
+        def create_rows(count):
+            StockTransaction.objects.bulk_create(
+                StockTransaction(stock_item=item, transaction_type='in', quantity=1, date=datetime.date(2025, 1, 1))
+                for _ in range(count)
+            )
+
+        response = self.assertConstantQueries('/api/stock/transaction/', create_rows, 1)
+        self.assertEqual(response.data['results'][0]['stock_item']['name'], 'Rice 0')
+
+    def test_velocity_joins_item(self):
+        def create_rows(count):
+            StockVelocity.objects.bulk_create(
+                StockVelocity(stock_item=item, business=self.business, movement_class='slow', computed_at=timezone.now())
+                for item in self.add_items(count, closing_stock=Decimal('4'))
+            )
+
+        response = self.assertConstantQueries('/api/stock/velocity/', create_rows, 1, {'business': self.business.pk})
+        self.assertTrue(response.data['results'][0]['name'].startswith('Rice'))
+
+
+class ImportTests(APITestCaseMixin, TestCase):
+    def upload(self, content, name='items.csv'):
+        return self.client.post(
+            '/api/stock/item/import/', {'business': self.business.pk, 'file': SimpleUploadedFile(name, content)},
+            format='multipart',
+        )
+
+    def test_creates_updates_and_reports_rows(self):
+        StockItem.objects.create(business=self.business, name='Rice', unit='kg', opening_stock=5, price_per_unit=40)
+        response = self.upload(
+            b'name,unit,price_per_unit,opening_stock\nRice,kg,42,8\nDal,kg,90,3\nSugar,kg,abc,1\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (1, 1, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        rice = StockItem.objects.get(business=self.business, name='Rice')
+        self.assertEqual((rice.closing_stock, rice.price_per_unit), (Decimal('8'), Decimal('42')))
+
+    def test_partial_columns_keep_the_rest(self):
+        rice = StockItem.objects.create(
+            business=self.business, name='Rice', unit='kg', sku='RC-1', opening_stock=50, price_per_unit=40,
+            reorder_level=10, reorder_quantity=25, notes='Basmati', valuation_method='average',
+        )
+        StockTransaction.objects.create(stock_item=rice, transaction_type='out', quantity=10, date=JAN)
+        response = self.upload(b'name,unit,price_per_unit,notes\nRice,kg,42,\nDal,kg,90,\n')
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+
+        rice.refresh_from_db()
+        self.assertEqual(
+            (rice.price_per_unit, rice.opening_stock, rice.closing_stock, rice.sku, rice.reorder_level,
+             rice.reorder_quantity, rice.notes, rice.valuation_method),
+            (Decimal('42'), Decimal('50'), Decimal('40'), 'RC-1', Decimal('10'), Decimal('25'), 'Basmati', 'average'),
+        )
+        dal = StockItem.objects.get(business=self.business, name='Dal')
+        self.assertEqual((dal.opening_stock, dal.closing_stock, dal.sku), (Decimal('0'), Decimal('0'), None))
 
-# Create your tests here.
+    def test_unreadable_tail_reports_what_was_imported(self):
+        rows = ''.join(f'Item {index},pcs,10,1\n' for index in range(1200))
+        response = self.upload(b'name,unit,price_per_unit,opening_stock\n' + rows.encode() + b'Bad \xff,pcs,1,1\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.data)
+        self.assertGreater(response.data['created'], 0)
+        self.assertEqual(response.data['created'], StockItem.objects.filter(business=self.business).count())
@@ -11,6 +11,9 @@ urlpatterns = [
     path('item/<int:pk>/', views.stockitem_detail, name='stockitem-detail'),
     path('item/<int:pk>/update/', views.stockitem_update, name='stockitem-update'),
     path('item/<int:pk>/delete/', views.stockitem_delete, name='stockitem-delete'),
+    path('item/low-stock/', views.stockitem_low_stock, name='stockitem-low-stock'),
+    path('item/import/', views.stockitem_import, name='stockitem-import'),
+    path('item/lookup/', views.stockitem_lookup, name='stockitem-lookup'),
 
     # StockTransaction endpoints
     path('transaction/', views.stocktransaction_list, name='stocktransaction-list'),
@@ -18,4 +21,9 @@ urlpatterns = [
     path('transaction/<int:pk>/', views.stocktransaction_detail, name='stocktransaction-detail'),
     path('transaction/<int:pk>/update/', views.stocktransaction_update, name='stocktransaction-update'),
     path('transaction/<int:pk>/delete/', views.stocktransaction_delete, name='stocktransaction-delete'),
+
+    # Valuation
+    path('valuation/', views.stock_valuation, name='stock-valuation'),
+    path('as-of/', views.stock_as_of, name='stock-as-of'),
+    path('velocity/', views.stock_velocity, name='stock-velocity'),
 ]
@@ -0,0 +1,176 @@
+"""
+Incremental FIFO / weighted-average costing of stock items.
+
+Every item keeps its open cost layers in StockCostLayer and their total in
+StockItem.stock_value. A transaction that is the newest movement of its item
+is applied on top of those layers: a stock-in pushes a layer (or merges into
+the pooled one for weighted average), a stock-out consumes layers and stores
+what it cost in StockTransaction.cost_of_goods. Anything that rewrites
+history -- editing or deleting a transaction, back-dating one, changing the
+opening stock or valuation method -- replays just that item in (date, id)
+order. Opening stock is costed at the item's price_per_unit.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import StockCostLayer, StockItem, StockTransaction
+
+CENTS = Decimal('0.01')
+UNIT_COST = Decimal('0.0001')
+
+
+class CostLayers:
+    """
+    The open cost layers of one item, oldest first, plus their running value.
+
+    `value` moves by exactly the cost received or issued, so it always equals
+    cost in minus cost of goods out even where average costs were rounded.
+    """
+
+    def __init__(self, item, layers=(), value=Decimal('0')):
+        self.item = item
+        self.layers = list(layers)
+        self.value = Decimal(value)
+        self.exhausted = []
+        self._loaded = {layer.pk: (layer.remaining, layer.unit_cost) for layer in self.layers}
+
+    def receive(self, quantity, unit_cost, date, source=None):
+        quantity, unit_cost = Decimal(quantity), Decimal(unit_cost)
+        if quantity <= 0:
+            return
+        self.value += (quantity * unit_cost).quantize(CENTS)
+        if self.item.valuation_method == 'average' and self.layers:
+            pool = self.layers[0]
+            total = pool.remaining + quantity
+            pool.unit_cost = ((pool.remaining * pool.unit_cost + quantity * unit_cost) / total).quantize(UNIT_COST)
+            pool.remaining = total
+            pool.date = date
+            return
+        self.layers.append(StockCostLayer(
+            stock_item_id=self.item.pk,
+            source=source if self.item.valuation_method == 'fifo' else None,
+            date=date,
+            remaining=quantity,
+            unit_cost=unit_cost.quantize(UNIT_COST),
+        ))
+
+    def issue(self, quantity):
+        """Consume `quantity` units oldest layer first and return their cost."""
+        quantity = Decimal(quantity)
+        cost = Decimal('0')
+        last_cost = Decimal(self.item.price_per_unit)
+        while quantity > 0 and self.layers:
+            layer = self.layers[0]
+            taken = min(layer.remaining, quantity)
+            cost += taken * layer.unit_cost
+            last_cost = layer.unit_cost
+            layer.remaining -= taken
+            quantity -= taken
+            if layer.remaining <= 0:
+                self.exhausted.append(self.layers.pop(0))
+        # Selling into negative stock: cost the shortfall at the last known unit cost.
+        if quantity > 0:
+            cost += quantity * last_cost
+        cost = cost.quantize(CENTS)
+        self.value -= cost
+        return cost
+
+    def apply(self, stock_transaction):
+        """Apply one transaction and return its cost_of_goods (None for stock-in)."""
+        if stock_transaction.transaction_type == 'in':
+            unit_cost = stock_transaction.unit_cost
+            if unit_cost is None:
+                unit_cost = self.item.price_per_unit
+            self.receive(stock_transaction.quantity, unit_cost, stock_transaction.date, source=stock_transaction)
+            return None
+        return self.issue(stock_transaction.quantity)
+
+    def changed_layers(self):
+        """Previously saved layers that were modified but not exhausted."""
+        return [
+            layer for layer in self.layers
+            if layer.pk and self._loaded.get(layer.pk) != (layer.remaining, layer.unit_cost)
+        ]
+
+
+def rebuild_valuation(item):
+    """Recompute the cost layers, stock_value and cost_of_goods of one item from its history."""
+    with transaction.atomic():
+        StockCostLayer.objects.filter(stock_item=item).delete()
+        layers = CostLayers(item)
+        layers.receive(item.opening_stock, item.price_per_unit, timezone.localdate(item.created_at))
+
+        changed = []
+        now = timezone.now()
+        history = (
+            StockTransaction.objects.filter(stock_item=item).order_by('date', 'id')
+            .only('id', 'transaction_type', 'quantity', 'unit_cost', 'cost_of_goods', 'date')
+        )
+        for stock_transaction in history.iterator(chunk_size=2000):
+            cost_of_goods = layers.apply(stock_transaction)
+            if cost_of_goods != stock_transaction.cost_of_goods:
+                stock_transaction.cost_of_goods = cost_of_goods
+                stock_transaction.updated_at = now
+                changed.append(stock_transaction)
+        StockTransaction.objects.bulk_update(changed, ['cost_of_goods', 'updated_at'], batch_size=500)
+
+        StockCostLayer.objects.bulk_create(layers.layers)
+        StockItem.objects.filter(pk=item.pk).update(stock_value=layers.value)
+        item.stock_value = layers.value
+
+
+def open_valuations(items):
+    """
+    Seed the opening cost layer and stock_value of freshly inserted items in
+    bulk; the set-based equivalent of rebuild_valuation for items that have
+    no layers or transactions yet (e.g. after a bulk import).
+    """
+    layers = []
+    for item in items:
+        item_layers = CostLayers(item)
+        item_layers.receive(item.opening_stock, item.price_per_unit, timezone.localdate(item.created_at))
+        layers.extend(item_layers.layers)
+        item.stock_value = item_layers.value
+    with transaction.atomic():
+        StockCostLayer.objects.bulk_create(layers)
+        StockItem.objects.bulk_update(items, ['stock_value'], batch_size=500)
+
+
+def record_transaction(stock_transaction, previous=None):
+    """
+    Bring valuation up to date after `stock_transaction` was saved.
+
+    Called inside StockTransaction.save's atomic block; `previous` is the row
+    as it was before an update, or None for a new transaction.
+    """
+    item_ids = {stock_transaction.stock_item_id}
+    if previous is not None:
+        item_ids.add(previous.stock_item_id)
+    backdated = previous is None and StockTransaction.objects.filter(
+        stock_item_id=stock_transaction.stock_item_id, date__gt=stock_transaction.date
+    ).exists()
+    if previous is not None or backdated:
+        for item in StockItem.objects.select_for_update().filter(pk__in=item_ids).order_by('pk'):
+            rebuild_valuation(item)
+        stock_transaction.cost_of_goods = (
+            StockTransaction.objects.filter(pk=stock_transaction.pk).values_list('cost_of_goods', flat=True).get()
+        )
+        return
+
+    item = StockItem.objects.select_for_update().get(pk=stock_transaction.stock_item_id)
+    open_layers = StockCostLayer.objects.filter(stock_item=item).order_by('id')
+    if stock_transaction.transaction_type == 'in' and item.valuation_method == 'fifo':
+        # A FIFO receipt only appends a layer; the existing ones are not needed.
+        open_layers = open_layers.none()
+    layers = CostLayers(item, open_layers, value=item.stock_value)
+    cost_of_goods = layers.apply(stock_transaction)
+
+    StockCostLayer.objects.filter(pk__in=[layer.pk for layer in layers.exhausted if layer.pk]).delete()
+    StockCostLayer.objects.bulk_update(layers.changed_layers(), ['remaining', 'unit_cost', 'date'])
+    StockCostLayer.objects.bulk_create([layer for layer in layers.layers if not layer.pk])
+    StockItem.objects.filter(pk=item.pk).update(stock_value=layers.value)
+    if cost_of_goods is not None:
+        StockTransaction.objects.filter(pk=stock_transaction.pk).update(cost_of_goods=cost_of_goods)
+        stock_transaction.cost_of_goods = cost_of_goods
@@ -0,0 +1,113 @@
+"""
+Stock velocity, days of cover and reorder suggestions.
+
+`refresh_velocity` recomputes StockVelocity for whole businesses at a time:
+one grouped query per business sums every item's stock-out quantities over
+the 7/30/90-day windows together, and one upsert stores the results, so the
+work per business is two statements however many items it has. Only the
+last 90 days of each item's movements are joined (a range on the
+(stock_item, date) index), and the last stock-out date is a backwards seek
+on the same index, so older history is never read.
+"""
+import datetime
+import math
+from decimal import ROUND_CEILING, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, FilteredRelation, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockItem, StockTransaction, StockVelocity
+
+WINDOWS = (7, 30, 90)
+RATE_WINDOW = 30
+# Share of an item's moving stock counted as fast movers, by 30-day consumption.
+FAST_MOVER_SHARE = 0.2
+# Days of consumption a reorder suggestion should bring the item up to.
+COVER_TARGET_DAYS = 30
+UPDATE_FIELDS = [
+    'business', 'out_7d', 'out_30d', 'out_90d', 'daily_rate', 'days_of_cover',
+    'suggested_reorder', 'movement_class', 'last_out_date', 'computed_at',
+]
+
+
+def _window_sum(days, as_of):
+    window = Q(recent_out__date__gt=as_of - datetime.timedelta(days=days))
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    return Coalesce(Sum('recent_out__quantity', filter=window), zero)
+
+
+def compute_velocity(business_id, as_of):
+    """Build (unsaved) StockVelocity rows for every item of a business."""
+    # The window bounds go into the JOIN condition, not just the aggregate filters.
+    recent_out = FilteredRelation('stocktransaction', condition=Q(
+        stocktransaction__transaction_type='out',
+        stocktransaction__date__gt=as_of - datetime.timedelta(days=max(WINDOWS)),
+        stocktransaction__date__lte=as_of,
+    ))
+    last_out = (
+        StockTransaction.objects
+        .filter(stock_item=OuterRef('pk'), transaction_type='out', date__lte=as_of)
+        .order_by('-date')
+        .values('date')[:1]
+    )
+    rows = list(
+        StockItem.objects.filter(business_id=business_id)
+        .annotate(recent_out=recent_out)
+        .annotate(
+            **{f'out_{days}d': _window_sum(days, as_of) for days in WINDOWS},
+            last_out_date=Subquery(last_out),
+        )
+        .values('pk', 'closing_stock', 'reorder_level', 'reorder_quantity',
+                'out_7d', 'out_30d', 'out_90d', 'last_out_date')
+        .order_by()
+    )
+    moving = sorted((row['out_30d'] for row in rows if row['out_30d'] > 0), reverse=True)
+    fast_threshold = moving[math.ceil(len(moving) * FAST_MOVER_SHARE) - 1] if moving else None
+
+    now = timezone.now()
+    velocities = []
+    for row in rows:
+        rate = (Decimal(row['out_30d']) / RATE_WINDOW).quantize(Decimal('0.0001'))
+        closing = Decimal(row['closing_stock'])
+        if row['out_90d'] <= 0:
+            movement_class = 'dead'
+        elif fast_threshold is not None and row['out_30d'] >= fast_threshold:
+            movement_class = 'fast'
+        else:
+            movement_class = 'slow'
+        suggested = max(rate * COVER_TARGET_DAYS - closing, Decimal('0'))
+        if row['reorder_level'] is not None and closing <= row['reorder_level'] and row['reorder_quantity']:
+            suggested = max(suggested, row['reorder_quantity'])
+        velocities.append(StockVelocity(
+            stock_item_id=row['pk'],
+            business_id=business_id,
+            out_7d=row['out_7d'],
+            out_30d=row['out_30d'],
+            out_90d=row['out_90d'],
+            daily_rate=rate,
+            days_of_cover=(max(closing, Decimal('0')) / rate).quantize(Decimal('0.1')) if rate else None,
+            suggested_reorder=suggested.quantize(Decimal('0.01'), rounding=ROUND_CEILING),
+            movement_class=movement_class,
+            last_out_date=row['last_out_date'],
+            computed_at=now,
+        ))
+    return velocities
+
+
+def refresh_velocity(business_ids=None, as_of=None):
+    """Recompute and store velocity for the given businesses (default: all with items); returns rows written."""
+    as_of = as_of or timezone.localdate()
+    if business_ids is None:
+        business_ids = StockItem.objects.order_by('business_id').values_list('business_id', flat=True).distinct()
+    written = 0
+    for business_id in business_ids:
+        velocities = compute_velocity(business_id, as_of)
+        with transaction.atomic():
+            StockVelocity.objects.bulk_create(
+                velocities, batch_size=1000,
+                update_conflicts=True, unique_fields=['stock_item'], update_fields=UPDATE_FIELDS,
+            )
+        written += len(velocities)
+    return written
@@ -1,12 +1,23 @@
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from decimal import Decimal
+from django.db.models import Q, Sum
+from django.utils.dateparse import parse_date
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import StockItem, StockTransaction
-from .serializers import StockItemSerializer, StockTransactionSerializer
+from .models import StockItem, StockSnapshot, StockTransaction, StockVelocity
+from .alerts import low_stock_items
+from .cache import lookup_by_code
+from .importer import IMPORT_FORMATS, UnreadableFile, detect_format, import_stock_items, read_rows
+from .valuation import CENTS
+from .serializers import StockItemSerializer, StockTransactionSerializer, StockVelocitySerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, KeysetPagination, paginate
+from dailyhisab.prefetch import optimize_queryset
+from users.models import Business
 
 # StockItem APIs
 @swagger_auto_schema(
@@ -14,6 +25,7 @@ from .serializers import StockItemSerializer, StockTransactionSerializer
     operation_description="Retrieve a list of all stock items",
     operation_summary="Get all stock items",
     tags=['Stock Management'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Stock items retrieved successfully",
@@ -44,8 +56,7 @@ from .serializers import StockItemSerializer, StockTransactionSerializer
 @api_view(['GET'])
 def stockitem_list(request):
     items = StockItem.objects.all()
-    serializer = StockItemSerializer(items, many=True)
-    return Response(serializer.data)
+    return paginate(request, items, StockItemSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -246,12 +257,136 @@ def stockitem_delete(request, pk):
     item.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+@swagger_auto_schema(
+    method='get',
+    operation_description="Stock items of a business at or below their reorder level",
+    operation_summary="Get low-stock items",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(description="Low-stock items retrieved successfully", schema=StockItemSerializer(many=True)),
+        400: openapi.Response(description="Missing business")
+    }
+)
+@api_view(['GET'])
+def stockitem_low_stock(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    items = low_stock_items().filter(business_id=business_id)
+    return paginate(request, items, StockItemSerializer, ordering=('id',))
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Resolve a scanned SKU/barcode to its stock item. Served from an in-process cache, "
+                          "so it is meant for billing counters; closing stock is not included.",
+    operation_summary="Look up stock item by SKU/barcode",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('code', openapi.IN_QUERY, description="SKU or barcode", type=openapi.TYPE_STRING, required=True),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Stock item found",
+            examples={
+                "application/json": {
+                    "id": 1,
+                    "business_id": 1,
+                    "name": "Apple iPhone 14",
+                    "sku": "IP14-128-BLK",
+                    "unit": "pieces",
+                    "price_per_unit": "55000.00",
+                    "category": "Electronics"
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or code"),
+        404: openapi.Response(description="No item with this code")
+    }
+)
+@api_view(['GET'])
+def stockitem_lookup(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    code = request.query_params.get('code', '').strip()
+    if not code:
+        return Response({'code': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    item = lookup_by_code(business_id, code)
+    if item is None:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({**item, 'price_per_unit': str(item['price_per_unit'])})
+
+@swagger_auto_schema(
+    method='post',
+    operation_description="Create or update many stock items of one business from an uploaded CSV or XLSX file. "
+                          "The first row must be a header with the columns name, unit, price_per_unit and optionally "
+                          "opening_stock, category, notes, reorder_level, reorder_quantity and valuation_method. "
+                          "Items are matched by name; invalid rows are skipped and reported with their row number.",
+    operation_summary="Bulk import stock items",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_FORM, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('file', openapi.IN_FORM, description="CSV or XLSX file", type=openapi.TYPE_FILE, required=True),
+        openapi.Parameter('format', openapi.IN_FORM, description="File format (default: from the file extension)", type=openapi.TYPE_STRING, enum=list(IMPORT_FORMATS), required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="File processed",
+            examples={
+                "application/json": {
+                    "created": 240,
+                    "updated": 12,
+                    "failed": 1,
+                    "errors": [{"row": 17, "errors": {"price_per_unit": ["A valid number is required."]}}]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business, file or unsupported format, or a file that could not be "
+                                             "read to the end (rows before that point are imported and counted)"),
+        404: openapi.Response(description="Business not found")
+    }
+)
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def stockitem_import(request):
+    try:
+        business = Business.objects.get(pk=int(request.data['business']))
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    except Business.DoesNotExist:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'file': ['No file was submitted.']}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.data.get('format') or detect_format(upload.name)
+    if file_format not in IMPORT_FORMATS:
+        return Response({'format': [f'Upload a {" or ".join(IMPORT_FORMATS)} file.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        summary = import_stock_items(business, read_rows(upload, file_format))
+    except ImportError:
+        return Response({'format': ['XLSX import is not available on this server.']}, status=status.HTTP_400_BAD_REQUEST)
+    except UnreadableFile as exc:
+        # Rows before the unreadable point are already imported; say which.
+        return Response(
+            {'file': [f'Could not read the file from row {exc.row}: {exc}'], **exc.summary},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(summary)
+
 # StockTransaction APIs
 @swagger_auto_schema(
     method='get',
     operation_description="Retrieve a list of all stock transactions (in/out movements)",
     operation_summary="Get all stock transactions",
     tags=['Stock Transactions'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Stock transactions retrieved successfully",
@@ -279,8 +414,7 @@ def stockitem_delete(request, pk):
 @api_view(['GET'])
 def stocktransaction_list(request):
     txns = StockTransaction.objects.all()
-    serializer = StockTransactionSerializer(txns, many=True)
-    return Response(serializer.data)
+    return paginate(request, txns, StockTransactionSerializer, ordering=('-date', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -329,7 +463,7 @@ def stocktransaction_create(request):
 @api_view(['GET'])
 def stocktransaction_detail(request, pk):
     try:
-        txn = StockTransaction.objects.get(pk=pk)
+        txn = optimize_queryset(StockTransaction.objects.all(), StockTransactionSerializer).get(pk=pk)
     except StockTransaction.DoesNotExist:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     serializer = StockTransactionSerializer(txn)
@@ -355,3 +489,168 @@ def stocktransaction_delete(request, pk):
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     txn.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+# Valuation API
+def _money(value):
+    # SQLite drops the scale of summed decimals.
+    return str(Decimal(value or 0).quantize(CENTS))
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Stock valuation of one business from the maintained cost layers: cost value on hand per item "
+                          "(FIFO or weighted average, as set on the item) and cost of goods sold in an optional date range.",
+    operation_summary="Get stock valuation and cost of goods sold",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('date_from', openapi.IN_QUERY, description="First date for cost of goods sold (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('date_to', openapi.IN_QUERY, description="Last date for cost of goods sold (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(
+            description="Valuation retrieved successfully",
+            examples={
+                "application/json": {
+                    "next": None,
+                    "first": "http://localhost:8000/api/stock/valuation/?business=1",
+                    "totals": {"stock_value": "1250000.00", "cost_of_goods": "98000.00"},
+                    "results": [
+                        {
+                            "id": 1,
+                            "name": "Apple iPhone 14",
+                            "unit": "pieces",
+                            "valuation_method": "fifo",
+                            "closing_stock": "25.00",
+                            "stock_value": "1250000.00",
+                            "cost_of_goods": "98000.00"
+                        }
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid date")
+    }
+)
+@api_view(['GET'])
+def stock_valuation(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    sold = Q(stocktransaction__transaction_type='out')
+    for param, lookup in (('date_from', 'stocktransaction__date__gte'), ('date_to', 'stocktransaction__date__lte')):
+        if request.query_params.get(param):
+            try:
+                value = parse_date(request.query_params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                return Response({param: ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+            sold &= Q(**{lookup: value})
+
+    items = StockItem.objects.filter(business_id=business_id)
+    stock_value = items.aggregate(total=Sum('stock_value'))['total']
+    cost_of_goods = items.aggregate(total=Sum('stocktransaction__cost_of_goods', filter=sold))['total']
+
+    paginator = KeysetPagination(('id',))
+    page = paginator.paginate_queryset(
+        items.annotate(cost_of_goods=Sum('stocktransaction__cost_of_goods', filter=sold))
+        .only('id', 'name', 'unit', 'valuation_method', 'closing_stock', 'stock_value'),
+        request,
+    )
+    results = [
+        {
+            'id': item.id,
+            'name': item.name,
+            'unit': item.unit,
+            'valuation_method': item.valuation_method,
+            'closing_stock': str(item.closing_stock),
+            'stock_value': _money(item.stock_value),
+            'cost_of_goods': _money(item.cost_of_goods),
+        }
+        for item in page
+    ]
+    response = paginator.get_paginated_response(results)
+    response.data['totals'] = {
+        'stock_value': _money(stock_value),
+        'cost_of_goods': _money(cost_of_goods),
+    }
+    return response
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Quantity of every stock item of a business on hand at the end of a given date, "
+                          "served from monthly snapshots plus the movements since",
+    operation_summary="Get stock levels as of a date",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('date', openapi.IN_QUERY, description="Date (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=True),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(
+            description="Stock levels retrieved successfully",
+            examples={
+                "application/json": {
+                    "next": None,
+                    "first": "http://localhost:8000/api/stock/as-of/?business=1&date=2025-03-31",
+                    "date": "2025-03-31",
+                    "results": [{"id": 1, "name": "Apple iPhone 14", "unit": "pieces", "quantity": "18.00"}]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid date")
+    }
+)
+@api_view(['GET'])
+def stock_as_of(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = parse_date(request.query_params.get('date', ''))
+    except ValueError:
+        date = None
+    if date is None:
+        return Response({'date': ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = KeysetPagination(('id',))
+    page = paginator.paginate_queryset(
+        StockItem.objects.filter(business_id=business_id).only('id', 'name', 'unit'), request,
+    )
+    levels = StockSnapshot.objects.levels_as_of([item.pk for item in page], date)
+    results = [
+        {'id': item.id, 'name': item.name, 'unit': item.unit, 'quantity': str(levels[item.pk])}
+        for item in page
+    ]
+    response = paginator.get_paginated_response(results)
+    response.data['date'] = date.isoformat()
+    return response
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Stored consumption statistics of a business's stock items: 7/30/90-day stock-out totals, "
+                          "daily rate, days of cover, movement class and a reorder suggestion. "
+                          "Recomputed periodically by the compute_stock_velocity command.",
+    operation_summary="Get stock velocity and days of cover",
+    tags=['Stock Management'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('movement_class', openapi.IN_QUERY, description="Only items of this class", type=openapi.TYPE_STRING, enum=[value for value, _label in StockVelocity.MOVEMENT_CLASSES], required=False),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(description="Velocity retrieved successfully", schema=StockVelocitySerializer(many=True)),
+        400: openapi.Response(description="Missing business")
+    }
+)
+@api_view(['GET'])
+def stock_velocity(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    velocities = StockVelocity.objects.filter(business_id=business_id).select_related('stock_item')
+    if request.query_params.get('movement_class'):
+        velocities = velocities.filter(movement_class=request.query_params['movement_class'])
+    return paginate(request, velocities, StockVelocitySerializer, ordering=('id',))
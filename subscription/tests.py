@@ -1,3 +1,36 @@
+import datetime
+
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from .models import Coupon, Plan, Subscription
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_plan_list(self):
+        def create_rows(count):
+            Plan.objects.bulk_create(Plan(name='Pro', price=99, duration_months=1) for _ in range(count))
+
+        self.assertConstantQueries('/api/subscription/plan/', create_rows, 1)
+
+    def test_subscription_list(self):
+        plan = Plan.objects.create(name='Pro', price=99, duration_months=1)
+
+        def create_rows(count):
+            Subscription.objects.bulk_create(
+                Subscription(user=self.user, plan=plan, start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 2, 1))
+                for _ in range(count)
+            )
+
+        self.assertConstantQueries('/api/subscription/subscription/', create_rows, 1)
+
+    def test_coupon_list(self):
+        def create_rows(count):
+            start = Coupon.objects.count()
+            Coupon.objects.bulk_create(
+                Coupon(code=f'SAVE{start + index}', discount_percent=10,
+                       valid_from=datetime.date(2025, 1, 1), valid_to=datetime.date(2025, 12, 31))
+                for index in range(count)
+            )
+
+        self.assertConstantQueries('/api/subscription/coupon/', create_rows, 1)
@@ -6,6 +6,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import Plan, Subscription, Coupon
 from .serializers import PlanSerializer, SubscriptionSerializer, CouponSerializer
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
 
 # Plan APIs
 @swagger_auto_schema(
@@ -13,6 +14,7 @@ from .serializers import PlanSerializer, SubscriptionSerializer, CouponSerialize
     operation_description="Retrieve a list of all subscription plans",
     operation_summary="Get all subscription plans",
     tags=['Subscription Plans'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Subscription plans retrieved successfully",
@@ -42,8 +44,7 @@ from .serializers import PlanSerializer, SubscriptionSerializer, CouponSerialize
 @api_view(['GET'])
 def plan_list(request):
     plans = Plan.objects.all()
-    serializer = PlanSerializer(plans, many=True)
-    return Response(serializer.data)
+    return paginate(request, plans, PlanSerializer, ordering=('id',))
 
 @swagger_auto_schema(
     method='post',
@@ -122,8 +123,7 @@ def plan_delete(request, pk):
 @api_view(['GET'])
 def subscription_list(request):
     subs = Subscription.objects.all()
-    serializer = SubscriptionSerializer(subs, many=True)
-    return Response(serializer.data)
+    return paginate(request, subs, SubscriptionSerializer, ordering=('-created_at', '-id'))
 
 @api_view(['POST'])
 def subscription_create(request):
@@ -167,8 +167,7 @@ def subscription_delete(request, pk):
 @api_view(['GET'])
 def coupon_list(request):
     coupons = Coupon.objects.all()
-    serializer = CouponSerializer(coupons, many=True)
-    return Response(serializer.data)
+    return paginate(request, coupons, CouponSerializer, ordering=('id',))
 
 @api_view(['POST'])
 def coupon_create(request):
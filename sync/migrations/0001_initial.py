@@ -0,0 +1,27 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_id', models.BigIntegerField()),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business_id', 'deleted_at', 'id'], name='tombstone_sync_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """Records a deleted ledger row so delta sync clients can drop it locally."""
+    # Plain integer rather than a FK: tombstones are written while a business
+    # cascade is in progress and must not block or vanish with it.
+    business_id = models.BigIntegerField()
+    kind = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['business_id', 'deleted_at', 'id'], name='tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} deleted"
@@ -0,0 +1,22 @@
+from income_expense.models import Category, IncomeExpense
+from income_expense.serializers import CategorySerializer, IncomeExpenseSerializer
+from stock.models import StockItem, StockTransaction
+from stock.serializers import StockItemSerializer, StockTransactionSerializer
+from udhari.models import Customer, Udhari
+from udhari.serializers import CustomerSerializer, UdhariSerializer
+
+# kind -> (model, serializer, lookup from the row to its business id)
+SYNC_MODELS = {
+    'categories': (Category, CategorySerializer, 'business_id'),
+    'income_expense': (IncomeExpense, IncomeExpenseSerializer, 'business_id'),
+    'customers': (Customer, CustomerSerializer, 'business_id'),
+    'udhari': (Udhari, UdhariSerializer, 'customer__business_id'),
+    'stock_items': (StockItem, StockItemSerializer, 'business_id'),
+    'stock_transactions': (StockTransaction, StockTransactionSerializer, 'stock_item__business_id'),
+}
+
+
+def business_id_of(instance, lookup):
+    for attr in lookup.split('__')[:-1]:
+        instance = getattr(instance, attr)
+    return getattr(instance, lookup.split('__')[-1])
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete
+
+from .models import Tombstone
+from .registry import SYNC_MODELS, business_id_of
+
+
+def _tombstone_receiver(kind, lookup):
+    def record_tombstone(sender, instance, **kwargs):
+        Tombstone.objects.create(
+            business_id=business_id_of(instance, lookup), kind=kind, object_id=instance.pk
+        )
+    return record_tombstone
+
+
+for _kind, (_model, _serializer, _lookup) in SYNC_MODELS.items():
+    post_delete.connect(
+        _tombstone_receiver(_kind, _lookup), sender=_model, weak=False, dispatch_uid=f'sync_tombstone_{_kind}'
+    )
@@ -0,0 +1,101 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from dailyhisab.testing import APITestCaseMixin
+from income_expense.models import Category, IncomeExpense
+from stock.models import StockItem, StockTransaction
+from udhari.models import Customer, Udhari
+
+
+class SyncTestCase(APITestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        patcher = mock.patch.object(timezone, 'now', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def entry(self, amount='10.00', **fields):
+        return IncomeExpense.objects.create(
+            user=self.user, business=self.business, amount=Decimal(amount), type='income', date=datetime.date(2025, 1, 1),
+            **fields,
+        )
+
+    def sync(self, cursor=None, **params):
+        params = {'business': self.business.pk, **params}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+class SyncHorizonTests(SyncTestCase):
+    def test_recent_changes_wait_for_the_settle_window(self):
+        old = self.entry()
+        self.now += datetime.timedelta(seconds=30)
+        recent = self.entry()
+        recent_id = recent.pk
+        recent.delete()
+
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['changes']['income_expense']], [])
+        self.now += datetime.timedelta(seconds=31)
+        data = self.sync()
+        self.assertEqual([row['id'] for row in data['changes']['income_expense']], [old.pk])
+        self.assertEqual(data['deleted'], {})
+
+        self.now += datetime.timedelta(seconds=60)
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['changes']['income_expense'], [])
+        self.assertEqual(data['deleted'], {'income_expense': [recent_id]})
+
+    def test_late_commit_stamped_before_synced_rows_is_not_skipped(self):
+        stamped = self.now
+        self.now += datetime.timedelta(seconds=5)
+        visible = self.entry()
+        self.now += datetime.timedelta(seconds=25)
+        data = self.sync()
+        self.assertEqual(data['changes']['income_expense'], [])
+
+        # A row stamped before `visible` whose transaction only commits now.
+        late = self.entry()
+        IncomeExpense.objects.filter(pk=late.pk).update(updated_at=stamped)
+        self.now += datetime.timedelta(seconds=40)
+        data = self.sync(data['cursor'])
+        self.assertEqual([row['id'] for row in data['changes']['income_expense']], [late.pk, visible.pk])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/sync/', {'business': self.business.pk, 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SyncQueryTests(SyncTestCase):
+    def add_rows(self, count):
+        """`count` rows of every synced kind, plus as many deletes."""
+        category = Category.objects.create(name='Sales', type='income', business=self.business)
+        customer = Customer.objects.create(business=self.business, name='Ravi')
+        item = StockItem.objects.create(
+            business=self.business, name=f'Rice {StockItem.objects.count()}', unit='kg', opening_stock=0, price_per_unit=10,
+        )
+        for _ in range(count):
+            self.entry().delete()
+            self.entry(category=category)
+            Udhari.objects.create(customer=customer, amount=Decimal('5.00'), given=True, date=datetime.date(2025, 1, 1))
+            StockTransaction.objects.create(stock_item=item, transaction_type='in', quantity=1, date=datetime.date(2025, 1, 1))
+        self.now += datetime.timedelta(minutes=5)
+
+    def test_constant_queries(self):
+        # One page query per synced kind plus one for tombstones.
+        for count in (1, 5):
+            self.add_rows(count)
+            with self.assertNumQueries(7):
+                data = self.sync(limit=50)
+            self.assertEqual(len(data['changes']['udhari']), 1 if count == 1 else 6)
+            self.assertEqual(data['changes']['udhari'][0]['customer']['name'], 'Ravi')
+            self.assertEqual(data['changes']['income_expense'][0]['category']['name'], 'Sales')
+            self.assertEqual(data['changes']['stock_transactions'][0]['stock_item']['unit'], 'kg')
@@ -0,0 +1,144 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from dailyhisab.pagination import KeysetPagination
+from dailyhisab.prefetch import optimize_queryset
+from .models import Tombstone
+from .registry import SYNC_MODELS
+
+SYNC_DEFAULT_LIMIT = 200
+SYNC_MAX_LIMIT = 1000
+DELETED_KEY = 'deleted'
+
+
+def _decode_sync_cursor(encoded):
+    if not encoded:
+        return {}
+    raw = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+    if not isinstance(raw, dict):
+        raise ValueError
+    positions = {}
+    for kind, (timestamp, pk) in raw.items():
+        if kind != DELETED_KEY and kind not in SYNC_MODELS:
+            raise ValueError
+        moment = parse_datetime(timestamp)
+        if moment is None:
+            raise ValueError
+        positions[kind] = (moment, int(pk))
+    return positions
+
+
+def _encode_sync_cursor(positions):
+    raw = {kind: [moment.isoformat(), pk] for kind, (moment, pk) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def _after(queryset, ordering, position, horizon):
+    """
+    Rows after `position` in `ordering`, stamped before `horizon`.
+
+    updated_at is stamped when a row is saved, not when its transaction
+    commits, so a row can become visible after a later-stamped one was
+    already synced. Serving only rows older than the horizon (server time
+    minus SYNC_SETTLE_SECONDS) means every write committed by then is
+    already visible, and the cursor never moves past a pending one.
+    """
+    ordered = queryset.filter(**{f'{ordering[0]}__lt': horizon}).order_by(*ordering)
+    if position is None:
+        return ordered
+    return ordered.filter(KeysetPagination(ordering).keyset_filter(position))
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Return ledger rows created, updated or deleted since the given cursor for one business. "
+                          "Omit the cursor for an initial full download, then keep passing back the returned cursor. "
+                          "While `has_more` is true, call again immediately with the new cursor. "
+                          f"Changes are served once they are {settings.SYNC_SETTLE_SECONDS} seconds old, so a write "
+                          "that was still committing when an earlier sync ran is never skipped.",
+    operation_summary="Delta sync of ledger data",
+    tags=['Sync'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor returned by the previous sync call", type=openapi.TYPE_STRING, required=False),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Maximum rows per kind (default {SYNC_DEFAULT_LIMIT}, max {SYNC_MAX_LIMIT})", type=openapi.TYPE_INTEGER, required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Changes since the cursor",
+            examples={
+                "application/json": {
+                    "cursor": "eyJpbmNvbWVfZXhwZW5zZSI6WyIyMDI1LTAxLTE1VDEwOjAwOjAwKzA1OjMwIiwxMF19",
+                    "has_more": False,
+                    "server_time": "2025-01-15T10:00:05+05:30",
+                    "changes": {
+                        "categories": [],
+                        "income_expense": [{"id": 10, "amount": "500.00", "type": "expense", "updated_at": "2025-01-15T10:00:00+05:30"}],
+                        "customers": [],
+                        "udhari": [],
+                        "stock_items": [],
+                        "stock_transactions": []
+                    },
+                    "deleted": {"income_expense": [7]}
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid cursor")
+    }
+)
+@api_view(['GET'])
+def sync_changes(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        positions = _decode_sync_cursor(request.query_params.get('cursor'))
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return Response({'cursor': ['Invalid cursor.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', SYNC_DEFAULT_LIMIT)), 1), SYNC_MAX_LIMIT)
+    except ValueError:
+        limit = SYNC_DEFAULT_LIMIT
+
+    server_time = timezone.now()
+    horizon = server_time - datetime.timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    has_more = False
+    changes = {}
+    for kind, (model, serializer_class, lookup) in SYNC_MODELS.items():
+        queryset = optimize_queryset(model.objects.filter(**{lookup: business_id}), serializer_class)
+        rows = list(_after(queryset, ('updated_at', 'id'), positions.get(kind), horizon)[:limit + 1])
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            positions[kind] = (rows[-1].updated_at, rows[-1].pk)
+        changes[kind] = serializer_class(rows, many=True).data
+
+    tombstones = Tombstone.objects.filter(business_id=business_id)
+    tombstones = list(_after(tombstones, ('deleted_at', 'id'), positions.get(DELETED_KEY), horizon)[:limit + 1])
+    if len(tombstones) > limit:
+        has_more = True
+        tombstones = tombstones[:limit]
+    if tombstones:
+        positions[DELETED_KEY] = (tombstones[-1].deleted_at, tombstones[-1].pk)
+    deleted = {}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone.kind, []).append(tombstone.object_id)
+
+    return Response({
+        'cursor': _encode_sync_cursor(positions),
+        'has_more': has_more,
+        'server_time': server_time,
+        'changes': changes,
+        'deleted': deleted,
+    })
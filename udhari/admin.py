@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Customer, Udhari
+from .models import Customer, Udhari, UdhariSettlement
 # Register your models here.
 admin.site.register(Customer)
 admin.site.register(Udhari)
+admin.site.register(UdhariSettlement)
@@ -0,0 +1,78 @@
+"""
+Receivables aging: credit given and not yet repaid, bucketed by how overdue it is.
+
+An entry's age counts from its due_date, or from its date when it has no
+due date; entries not yet due fall in the first bucket. Bucket boundaries
+are turned into plain date cutoffs, so the whole report is one grouped
+query with conditional sums and needs no date arithmetic in SQL. Only the
+unsettled part of an entry (amount - settled_amount) counts.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Customer, Udhari
+
+UDHARI_CACHE_NAMESPACE = 'udhari'
+CENTS = Decimal('0.01')
+# (name, minimum age in days, maximum age in days or None)
+AGING_BUCKETS = (
+    ('days_0_30', None, 30),
+    ('days_31_60', 31, 60),
+    ('days_61_90', 61, 90),
+    ('days_90_plus', 91, None),
+)
+
+
+def _reference_date(prefix, lookup, value):
+    # Coalesce(due_date, date) <lookup> value, written so indexes on either column stay usable.
+    return (
+        Q(**{f'{prefix}due_date__{lookup}': value})
+        | Q(**{f'{prefix}due_date__isnull': True, f'{prefix}date__{lookup}': value})
+    )
+
+
+def _bucket_filters(as_of, prefix=''):
+    receivable = Q(**{f'{prefix}status': 'unpaid', f'{prefix}given': True})
+    filters = {}
+    for name, min_age, max_age in AGING_BUCKETS:
+        condition = receivable
+        if min_age is not None:
+            condition &= _reference_date(prefix, 'lte', as_of - datetime.timedelta(days=min_age))
+        if max_age is not None:
+            condition &= _reference_date(prefix, 'gte', as_of - datetime.timedelta(days=max_age))
+        filters[name] = condition
+    return receivable, filters
+
+
+def _sum(prefix, condition):
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    remaining = F(f'{prefix}amount') - F(f'{prefix}settled_amount')
+    return Coalesce(Sum(remaining, filter=condition), zero)
+
+
+def aged_customers(business_id, as_of):
+    """Customers of a business with unpaid credit, annotated with one total per aging bucket."""
+    receivable, filters = _bucket_filters(as_of, prefix='udhari__')
+    return (
+        Customer.objects.filter(business_id=business_id)
+        .annotate(**{name: _sum('udhari__', condition) for name, condition in filters.items()})
+        .annotate(total=_sum('udhari__', receivable))
+        .filter(total__gt=0)
+    )
+
+
+def aging_totals(business_id, as_of):
+    """The same buckets summed over the whole business."""
+    receivable, filters = _bucket_filters(as_of)
+    return Udhari.objects.filter(customer__business_id=business_id).aggregate(
+        **{name: _sum('', condition) for name, condition in filters.items()},
+        total=_sum('', receivable),
+    )
+
+
+def money(value):
+    # SQLite drops the scale of summed decimals.
+    return str(Decimal(value).quantize(CENTS))
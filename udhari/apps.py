@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UdhariConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'udhari'
+
+    def ready(self):
+        from . import signals  # noqa: F401
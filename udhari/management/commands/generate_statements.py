@@ -0,0 +1,50 @@
+import datetime
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from udhari.models import Customer
+from udhari.statements import STATEMENT_FORMATS, statement_period, submit_statement
+
+
+class Command(BaseCommand):
+    help = "Render the month's statements for every customer with activity or a balance, ahead of sending them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Statement month as YYYY-MM (default: last month)")
+        parser.add_argument('--business', type=int, help="Only customers of this business ID")
+        parser.add_argument('--format', choices=STATEMENT_FORMATS, default='pdf')
+        parser.add_argument('--batch-size', type=int, default=200, help="Statements queued at a time")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month = datetime.datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must look like YYYY-MM")
+        else:
+            month = (timezone.localdate().replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+        start, end = statement_period(month)
+
+        customers = (
+            Customer.objects.filter(Q(udhari__date__range=(start, end)) | ~Q(outstanding_balance=0))
+            .distinct().order_by('pk')
+        )
+        if options['business']:
+            customers = customers.filter(business_id=options['business'])
+
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(customers.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            done, _pending = wait([submit_statement(customer, month, options['format']) for customer in batch])
+            for future in done:
+                future.result()
+            rendered += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} statements for {month:%Y-%m}."))
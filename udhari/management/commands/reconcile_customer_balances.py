@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from dailyhisab.caching import bump_version_on_commit
+from udhari.aging import UDHARI_CACHE_NAMESPACE
+from udhari.models import Customer, Udhari
+
+
+class Command(BaseCommand):
+    help = "Verify Customer.outstanding_balance and last_transaction_date against Udhari rows and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only reconcile customers of this business ID")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report mismatches without fixing them")
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.order_by('pk')
+        if options['business']:
+            customers = customers.filter(business_id=options['business'])
+
+        checked = mismatched = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Lock the batch so Udhari writes committed meanwhile land on top of the repaired values.
+                batch = list(
+                    customers.filter(pk__gt=last_pk).select_for_update()
+                    .values_list('pk', 'outstanding_balance', 'last_transaction_date', 'business_id')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                totals = (
+                    Udhari.objects.filter(customer_id__in=[pk for pk, _balance, _date, _business in batch])
+                    .order_by()
+                    .values('customer_id')
+                    .annotate(
+                        given_total=Sum(F('amount') - F('settled_amount'), filter=Q(status='unpaid', given=True)),
+                        received_total=Sum(F('amount') - F('settled_amount'), filter=Q(status='unpaid', given=False)),
+                        latest=Max('date'),
+                    )
+                    .values_list('customer_id', 'given_total', 'received_total', 'latest')
+                )
+                expected = {
+                    pk: ((given or Decimal('0')) - (received or Decimal('0')), latest)
+                    for pk, given, received, latest in totals
+                }
+                repaired = set()
+                for pk, balance, last_date, business_id in batch:
+                    checked += 1
+                    correct_balance, correct_date = expected.get(pk, (Decimal('0'), None))
+                    if balance != correct_balance or last_date != correct_date:
+                        mismatched += 1
+                        self.stdout.write(
+                            f"Customer {pk}: outstanding {balance} / last {last_date} "
+                            f"should be {correct_balance} / {correct_date}"
+                        )
+                        if not options['dry_run']:
+                            Customer.objects.filter(pk=pk).update(
+                                outstanding_balance=correct_balance,
+                                last_transaction_date=correct_date,
+                                updated_at=timezone.now(),
+                            )
+                            repaired.add(business_id)
+                # .update() skips the signals, so cached aging and summaries are dropped here.
+                for business_id in repaired:
+                    bump_version_on_commit(UDHARI_CACHE_NAMESPACE, business_id)
+
+        action = "found" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} customers, {action} {mismatched} mismatches."))
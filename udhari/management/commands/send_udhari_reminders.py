@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from udhari.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Notify business owners about unpaid udhari whose due date has passed and that asked for a reminder."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Customers per batch")
+
+    def handle(self, *args, **options):
+        sent = send_due_reminders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} udhari reminders."))
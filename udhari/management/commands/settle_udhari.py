@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dailyhisab.caching import bump_version_on_commit
+from udhari.aging import UDHARI_CACHE_NAMESPACE
+from udhari.models import Customer
+from udhari.settlement import settle_customers
+
+
+class Command(BaseCommand):
+    help = "Allocate open udhari repayments to open credits, oldest first, for every customer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, help="Only settle customers of this business ID")
+        parser.add_argument('--batch-size', type=int, default=500, help="Customers per batch")
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.order_by('pk')
+        if options['business']:
+            customers = customers.filter(business_id=options['business'])
+
+        allocated = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(customers.filter(pk__gt=last_pk).values_list('pk', 'business_id')[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                Customer.objects.lock([pk for pk, _business in batch])
+                made = settle_customers([pk for pk, _business in batch])
+                if made:
+                    for business_id in {business for _pk, business in batch}:
+                        bump_version_on_commit(UDHARI_CACHE_NAMESPACE, business_id)
+                allocated += made
+
+        self.stdout.write(self.style.SUCCESS(f"Made {allocated} udhari settlements."))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-created_at', '-id'], name='customer_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='udhari',
+            index=models.Index(fields=['-date', '-id'], name='udhari_date_id_idx'),
+        ),
+    ]
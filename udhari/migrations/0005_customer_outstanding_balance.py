@@ -0,0 +1,61 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:34
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Max, Q, Sum
+
+
+def backfill_balances(apps, schema_editor):
+    # Unpaid credits minus unpaid repayments, and the latest entry date, per customer.
+    Customer = apps.get_model('udhari', 'Customer')
+    Udhari = apps.get_model('udhari', 'Udhari')
+    totals = (
+        Udhari.objects.order_by().values('customer_id')
+        .annotate(
+            given_total=Sum('amount', filter=Q(status='unpaid', given=True)),
+            received_total=Sum('amount', filter=Q(status='unpaid', given=False)),
+            latest=Max('date'),
+        )
+        .values_list('customer_id', 'given_total', 'received_total', 'latest')
+    )
+    batch = []
+    for customer_id, given, received, latest in totals.iterator(chunk_size=2000):
+        batch.append(Customer(
+            pk=customer_id,
+            outstanding_balance=(given or Decimal('0')) - (received or Decimal('0')),
+            last_transaction_date=latest,
+        ))
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ['outstanding_balance', 'last_transaction_date'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['outstanding_balance', 'last_transaction_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0004_customer_updated_at_udhari_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='last_transaction_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='outstanding_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['business', '-outstanding_balance', '-id'], name='customer_outstanding_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='udhari',
+            index=models.Index(fields=['customer', 'date'], name='udhari_customer_date_idx'),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
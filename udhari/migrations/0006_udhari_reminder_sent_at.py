@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0005_customer_outstanding_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='udhari',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='udhari',
+            index=models.Index(condition=models.Q(('reminder_sent_at__isnull', True)), fields=['status', 'reminder', 'due_date'], name='udhari_reminder_due_idx'),
+        ),
+    ]
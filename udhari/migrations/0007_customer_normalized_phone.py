@@ -0,0 +1,47 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:38
+
+from django.db import migrations, models
+
+from udhari.normalize import name_key, normalize_phone
+
+
+def normalize_customers(apps, schema_editor):
+    Customer = apps.get_model('udhari', 'Customer')
+    batch = []
+    for customer in Customer.objects.only('id', 'name', 'phone').iterator(chunk_size=2000):
+        customer.normalized_phone = normalize_phone(customer.phone)
+        customer.name_key = name_key(customer.name)
+        batch.append(customer)
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ['normalized_phone', 'name_key'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['normalized_phone', 'name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0006_udhari_reminder_sent_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='normalized_phone',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['business', 'normalized_phone'], name='customer_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['business', 'name_key'], name='customer_name_key_idx'),
+        ),
+        migrations.RunPython(normalize_customers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0007_customer_normalized_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UdhariSettlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='udhari',
+            name='settled_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='udhari',
+            index=models.Index(condition=models.Q(('status', 'unpaid')), fields=['customer', 'date', 'id'], name='udhari_open_idx'),
+        ),
+        migrations.AddField(
+            model_name='udharisettlement',
+            name='credit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settlements', to='udhari.udhari'),
+        ),
+        migrations.AddField(
+            model_name='udharisettlement',
+            name='repayment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='udhari.udhari'),
+        ),
+    ]
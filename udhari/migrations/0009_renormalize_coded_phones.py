@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from udhari.normalize import normalize_phone
+
+
+def renormalize_phones(apps, schema_editor):
+    # Numbers typed with the country code but no "+" were stored with it twice.
+    Customer = apps.get_model('udhari', 'Customer')
+    batch = []
+    customers = Customer.objects.exclude(phone__isnull=True).exclude(phone='').only('id', 'phone', 'normalized_phone')
+    for customer in customers.iterator(chunk_size=2000):
+        normalized = normalize_phone(customer.phone)
+        if normalized != customer.normalized_phone:
+            customer.normalized_phone = normalized
+            batch.append(customer)
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ['normalized_phone'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['normalized_phone'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('udhari', '0008_udharisettlement'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_phones, migrations.RunPython.noop),
+    ]
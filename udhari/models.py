@@ -1,13 +1,85 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
 
 
 from users.models import User, Business
 
+from .normalize import name_key, normalize_phone
+
+
+class CustomerQuerySet(models.QuerySet):
+    def lock(self, ids):
+        """Lock the given customers in id order, the order every udhari writer takes them in."""
+        list(self.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+
+    def adjust(self, deltas):
+        """
+        Add {customer_id: amount} to outstanding_balance and refresh last_transaction_date.
+
+        Rows are locked in id order first so concurrent writes touching
+        several customers cannot deadlock; the balance moves by an F()
+        increment and the date is re-read from the customer's latest Udhari,
+        so no read-modify-write window exists. A zero delta still refreshes
+        the date (e.g. when an entry was only re-dated).
+        """
+        ids = sorted(deltas)
+        if not ids:
+            return
+        latest = Udhari.objects.filter(customer=OuterRef('pk')).order_by('-date').values('date')[:1]
+        with transaction.atomic():
+            self.lock(ids)
+            now = timezone.now()
+            for pk in ids:
+                self.filter(pk=pk).update(
+                    outstanding_balance=F('outstanding_balance') + deltas[pk],
+                    last_transaction_date=Subquery(latest),
+                    updated_at=now,
+                )
+
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15, blank=True, null=True)
+    # Derived on save for lookups: phone in E.164 and the name in lower case.
+    normalized_phone = models.CharField(max_length=16, blank=True, null=True, editable=False)
+    name_key = models.CharField(max_length=100, blank=True, default='', editable=False)
     business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    # Maintained from unpaid Udhari rows (given minus received); see CustomerQuerySet.adjust.
+    outstanding_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_transaction_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CustomerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='customer_created_id_idx'),
+            models.Index(fields=['business', 'updated_at', 'id'], name='customer_sync_idx'),
+            models.Index(fields=['business', '-outstanding_balance', '-id'], name='customer_outstanding_idx'),
+            models.Index(fields=['business', 'normalized_phone'], name='customer_phone_idx'),
+            models.Index(fields=['business', 'name_key'], name='customer_name_key_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_phone = normalize_phone(self.phone)
+        self.name_key = name_key(self.name)
+        if kwargs.get('update_fields') is not None:
+            update_fields = set(kwargs['update_fields'])
+            if 'phone' in update_fields:
+                update_fields.add('normalized_phone')
+            if 'name' in update_fields:
+                update_fields.add('name_key')
+            kwargs['update_fields'] = update_fields
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back possibly stale maintained columns over concurrent Udhari writes.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('outstanding_balance', 'last_transaction_date')
+            ]
+        super().save(*args, **kwargs)
 
 class Udhari(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
@@ -18,4 +90,91 @@ class Udhari(models.Model):
     status = models.CharField(max_length=10, choices=[('paid', 'Paid'), ('unpaid', 'Unpaid')], default='unpaid')
     notes = models.TextField(blank=True, null=True)
     reminder = models.BooleanField(default=False)
+    # Set once a due-date reminder went out; cleared when the due date changes. See udhari.reminders.
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
+    # Part of the amount matched against entries of the other direction; maintained by udhari.settlement.
+    settled_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='udhari_date_id_idx'),
+            models.Index(fields=['customer', 'date'], name='udhari_customer_date_idx'),
+            # Only entries still waiting for a reminder are indexed.
+            models.Index(
+                fields=['status', 'reminder', 'due_date'],
+                name='udhari_reminder_due_idx',
+                condition=Q(reminder_sent_at__isnull=True),
+            ),
+            # Entries settlement can still allocate, oldest first per customer.
+            models.Index(
+                fields=['customer', 'date', 'id'],
+                name='udhari_open_idx',
+                condition=Q(status='unpaid'),
+            ),
+        ]
+
+    @property
+    def remaining(self):
+        """Part of the amount not yet settled against the other direction."""
+        return Decimal(self.amount) - Decimal(self.settled_amount)
+
+    @property
+    def outstanding(self):
+        """Signed effect on the customer's outstanding_balance."""
+        if self.status != 'unpaid':
+            return Decimal('0')
+        return self.remaining if self.given else -self.remaining
+
+    def reallocates(self, previous):
+        """Whether this change invalidates the settlements `previous` (the stored row) took part in."""
+        return (
+            self.customer_id != previous.customer_id
+            or self.given != previous.given
+            or Decimal(self.amount) != previous.amount
+            or self.date != previous.date
+            or (previous.status == 'paid' and self.status == 'unpaid')
+        )
+
+    def save(self, *args, **kwargs):
+        from .settlement import settle_customers, unwind_settlements
+
+        # Deletes are reversed by the pre/post_delete signals so cascades are covered too.
+        with transaction.atomic():
+            previous = None
+            customer_ids = {self.customer_id}
+            if self.pk is not None:
+                customer_ids.update(Udhari.objects.filter(pk=self.pk).values_list('customer_id', flat=True))
+            Customer.objects.lock(customer_ids)
+            if self.pk is not None:
+                previous = Udhari.objects.select_for_update().filter(pk=self.pk).first()
+            if previous is not None:
+                if previous.due_date != self.due_date:
+                    self.reminder_sent_at = None
+                if self.reallocates(previous):
+                    stored_status = previous.status
+                    unwind_settlements(previous)
+                    if self.status == stored_status:
+                        self.status = previous.status
+                self.settled_amount = previous.settled_amount
+            else:
+                self.settled_amount = Decimal('0')
+            super().save(*args, **kwargs)
+            deltas = {self.customer_id: self.outstanding}
+            if previous is not None:
+                deltas[previous.customer_id] = deltas.get(previous.customer_id, 0) - previous.outstanding
+            Customer.objects.adjust(deltas)
+            if settle_customers(deltas):
+                self.refresh_from_db(fields=['settled_amount', 'status', 'updated_at'])
+            if Udhari.customer.is_cached(self):
+                self.customer.refresh_from_db(fields=['outstanding_balance', 'last_transaction_date', 'updated_at'])
+
+class UdhariSettlement(models.Model):
+    """Part of a repayment (given=False) allocated to a credit (given=True) of the same customer."""
+    credit = models.ForeignKey(Udhari, on_delete=models.CASCADE, related_name='settlements')
+    repayment = models.ForeignKey(Udhari, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    # The later of the two entries' dates: when this part of the credit was cleared.
+    date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
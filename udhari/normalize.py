@@ -0,0 +1,75 @@
+"""
+Normalized forms of customer fields used for lookups.
+
+Phone numbers are stored in E.164 ("+<country code><number>"). Numbers are normalized with a few plain rules rather than a full numbering
+plan: punctuation is dropped, an international "00" prefix becomes "+", and
+numbers without a country code get DEFAULT_PHONE_COUNTRY_CODE after losing a
+trunk "0". A number that starts with that code and is too long to be a
+national number ("919876543210", "91 98765 43210") already carries it. That
+covers how shopkeepers actually type Indian mobile numbers.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import Q
+
+E164_MAX_DIGITS = 15
+E164_MIN_DIGITS = 8
+
+
+def _digits(value):
+    return re.sub(r'\D', '', value)
+
+
+def _add_country_code(digits):
+    code = settings.DEFAULT_PHONE_COUNTRY_CODE
+    if digits.startswith(code) and len(digits) > settings.DEFAULT_PHONE_NATIONAL_DIGITS:
+        return digits
+    return code + digits.lstrip('0')
+
+
+def normalize_phone(phone):
+    """Return `phone` in E.164 form, or None when it cannot be a phone number."""
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = _digits(phone)
+    if phone.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    else:
+        digits = _add_country_code(digits)
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return '+' + digits
+
+
+def normalize_phone_prefix(prefix):
+    """
+    Normalize the start of a phone number typed into a search box the same
+    way, so that it is a prefix of the stored E.164 values it should match.
+    """
+    prefix = prefix.strip()
+    digits = _digits(prefix)
+    if not digits:
+        return None
+    if prefix.startswith('+'):
+        return '+' + digits
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    return '+' + _add_country_code(digits)
+
+
+def name_key(name):
+    """Lower-cased, whitespace-collapsed form of a customer name for prefix search."""
+    return ' '.join((name or '').split()).lower()
+
+
+def prefix_filter(field, prefix):
+    """
+    `field` starts with `prefix`, written as a range so a plain btree index
+    on the column serves it under any collation; startswith re-checks.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper, f'{field}__startswith': prefix})
@@ -0,0 +1,77 @@
+"""
+Due-date reminders for udhari.
+
+`send_due_reminders` is meant to run nightly (the `send_udhari_reminders`
+management command). It finds unpaid, reminder-enabled entries that are due
+and not yet reminded, sums what is left of them per customer, and for each
+batch of customers writes one Notification per customer to the business
+owner with bulk_create and marks the entries in the same transaction, so a
+rerun or a crash half-way never sends a reminder twice.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.utils import timezone
+
+from notifications.models import Notification
+
+from .models import Udhari
+
+
+def pending_reminders(today, started_at):
+    """Entries due a reminder; entries changed after `started_at` wait for the next run."""
+    return Udhari.objects.filter(
+        status='unpaid', reminder=True, due_date__lte=today,
+        reminder_sent_at__isnull=True, updated_at__lte=started_at,
+    )
+
+
+def reminder_message(group):
+    parts = []
+    if group['to_collect']:
+        parts.append(f"collect {group['to_collect']:.2f}")
+    if group['to_pay']:
+        parts.append(f"pay {group['to_pay']:.2f}")
+    entries = 'entry' if group['entries'] == 1 else 'entries'
+    return (
+        f"{group['entries']} udhari {entries} with {group['customer__name']} "
+        f"due since {group['oldest_due']}: {' and '.join(parts)}."
+    )
+
+
+def send_due_reminders(batch_size=500, today=None):
+    """Send reminders for every business in customer batches; returns the number of notifications."""
+    today = today or timezone.localdate()
+    started_at = timezone.now()
+    pending = pending_reminders(today, started_at)
+    groups = (
+        pending.order_by('customer_id')
+        .values('customer_id', 'customer__name', 'customer__business_id', 'customer__business__owner_id')
+        .annotate(
+            entries=Count('id'),
+            to_collect=Sum(F('amount') - F('settled_amount'), filter=Q(given=True), default=Decimal('0')),
+            to_pay=Sum(F('amount') - F('settled_amount'), filter=Q(given=False), default=Decimal('0')),
+            oldest_due=Min('due_date'),
+        )
+    )
+    sent = 0
+    last_customer = 0
+    while True:
+        batch = list(groups.filter(customer_id__gt=last_customer)[:batch_size])
+        if not batch:
+            break
+        last_customer = batch[-1]['customer_id']
+        with transaction.atomic():
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=group['customer__business__owner_id'],
+                    business_id=group['customer__business_id'],
+                    title=f"Udhari due: {group['customer__name']}"[:100],
+                    message=reminder_message(group),
+                )
+                for group in batch
+            ])
+            pending.filter(customer_id__in=[group['customer_id'] for group in batch]).update(reminder_sent_at=started_at)
+        sent += len(batch)
+    return sent
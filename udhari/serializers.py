@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import Customer, Udhari
+from .models import Customer, Udhari, UdhariSettlement
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['name_key']
+        read_only_fields = ['outstanding_balance', 'last_transaction_date']
 
 class UdhariSerializer(serializers.ModelSerializer):
     customer = CustomerSerializer(read_only=True)
@@ -14,6 +15,12 @@ class UdhariSerializer(serializers.ModelSerializer):
     class Meta:
         model = Udhari
         fields = [
-            'id', 'customer', 'customer_id', 'amount', 'given', 'date', 'due_date', 'status', 'notes', 'reminder', 'created_at'
+            'id', 'customer', 'customer_id', 'amount', 'given', 'date', 'due_date', 'status', 'notes', 'reminder',
+            'settled_amount', 'reminder_sent_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'settled_amount', 'reminder_sent_at', 'created_at', 'updated_at']
+
+class UdhariSettlementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UdhariSettlement
+        fields = ['id', 'credit', 'repayment', 'amount', 'date', 'created_at']
@@ -0,0 +1,116 @@
+"""
+FIFO settlement of udhari.
+
+Repayments (given=False) are allocated to the same customer's credits
+(given=True), oldest first on both sides. Each allocation is stored as an
+UdhariSettlement, and both entries carry the total allocated so far in
+settled_amount. An entry is marked paid once it is fully allocated, so
+what is still owed on a bill is `amount - settled_amount`. No history
+has to be replayed to find it.
+
+Allocations are events. A back-dated credit does not take repayments away
+from credits they already cleared. Only editing or deleting an entry
+releases the allocations that entry took part in, and its counterparts are
+then allocated again. An entry marked paid by hand before it was fully
+allocated counts as written off, and settlement leaves it alone.
+
+Allocation moves the same amount off a credit and off a repayment, so it
+never changes a customer's outstanding_balance. Every writer locks the
+customer row first, and that lock serializes settlement per customer.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Customer, Udhari, UdhariSettlement
+
+
+def _release(entry, amount, now):
+    """Take `amount` off entry.settled_amount, reopening it if settlement had paid it; returns the balance delta."""
+    before = entry.outstanding
+    if entry.status == 'paid' and entry.settled_amount >= entry.amount:
+        entry.status = 'unpaid'
+    entry.settled_amount -= amount
+    entry.updated_at = now
+    return entry.outstanding - before
+
+
+def unwind_settlements(entry):
+    """
+    Undo every allocation `entry` (a freshly locked stored row) takes part in.
+
+    Entries reopened this way get their status back and their customer's
+    balance is corrected. `entry` is updated in place. The caller holds the
+    customer lock.
+    """
+    allocations = list(
+        UdhariSettlement.objects.filter(Q(credit=entry) | Q(repayment=entry))
+        .values_list('pk', 'credit_id', 'repayment_id', 'amount')
+    )
+    if not allocations:
+        return
+    freed = defaultdict(Decimal)
+    for _pk, credit_id, repayment_id, amount in allocations:
+        freed[repayment_id if credit_id == entry.pk else credit_id] += amount
+    counterparts = list(Udhari.objects.filter(pk__in=freed).order_by('pk'))
+    now = timezone.now()
+    delta = _release(entry, sum(freed.values(), Decimal('0')), now)
+    for counterpart in counterparts:
+        delta += _release(counterpart, freed[counterpart.pk], now)
+    Udhari.objects.bulk_update(counterparts + [entry], ['settled_amount', 'status', 'updated_at'])
+    UdhariSettlement.objects.filter(pk__in=[pk for pk, _credit, _repayment, _amount in allocations]).delete()
+    Customer.objects.adjust({entry.customer_id: delta})
+
+
+def _allocate(credits, repayments, now):
+    allocations, changed = [], {}
+    credits, repayments = iter(credits), iter(repayments)
+    credit, repayment = next(credits, None), next(repayments, None)
+    while credit is not None and repayment is not None:
+        amount = min(credit.remaining, repayment.remaining)
+        allocations.append(UdhariSettlement(
+            credit=credit, repayment=repayment, amount=amount, date=max(credit.date, repayment.date),
+        ))
+        for entry in (credit, repayment):
+            entry.settled_amount += amount
+            entry.updated_at = now
+            if entry.remaining <= 0:
+                entry.status = 'paid'
+            changed[entry.pk] = entry
+        if credit.status == 'paid':
+            credit = next(credits, None)
+        if repayment.status == 'paid':
+            repayment = next(repayments, None)
+    return allocations, list(changed.values())
+
+
+def settle_customers(customer_ids):
+    """
+    Allocate the open repayments of each customer to their open credits.
+
+    Everything is written with one bulk_create and one bulk_update.
+    Returns the number of allocations made. The caller holds the customer
+    locks.
+    """
+    open_entries = (
+        Udhari.objects.filter(customer_id__in=customer_ids, status='unpaid', settled_amount__lt=F('amount'))
+        .order_by('customer_id', 'date', 'id')
+    )
+    by_customer = defaultdict(lambda: ([], []))
+    for entry in open_entries:
+        credits, repayments = by_customer[entry.customer_id]
+        (credits if entry.given else repayments).append(entry)
+
+    now = timezone.now()
+    allocations, changed = [], []
+    for credits, repayments in by_customer.values():
+        if credits and repayments:
+            customer_allocations, customer_changed = _allocate(credits, repayments, now)
+            allocations.extend(customer_allocations)
+            changed.extend(customer_changed)
+    if allocations:
+        UdhariSettlement.objects.bulk_create(allocations)
+        Udhari.objects.bulk_update(changed, ['settled_amount', 'status', 'updated_at'])
+    return len(allocations)
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from dailyhisab.caching import bump_version_on_commit
+
+from .aging import UDHARI_CACHE_NAMESPACE
+from .models import Customer, Udhari
+from .settlement import settle_customers, unwind_settlements
+
+
+@receiver(pre_delete, sender=Udhari)
+def release_settlements(sender, instance, **kwargs):
+    # Reopen whatever this entry had settled before its allocations cascade away.
+    Customer.objects.lock([instance.customer_id])
+    stored = Udhari.objects.filter(pk=instance.pk).first()
+    if stored is None:
+        return
+    unwind_settlements(stored)
+    instance.settled_amount, instance.status = stored.settled_amount, stored.status
+
+
+@receiver(post_delete, sender=Udhari)
+def reverse_outstanding(sender, instance, **kwargs):
+    Customer.objects.adjust({instance.customer_id: -instance.outstanding})
+    # Whatever the entry had settled is open again; allocate it elsewhere.
+    settle_customers([instance.customer_id])
+
+
+def _business_of(udhari):
+    if Udhari.customer.is_cached(udhari):
+        return udhari.customer.business_id
+    return Customer.objects.filter(pk=udhari.customer_id).values_list('business_id', flat=True).first()
+
+
+@receiver(post_save, sender=Udhari)
+@receiver(post_delete, sender=Udhari)
+def invalidate_udhari_cache(sender, instance, **kwargs):
+    business_id = _business_of(instance)
+    if business_id is not None:
+        bump_version_on_commit(UDHARI_CACHE_NAMESPACE, business_id)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_cache(sender, instance, **kwargs):
+    bump_version_on_commit(UDHARI_CACHE_NAMESPACE, instance.business_id)
@@ -0,0 +1,156 @@
+"""
+Monthly customer statements, rendered off the request thread.
+
+A statement is rendered once per (customer, month, customer.updated_at) to
+a file under MEDIA_ROOT/statements/, which nginx serves directly. Every
+Udhari write moves the customer's updated_at (see CustomerQuerySet.adjust),
+so a cached file goes stale exactly when that marker moves and the next
+request renders a new one. File names are an HMAC of the key, so a
+statement URL cannot be guessed from customer ids.
+
+Rendering runs in a small thread pool. A statement requested again while it
+is still rendering is only rendered once.
+"""
+import calendar
+import contextlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from glob import escape, glob
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from django.db.models import Case, F, Sum, When
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from dailyhisab.pdf import text_pdf
+
+from .models import Customer, Udhari
+
+STATEMENT_FORMATS = ('pdf', 'html')
+STATEMENT_DIR = 'statements'
+CENTS = Decimal('0.01')
+
+_executor = None
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def statement_period(month):
+    """First and last day of the month containing `month`."""
+    start = month.replace(day=1)
+    return start, start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+def statement_name(customer, month, fmt):
+    """Storage name of the statement for the customer as it is now."""
+    key = f'{customer.pk}:{month:%Y-%m}:{customer.updated_at.isoformat()}'
+    digest = salted_hmac('udhari.statement', key).hexdigest()[:32]
+    return f'{STATEMENT_DIR}/{customer.business_id}/{customer.pk}/{month:%Y-%m}-{digest}.{fmt}'
+
+
+def statement_data(customer, month):
+    """Opening balance, the month's entries with a running balance, and totals. Positive means the customer owes."""
+    start, end = statement_period(month)
+    entries = Udhari.objects.filter(customer=customer)
+    signed = Case(When(given=True, then=F('amount')), default=-F('amount'))
+    opening = entries.filter(date__lt=start).aggregate(total=Sum(signed, default=Decimal('0')))['total']
+    balance = Decimal(opening).quantize(CENTS)
+    rows, given, received = [], Decimal('0'), Decimal('0')
+    period = entries.filter(date__range=(start, end)).order_by('date', 'id')
+    for date, is_given, amount, notes in period.values_list('date', 'given', 'amount', 'notes'):
+        if is_given:
+            given += amount
+            balance += amount
+        else:
+            received += amount
+            balance -= amount
+        rows.append({'date': date, 'given': is_given, 'amount': amount, 'notes': notes or '', 'balance': balance})
+    return {
+        'customer': customer,
+        'business': customer.business,
+        'start': start,
+        'end': end,
+        'opening': Decimal(opening).quantize(CENTS),
+        'rows': rows,
+        'given': given,
+        'received': received,
+        'closing': balance,
+        'generated_at': timezone.localtime(),
+    }
+
+
+def render_statement(customer, month, fmt):
+    data = statement_data(customer, month)
+    if fmt == 'html':
+        return render_to_string('udhari/statement.html', data).encode('utf-8')
+    return text_pdf(render_to_string('udhari/statement.txt', data).splitlines())
+
+
+def _write(name, content):
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside the target and rename, so nginx never serves half a file.
+    partial = f'{path}.{threading.get_ident()}.part'
+    with open(partial, 'wb') as handle:
+        handle.write(content)
+    os.replace(partial, path)
+    prefix, suffix = path.rsplit('-', 1)[0], os.path.splitext(path)[1]
+    for stale in glob(f'{escape(prefix)}-*{suffix}'):
+        if stale != path:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(stale)
+
+
+def generate_statement(customer_id, month, fmt):
+    """Render the current statement unless it is already on disk; returns its storage name."""
+    customer = Customer.objects.select_related('business').get(pk=customer_id)
+    name = statement_name(customer, month, fmt)
+    if not default_storage.exists(name):
+        _write(name, render_statement(customer, month, fmt))
+    return name
+
+
+def _generate_in_worker(customer_id, month, fmt):
+    close_old_connections()
+    try:
+        return generate_statement(customer_id, month, fmt)
+    finally:
+        # Pool threads outlive requests; don't leave their connections open.
+        connection.close()
+
+
+def _forget(name):
+    def callback(_future):
+        with _lock:
+            _in_flight.pop(name, None)
+    return callback
+
+
+def submit_statement(customer, month, fmt):
+    """Queue rendering of the customer's current statement, joining a render already in flight."""
+    global _executor
+    name = statement_name(customer, month, fmt)
+    with _lock:
+        future = _in_flight.get(name)
+        if future is not None:
+            return future
+        if _executor is None:
+            # Created on first use, so each gunicorn worker gets its own after forking.
+            _executor = ThreadPoolExecutor(max_workers=settings.STATEMENT_WORKERS, thread_name_prefix='statements')
+        future = _in_flight[name] = _executor.submit(_generate_in_worker, customer.pk, month, fmt)
+    future.add_done_callback(_forget(name))
+    return future
+
+
+def request_statement(customer, month, fmt):
+    """The storage name if the current statement is ready; otherwise queue it and return None."""
+    name = statement_name(customer, month, fmt)
+    if default_storage.exists(name):
+        return name
+    submit_statement(customer, month, fmt)
+    return None
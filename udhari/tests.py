@@ -1,3 +1,360 @@
+import datetime
+import io
+import os
+from unittest import mock
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F, Max, Q, Sum
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.caching import get_version
+from dailyhisab.testing import APITestCaseMixin, ListQueryCountMixin, MediaRootMixin
+from notifications.models import Notification
+from .aging import UDHARI_CACHE_NAMESPACE
+from .models import Customer, Udhari, UdhariSettlement
+from .normalize import normalize_phone, normalize_phone_prefix
+from .reminders import send_due_reminders
+from . import statements
+
+JAN, FEB, MAR = datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)
+
+
+class UdhariHistoryTestCase(APITestCaseMixin, TestCase):
+    """Builds a history with every kind of write the maintained udhari columns have to follow."""
+
+    def customer(self, name):
+        return Customer.objects.create(business=self.business, name=name)
+
+    def entry(self, customer, amount, date, given=True, **fields):
+        return Udhari.objects.create(customer=customer, amount=Decimal(amount), given=given, date=date, **fields)
+
+    def make_history(self):
+        ravi, meena = self.customer('Ravi'), self.customer('Meena')
+        bill = self.entry(ravi, '100.00', JAN.replace(day=5))
+        self.entry(ravi, '40.00', JAN.replace(day=20))
+        paid = self.entry(ravi, '60.00', FEB.replace(day=1), given=False)
+        self.entry(meena, '30.00', JAN.replace(day=8))
+        moved = self.entry(meena, '25.00', FEB.replace(day=3), given=False)
+
+        bill.amount = Decimal('80.00')
+        bill.save()
+        paid.date = JAN.replace(day=2)
+        paid.save()
+        moved.customer = ravi
+        moved.save()
+        self.entry(meena, '10.00', MAR.replace(day=1), given=False).delete()
+        self.entry(ravi, '15.00', MAR.replace(day=4), status='paid')
+        written_off = self.entry(meena, '12.00', FEB.replace(day=14))
+        written_off.status = 'paid'
+        written_off.save()
+        return ravi, meena
+
+    def raw_balance(self, customer):
+        open_amount = F('amount') - F('settled_amount')
+        totals = Udhari.objects.filter(customer=customer, status='unpaid').aggregate(
+            credit=Sum(open_amount, filter=Q(given=True)), repayment=Sum(open_amount, filter=Q(given=False)),
+        )
+        return (totals['credit'] or Decimal('0')) - (totals['repayment'] or Decimal('0'))
+
+
+class OutstandingBalanceTests(UdhariHistoryTestCase):
+    def assertReconciled(self):
+        out = io.StringIO()
+        call_command('reconcile_customer_balances', '--dry-run', business=self.business.pk, stdout=out)
+        self.assertIn('found 0 mismatches', out.getvalue())
+
+    def test_history_matches_reconcile(self):
+        ravi, meena = self.make_history()
+        for customer in (ravi, meena):
+            customer.refresh_from_db()
+            self.assertEqual(customer.outstanding_balance, self.raw_balance(customer))
+            latest = Udhari.objects.filter(customer=customer).aggregate(latest=Max('date'))['latest']
+            self.assertEqual(customer.last_transaction_date, latest)
+        self.assertEqual((ravi.outstanding_balance, meena.outstanding_balance), (Decimal('35.00'), Decimal('30.00')))
+        self.assertReconciled()
+
+    def test_drift_is_reported_and_repaired(self):
+        ravi = self.customer('Ravi')
+        self.entry(ravi, '20.00', JAN)
+        Customer.objects.filter(pk=ravi.pk).update(outstanding_balance=Decimal('5.00'), last_transaction_date=None)
+        version = get_version(UDHARI_CACHE_NAMESPACE, self.business.pk)
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_customer_balances', business=self.business.pk, stdout=out)
+        self.assertIn('repaired 1 mismatches', out.getvalue())
+        self.assertNotEqual(get_version(UDHARI_CACHE_NAMESPACE, self.business.pk), version)
+        ravi.refresh_from_db()
+        self.assertEqual((ravi.outstanding_balance, ravi.last_transaction_date), (Decimal('20.00'), JAN))
+        self.assertReconciled()
+
+    def test_customer_edit_keeps_balance(self):
+        ravi = self.customer('Ravi')
+        self.entry(ravi, '20.00', JAN)
+        ravi.name = 'Ravi Kumar'
+        ravi.save()
+        self.assertReconciled()
+
+
+class SettlementTests(UdhariHistoryTestCase):
+    def settlement_state(self):
+        return (
+            list(Udhari.objects.order_by('pk').values_list('pk', 'settled_amount', 'status')),
+            list(UdhariSettlement.objects.order_by('pk').values_list('credit_id', 'repayment_id', 'amount', 'date')),
+        )
+
+    def assertSettled(self):
+        """Allocations add up on both sides, and neither settle_udhari nor reconcile finds anything to do."""
+        allocated = {}
+        for credit_id, repayment_id, amount in UdhariSettlement.objects.values_list('credit_id', 'repayment_id', 'amount'):
+            allocated[credit_id] = allocated.get(credit_id, Decimal('0')) + amount
+            allocated[repayment_id] = allocated.get(repayment_id, Decimal('0')) + amount
+        open_directions = {}
+        for entry in Udhari.objects.all():
+            self.assertEqual(entry.settled_amount, allocated.get(entry.pk, Decimal('0')), entry.pk)
+            self.assertLessEqual(entry.settled_amount, entry.amount)
+            if entry.status == 'unpaid' and entry.remaining:
+                open_directions.setdefault(entry.customer_id, set()).add(entry.given)
+        self.assertTrue(all(len(directions) == 1 for directions in open_directions.values()), open_directions)
+
+        maintained = self.settlement_state()
+        out = io.StringIO()
+        call_command('settle_udhari', business=self.business.pk, stdout=out)
+        self.assertIn('Made 0 udhari settlements', out.getvalue())
+        self.assertEqual(maintained, self.settlement_state())
+        out = io.StringIO()
+        call_command('reconcile_customer_balances', '--dry-run', business=self.business.pk, stdout=out)
+        self.assertIn('found 0 mismatches', out.getvalue())
+
+    def test_history_matches_settle_and_reconcile(self):
+        ravi, meena = self.make_history()
+        self.assertSettled()
+        # The repayments of 60.00 and 25.00 clear the first bill (80.00) and 5.00 of the second.
+        bills = Udhari.objects.filter(customer=ravi, given=True).order_by('date')
+        self.assertEqual(
+            [(bill.amount, bill.settled_amount, bill.status) for bill in bills],
+            [(Decimal('80.00'), Decimal('80.00'), 'paid'), (Decimal('40.00'), Decimal('5.00'), 'unpaid'),
+             (Decimal('15.00'), Decimal('0.00'), 'paid')],
+        )
+
+    def test_edits_and_deletes_reallocate(self):
+        ravi = self.customer('Ravi')
+        first = self.entry(ravi, '50.00', JAN.replace(day=1))
+        second = self.entry(ravi, '30.00', JAN.replace(day=10))
+        payment = self.entry(ravi, '60.00', JAN.replace(day=20), given=False)
+        self.assertSettled()
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'paid')
+
+        payment.amount = Decimal('40.00')
+        payment.save()
+        self.assertSettled()
+        second.refresh_from_db()
+        self.assertEqual((second.settled_amount, second.status), (Decimal('0.00'), 'unpaid'))
+
+        first.delete()
+        self.assertSettled()
+        second.refresh_from_db()
+        self.assertEqual((second.settled_amount, second.status), (Decimal('30.00'), 'paid'))
+        payment.refresh_from_db()
+        self.assertEqual(payment.remaining, Decimal('10.00'))
+
+        self.entry(ravi, '25.00', FEB.replace(day=1))
+        payment.delete()
+        self.assertSettled()
+        ravi.refresh_from_db()
+        self.assertEqual(ravi.outstanding_balance, Decimal('55.00'))
+
+
+class AgingTests(UdhariHistoryTestCase):
+    AS_OF = datetime.date(2025, 6, 30)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def days_ago(self, days):
+        return self.AS_OF - datetime.timedelta(days=days)
+
+    def aging(self):
+        response = self.client.get('/api/udhari/aging/', {'business': self.business.pk, 'as_of': self.AS_OF.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_bucket_boundaries(self):
+        ravi = self.customer('Ravi')
+        for days, amount in ((0, '1.00'), (30, '2.00'), (31, '4.00'), (60, '8.00'), (61, '16.00'), (90, '32.00'), (91, '64.00')):
+            self.entry(ravi, amount, self.days_ago(days))
+        # Not yet due counts as current; a due date overrides the entry date.
+        self.entry(ravi, '100.00', self.days_ago(200), due_date=self.AS_OF + datetime.timedelta(days=5))
+        self.entry(ravi, '200.00', self.days_ago(10), due_date=self.days_ago(45))
+        # Paid credit and repayments are not receivables.
+        self.entry(ravi, '500.00', self.days_ago(5), status='paid')
+
+        data = self.aging()
+        expected = {'days_0_30': '103.00', 'days_31_60': '212.00', 'days_61_90': '48.00', 'days_90_plus': '64.00', 'total': '427.00'}
+        self.assertEqual(data['totals'], expected)
+        self.assertEqual(data['results'], [{'customer_id': ravi.pk, 'name': 'Ravi', 'phone': None, **expected}])
+
+    def test_partially_settled_credit_counts_what_is_left(self):
+        ravi, meena = self.customer('Ravi'), self.customer('Meena')
+        self.entry(ravi, '100.00', self.days_ago(70))
+        self.entry(ravi, '50.00', self.days_ago(10))
+        self.entry(ravi, '40.00', self.days_ago(5), given=False)
+        self.entry(meena, '20.00', self.days_ago(3))
+        self.entry(meena, '20.00', self.days_ago(2), given=False)
+
+        data = self.aging()
+        self.assertEqual(
+            data['totals'], {'days_0_30': '50.00', 'days_31_60': '0.00', 'days_61_90': '60.00', 'days_90_plus': '0.00', 'total': '110.00'},
+        )
+        self.assertEqual([row['customer_id'] for row in data['results']], [ravi.pk])
+
+    def test_writes_show_on_next_request(self):
+        ravi = self.customer('Ravi')
+        with self.captureOnCommitCallbacks(execute=True):
+            credit = self.entry(ravi, '30.00', self.days_ago(40))
+        self.assertEqual(self.aging()['totals']['days_31_60'], '30.00')
+        with self.assertNumQueries(0):
+            self.aging()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry(ravi, '10.00', self.days_ago(1), given=False)
+        self.assertEqual(self.aging()['totals']['days_31_60'], '20.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            credit.delete()
+        self.assertEqual(self.aging()['totals']['total'], '0.00')
+
+    def test_invalid_as_of(self):
+        response = self.client.get('/api/udhari/aging/', {'business': self.business.pk, 'as_of': '2025-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReminderTests(UdhariHistoryTestCase):
+    TODAY = datetime.date(2025, 3, 10)
+
+    def test_only_due_unpaid_reminder_entries(self):
+        ravi, meena, kiran = self.customer('Ravi'), self.customer('Meena'), self.customer('Kiran')
+        self.entry(ravi, '100.00', JAN, due_date=FEB, reminder=True)
+        self.entry(ravi, '50.00', JAN, due_date=self.TODAY, reminder=True)
+        self.entry(ravi, '70.00', JAN, due_date=self.TODAY + datetime.timedelta(days=1), reminder=True)
+        self.entry(ravi, '30.00', JAN, due_date=FEB)
+        self.entry(meena, '25.00', JAN, given=False, due_date=FEB, reminder=True)
+        self.entry(kiran, '40.00', JAN, due_date=FEB, reminder=True, status='paid')
+
+        self.assertEqual(send_due_reminders(today=self.TODAY), 2)
+        messages = dict(Notification.objects.filter(user=self.user).values_list('title', 'message'))
+        self.assertEqual(messages, {
+            'Udhari due: Ravi': '2 udhari entries with Ravi due since 2025-02-01: collect 150.00.',
+            'Udhari due: Meena': '1 udhari entry with Meena due since 2025-02-01: pay 25.00.',
+        })
+
+    def test_rerun_does_not_send_twice(self):
+        ravi = self.customer('Ravi')
+        credit = self.entry(ravi, '100.00', JAN, due_date=FEB, reminder=True)
+        self.assertEqual(send_due_reminders(today=self.TODAY), 1)
+        self.assertEqual(send_due_reminders(today=self.TODAY), 0)
+        self.assertEqual(send_due_reminders(today=self.TODAY + datetime.timedelta(days=1)), 0)
+        self.assertEqual(Notification.objects.count(), 1)
+
+        # A new due date asks for a new reminder.
+        credit.due_date = MAR
+        credit.save()
+        self.assertEqual(send_due_reminders(today=self.TODAY), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class StatementTests(MediaRootMixin, UdhariHistoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ravi = self.customer('Ravi')
+        self.entry(self.ravi, '100.00', JAN.replace(day=20))
+        self.entry(self.ravi, '30.00', FEB.replace(day=3), given=False)
+        self.entry(self.ravi, '45.00', FEB.replace(day=14))
+
+    def name(self):
+        return statements.statement_name(Customer.objects.get(pk=self.ravi.pk), FEB, 'pdf')
+
+    def test_statement_figures(self):
+        data = statements.statement_data(Customer.objects.get(pk=self.ravi.pk), FEB)
+        self.assertEqual((data['opening'], data['given'], data['received'], data['closing']),
+                         (Decimal('100.00'), Decimal('45.00'), Decimal('30.00'), Decimal('115.00')))
+        self.assertEqual([row['balance'] for row in data['rows']], [Decimal('70.00'), Decimal('115.00')])
+
+    def test_name_follows_the_ledger(self):
+        before = self.name()
+        self.assertEqual(self.name(), before)
+        self.entry(self.ravi, '5.00', MAR.replace(day=2))
+        after = self.name()
+        self.assertNotEqual(after, before)
+        self.assertNotEqual(statements.statement_name(Customer.objects.get(pk=self.ravi.pk), JAN, 'pdf'), after)
+
+    def test_unchanged_statement_is_reused(self):
+        render = mock.Mock(wraps=statements.render_statement)
+        with mock.patch.object(statements, 'render_statement', render):
+            name = statements.generate_statement(self.ravi.pk, FEB, 'pdf')
+            self.assertEqual(statements.generate_statement(self.ravi.pk, FEB, 'pdf'), name)
+            self.assertEqual(statements.request_statement(Customer.objects.get(pk=self.ravi.pk), FEB, 'pdf'), name)
+            self.assertEqual(render.call_count, 1)
+            path = os.path.join(self.media_root, name)
+            with open(path, 'rb') as handle:
+                self.assertTrue(handle.read().startswith(b'%PDF-'))
+
+            # A new entry renders a new file and drops the stale one.
+            self.entry(self.ravi, '5.00', FEB.replace(day=20))
+            fresh = statements.generate_statement(self.ravi.pk, FEB, 'pdf')
+            self.assertEqual(render.call_count, 2)
+        self.assertNotEqual(fresh, name)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, fresh)))
+
+
+class PhoneTests(APITestCaseMixin, TestCase):
+    def test_normalize_phone(self):
+        for typed in ('9876543210', '09876543210', '98765 43210', '+91 98765-43210', '0091 9876543210',
+                      '919876543210', '91 98765 43210', '(91) 98765-43210'):
+            self.assertEqual(normalize_phone(typed), '+919876543210', typed)
+        # A national number that merely starts with the country code digits.
+        self.assertEqual(normalize_phone('9198765432'), '+919198765432')
+        self.assertIsNone(normalize_phone('12'))
+
+    def test_normalize_phone_prefix(self):
+        for typed in ('98765', '098765', '+9198765', '919876543210', '91 98765 43210'):
+            self.assertTrue('+919876543210'.startswith(normalize_phone_prefix(typed)), typed)
+        self.assertEqual(normalize_phone_prefix('9198'), '+919198')
+
+    def test_search_by_coded_number(self):
+        ravi = Customer.objects.create(business=self.business, name='Ravi', phone='919876543210')
+        Customer.objects.create(business=self.business, name='Meena', phone='9198765432')
+        for query in ('91 98765 43210', '98765', '+91 98765'):
+            response = self.client.get('/api/udhari/customer/search/', {'business': self.business.pk, 'q': query})
+            self.assertEqual([row['id'] for row in response.data], [ravi.pk], query)
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def add_customers(self, count, balance=Decimal('0')):
+        Customer.objects.bulk_create(
+            Customer(business=self.business, name='Ravi', outstanding_balance=balance) for _ in range(count)
+        )
+
+    def test_customer_list(self):
+        self.assertConstantQueries('/api/udhari/customer/', self.add_customers, 1)
+
+    def test_outstanding_customers(self):
+        self.assertConstantQueries(
+            '/api/udhari/customer/outstanding/', lambda count: self.add_customers(count, Decimal('50.00')), 1,
+            {'business': self.business.pk},
+        )
+
+    def test_udhari_list_joins_customer(self):
+        customer = Customer.objects.create(business=self.business, name='Ravi')
+
+        def create_rows(count):
+            Udhari.objects.bulk_create(
+                Udhari(customer=customer, amount=Decimal('10.00'), given=True, date=datetime.date(2025, 1, 1))
+                for _ in range(count)
+            )
+
+        response = self.assertConstantQueries('/api/udhari/', create_rows, 1)
+        self.assertEqual(response.data['results'][0]['customer']['name'], 'Ravi')
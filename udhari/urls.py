@@ -11,6 +11,9 @@ urlpatterns = [
     path('customer/<int:pk>/', views.customer_detail, name='customer-detail'),
     path('customer/<int:pk>/update/', views.customer_update, name='customer-update'),
     path('customer/<int:pk>/delete/', views.customer_delete, name='customer-delete'),
+    path('customer/outstanding/', views.customer_outstanding, name='customer-outstanding'),
+    path('customer/search/', views.customer_search, name='customer-search'),
+    path('customer/<int:pk>/statement/', views.customer_statement, name='customer-statement'),
 
     # Udhari endpoints
     path('', views.udhari_list, name='udhari-list'),
@@ -18,4 +21,6 @@ urlpatterns = [
     path('<int:pk>/', views.udhari_detail, name='udhari-detail'),
     path('<int:pk>/update/', views.udhari_update, name='udhari-update'),
     path('<int:pk>/delete/', views.udhari_delete, name='udhari-delete'),
+    path('<int:pk>/settlements/', views.udhari_settlements, name='udhari-settlements'),
+    path('aging/', views.udhari_aging, name='udhari-aging'),
 ]
@@ -1,12 +1,24 @@
 
+import datetime
+import re
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from .aging import AGING_BUCKETS, UDHARI_CACHE_NAMESPACE, aged_customers, aging_totals, money
 from .models import Customer, Udhari
-from .serializers import CustomerSerializer, UdhariSerializer
+from .normalize import name_key, normalize_phone_prefix, prefix_filter
+from .serializers import CustomerSerializer, UdhariSerializer, UdhariSettlementSerializer
+from .statements import STATEMENT_FORMATS, request_statement
+from dailyhisab.caching import cached_for_business
+from dailyhisab.pagination import CURSOR_PARAMETERS, KeysetPagination, paginate
+from dailyhisab.prefetch import optimize_queryset
 
 # Customer APIs
 @swagger_auto_schema(
@@ -14,6 +26,7 @@ from .serializers import CustomerSerializer, UdhariSerializer
     operation_description="Retrieve a list of all customers",
     operation_summary="Get all customers",
     tags=['Customers'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="Customers retrieved successfully",
@@ -40,8 +53,7 @@ from .serializers import CustomerSerializer, UdhariSerializer
 @api_view(['GET'])
 def customer_list(request):
     customers = Customer.objects.all()
-    serializer = CustomerSerializer(customers, many=True)
-    return Response(serializer.data)
+    return paginate(request, customers, CustomerSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',
@@ -113,12 +125,119 @@ def customer_delete(request, pk):
     customer.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
+CUSTOMER_SEARCH_DEFAULT_LIMIT = 10
+CUSTOMER_SEARCH_MAX_LIMIT = 50
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Typeahead over a business's customers: input that looks like a phone number matches the "
+                          "start of the customer's phone (in any common format), anything else the start of the name. "
+                          "For matches on any word of a name use the search API.",
+    operation_summary="Search customers by name or phone prefix",
+    tags=['Customers'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('q', openapi.IN_QUERY, description="Start of a name or phone number", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Maximum results (default {CUSTOMER_SEARCH_DEFAULT_LIMIT}, max {CUSTOMER_SEARCH_MAX_LIMIT})", type=openapi.TYPE_INTEGER, required=False),
+    ],
+    responses={
+        200: openapi.Response(description="Matching customers", schema=CustomerSerializer(many=True)),
+        400: openapi.Response(description="Missing business or query")
+    }
+)
+@api_view(['GET'])
+def customer_search(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'q': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', CUSTOMER_SEARCH_DEFAULT_LIMIT)), 1), CUSTOMER_SEARCH_MAX_LIMIT)
+    except ValueError:
+        limit = CUSTOMER_SEARCH_DEFAULT_LIMIT
+
+    customers = Customer.objects.filter(business_id=business_id)
+    phone_prefix = normalize_phone_prefix(query) if re.fullmatch(r'[+\d\s().-]+', query) else None
+    if phone_prefix:
+        customers = customers.filter(prefix_filter('normalized_phone', phone_prefix)).order_by('normalized_phone', 'id')
+    else:
+        customers = customers.filter(prefix_filter('name_key', name_key(query))).order_by('name_key', 'id')
+    serializer = CustomerSerializer(customers[:limit], many=True)
+    return Response(serializer.data)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Customers of a business who owe money, largest outstanding balance first",
+    operation_summary="Get customers with outstanding balance",
+    tags=['Customers'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(description="Customers retrieved successfully", schema=CustomerSerializer(many=True)),
+        400: openapi.Response(description="Missing business")
+    }
+)
+@api_view(['GET'])
+def customer_outstanding(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    customers = Customer.objects.filter(business_id=business_id, outstanding_balance__gt=0)
+    return paginate(request, customers, CustomerSerializer, ordering=('-outstanding_balance', '-id'))
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Monthly statement of a customer's udhari: opening balance, the month's entries with a "
+                          "running balance, and the closing balance. Statements are rendered in the background and "
+                          "cached until the customer's entries change: a 202 means rendering has started and the "
+                          "request should be repeated; a 200 carries the URL of the file, served as a static file.",
+    operation_summary="Get customer statement",
+    tags=['Customers'],
+    manual_parameters=[
+        openapi.Parameter('month', openapi.IN_QUERY, description="Statement month (YYYY-MM, default the current month)", type=openapi.TYPE_STRING, required=False),
+        openapi.Parameter('file_format', openapi.IN_QUERY, description="File format", type=openapi.TYPE_STRING, enum=list(STATEMENT_FORMATS), required=False),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Statement ready",
+            examples={"application/json": {"status": "ready", "url": "http://localhost/media/statements/1/7/2025-03-3f9c0a.pdf"}}
+        ),
+        202: openapi.Response(description="Statement is being rendered", examples={"application/json": {"status": "pending"}}),
+        400: openapi.Response(description="Invalid month or format"),
+        404: openapi.Response(description="Customer not found")
+    }
+)
+@api_view(['GET'])
+def customer_statement(request, pk):
+    try:
+        customer = Customer.objects.get(pk=pk)
+    except Customer.DoesNotExist:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        month = datetime.datetime.strptime(request.query_params['month'], '%Y-%m').date()
+    except KeyError:
+        month = timezone.localdate().replace(day=1)
+    except ValueError:
+        return Response({'month': ['Enter a valid month (YYYY-MM).']}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = request.query_params.get('file_format', 'pdf')
+    if fmt not in STATEMENT_FORMATS:
+        return Response({'file_format': [f'Choose one of: {", ".join(STATEMENT_FORMATS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    name = request_statement(customer, month, fmt)
+    if name is None:
+        return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+    return Response({'status': 'ready', 'url': request.build_absolute_uri(default_storage.url(name))})
+
 # Udhari APIs
 @api_view(['GET'])
 def udhari_list(request):
     udharis = Udhari.objects.all()
-    serializer = UdhariSerializer(udharis, many=True)
-    return Response(serializer.data)
+    return paginate(request, udharis, UdhariSerializer, ordering=('-date', '-id'))
 
 @api_view(['POST'])
 def udhari_create(request):
@@ -131,7 +250,7 @@ def udhari_create(request):
 @api_view(['GET'])
 def udhari_detail(request, pk):
     try:
-        udhari = Udhari.objects.get(pk=pk)
+        udhari = optimize_queryset(Udhari.objects.all(), UdhariSerializer).get(pk=pk)
     except Udhari.DoesNotExist:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     serializer = UdhariSerializer(udhari)
@@ -157,3 +276,89 @@ def udhari_delete(request, pk):
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     udhari.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="How an entry was settled: for a credit the repayments allocated to it, for a repayment "
+                          "the credits it cleared, oldest first. What is still open is `amount - settled_amount` "
+                          "on the entry itself.",
+    operation_summary="List settlements of an udhari entry",
+    tags=['Udhari'],
+    responses={
+        200: openapi.Response(description="Allocations", schema=UdhariSettlementSerializer(many=True)),
+        404: openapi.Response(description="Entry not found")
+    }
+)
+@api_view(['GET'])
+def udhari_settlements(request, pk):
+    try:
+        udhari = Udhari.objects.get(pk=pk)
+    except Udhari.DoesNotExist:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    related = 'settlements' if udhari.given else 'allocations'
+    settlements = getattr(udhari, related).order_by('date', 'id')
+    serializer = UdhariSettlementSerializer(settlements, many=True)
+    return Response(serializer.data)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Receivables aging of a business: unpaid credit given per customer, bucketed by days past "
+                          "the due date (or the entry date when there is none). Entries not yet due count as 0-30. "
+                          "Results are cached until the business's udhari entries or customers change.",
+    operation_summary="Get receivables aging report",
+    tags=['Reports & Analytics'],
+    manual_parameters=[
+        openapi.Parameter('business', openapi.IN_QUERY, description="Business ID", type=openapi.TYPE_INTEGER, required=True),
+        openapi.Parameter('as_of', openapi.IN_QUERY, description="Age entries as of this date (YYYY-MM-DD, default today)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+    ] + CURSOR_PARAMETERS,
+    responses={
+        200: openapi.Response(
+            description="Aging report computed",
+            examples={
+                "application/json": {
+                    "next": None,
+                    "first": "http://localhost:8000/api/udhari/aging/?business=1",
+                    "as_of": "2025-03-31",
+                    "totals": {"days_0_30": "12000.00", "days_31_60": "4000.00", "days_61_90": "0.00", "days_90_plus": "1500.00", "total": "17500.00"},
+                    "results": [
+                        {"customer_id": 1, "name": "Rajesh Kumar", "phone": "9876543210", "days_0_30": "5000.00", "days_31_60": "0.00", "days_61_90": "0.00", "days_90_plus": "1500.00", "total": "6500.00"}
+                    ]
+                }
+            }
+        ),
+        400: openapi.Response(description="Missing business or invalid date")
+    }
+)
+@api_view(['GET'])
+def udhari_aging(request):
+    try:
+        business_id = int(request.query_params['business'])
+    except (KeyError, ValueError):
+        return Response({'business': ['A valid business ID is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        as_of = parse_date(request.query_params.get('as_of') or timezone.localdate().isoformat())
+    except ValueError:
+        as_of = None
+    if as_of is None:
+        return Response({'as_of': ['Enter a valid date (YYYY-MM-DD).']}, status=status.HTTP_400_BAD_REQUEST)
+
+    def compute():
+        paginator = KeysetPagination(('id',))
+        page = paginator.paginate_queryset(aged_customers(business_id, as_of), request)
+        fields = [name for name, _min_age, _max_age in AGING_BUCKETS] + ['total']
+        results = [
+            {
+                'customer_id': customer.id,
+                'name': customer.name,
+                'phone': customer.phone,
+                **{field: money(getattr(customer, field)) for field in fields},
+            }
+            for customer in page
+        ]
+        data = paginator.get_paginated_response(results).data
+        data['as_of'] = as_of.isoformat()
+        data['totals'] = {field: money(value) for field, value in aging_totals(business_id, as_of).items()}
+        return data
+
+    key_parts = ['aging', as_of, request.query_params.get('cursor', ''), request.query_params.get('page_size', '')]
+    return Response(cached_for_business(UDHARI_CACHE_NAMESPACE, business_id, key_parts, compute))
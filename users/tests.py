@@ -1,3 +1,22 @@
 from django.test import TestCase
 
-# Create your tests here.
+from dailyhisab.testing import ListQueryCountMixin
+from .models import Business, User
+
+
+class ListQueryTests(ListQueryCountMixin, TestCase):
+    def test_user_list(self):
+        def create_rows(count):
+            for _ in range(count):
+                business = Business.objects.create(name='Branch', owner=self.user)
+                User.objects.create_user(f'staff-{User.objects.count()}', business=business)
+
+        response = self.assertConstantQueries('/api/users/', create_rows, 1)
+        self.assertEqual(response.data['results'][0]['business']['name'], 'Branch')
+
+    def test_business_list(self):
+        def create_rows(count):
+            for _ in range(count):
+                Business.objects.create(name='Branch', owner=self.user)
+
+        self.assertConstantQueries('/api/users/business/', create_rows, 1)
@@ -8,6 +8,8 @@ from .models import Business
 from .serializers import UserSerializer, BusinessSerializer
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from dailyhisab.pagination import CURSOR_PARAMETERS, paginate
+from dailyhisab.prefetch import optimize_queryset
 
 User = get_user_model()
 
@@ -16,6 +18,7 @@ User = get_user_model()
     operation_description="Retrieve a list of all users in the system",
     operation_summary="Get all users",
     tags=['Users'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="List of users retrieved successfully",
@@ -50,8 +53,7 @@ User = get_user_model()
 @api_view(['GET'])
 def user_list(request):
     users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data)
+    return paginate(request, users, UserSerializer, ordering=('-date_joined', '-id'))
 
 @swagger_auto_schema(
     method='get',
@@ -108,7 +110,7 @@ def user_list(request):
 @api_view(['GET'])
 def user_detail(request, pk):
     try:
-        user = User.objects.get(pk=pk)
+        user = optimize_queryset(User.objects.all(), UserSerializer).get(pk=pk)
     except User.DoesNotExist:
         return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
     serializer = UserSerializer(user)
@@ -312,6 +314,7 @@ def user_delete(request, pk):
     operation_description="Retrieve a list of all businesses",
     operation_summary="Get all businesses",
     tags=['Business'],
+    manual_parameters=CURSOR_PARAMETERS,
     responses={
         200: openapi.Response(
             description="List of businesses retrieved successfully",
@@ -333,8 +336,7 @@ def user_delete(request, pk):
 @api_view(['GET'])
 def business_list(request):
     businesses = Business.objects.all()
-    serializer = BusinessSerializer(businesses, many=True)
-    return Response(serializer.data)
+    return paginate(request, businesses, BusinessSerializer, ordering=('-created_at', '-id'))
 
 @swagger_auto_schema(
     method='post',